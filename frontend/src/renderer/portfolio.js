@@ -344,8 +344,10 @@ async function fetchPortfolioEntryMap(projects) {
   return buildPortfolioEntryMap(entries);
 }
 
-function getPortfolioImageAuthPath(projectId, imageId) {
-  return `/portfolio/${encodeURIComponent(projectId)}/images/${encodeURIComponent(imageId)}/file`;
+function getPortfolioImageAuthPath(projectId, imageId, width) {
+  const base = `/portfolio/${encodeURIComponent(projectId)}/images/${encodeURIComponent(imageId)}/file`;
+  // The server keeps 128/256/512 px variants; small previews should not pull originals.
+  return width ? `${base}?w=${width}` : base;
 }
 
 function buildProfile(summaryData) {
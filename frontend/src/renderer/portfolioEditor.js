@@ -75,7 +75,7 @@ function buildProjectThemeDetails(project, override = {}) {
               (image) => `
                 <div class="portfolio-theme-gallery-item">
                   <img
-                    data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, image.id))}"
+                    data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, image.id, 256))}"
                     alt="${escapeHtml(image.caption || "Project image")}"
                   />
                   <p>${escapeHtml(image.caption || override.portfolioBlurb || "")}</p>
@@ -218,8 +218,10 @@ async function setPortfolioCoverImage(projectId, imageId) {
   return true;
 }
 
-function getPortfolioImageAuthPath(projectId, imageId) {
-  return `/portfolio/${encodeURIComponent(projectId)}/images/${encodeURIComponent(imageId)}/file`;
+function getPortfolioImageAuthPath(projectId, imageId, width) {
+  const base = `/portfolio/${encodeURIComponent(projectId)}/images/${encodeURIComponent(imageId)}/file`;
+  // The server keeps 128/256/512 px variants; small previews should not pull originals.
+  return width ? `${base}?w=${width}` : base;
 }
 
 function hydratePortfolioEditorImages() {
@@ -558,7 +560,7 @@ function renderProjectEditors(projects, customization) {
         ? `<div class="portfolio-card-collapsed-preview portfolio-card-collapsed-cover" aria-hidden="true">
             <img
               class="portfolio-card-cover-thumb"
-              data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, cover.id))}"
+              data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, cover.id, 256))}"
               alt=""
             />
           </div>`
@@ -1421,7 +1423,7 @@ function buildWorkspaceEditorFormHtml(project, override, isFeatured, selectedTem
               <div class="portfolio-image-preview-wrap">
                 <img
                   class="portfolio-image-preview"
-                  data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, image.id))}"
+                  data-portfolio-auth-src="${escapeHtml(getPortfolioImageAuthPath(project.project_id, image.id, 256))}"
                   alt="${escapeHtml(image.caption || "Portfolio image")}"
                 />
                 ${image.is_cover ? `<span class="portfolio-image-cover-badge">Cover</span>` : ""}
@@ -305,7 +305,7 @@ function getProjectCardImageMedia(projectId, portfolioEntry, getPortfolioImageAu
   const cover = images.find((img) => img?.is_cover) || images[0];
 
   if (cover?.id && typeof getPortfolioImageAuthPath === "function") {
-    return { kind: "portfolio", path: getPortfolioImageAuthPath(projectId, cover.id) };
+    return { kind: "portfolio", path: getPortfolioImageAuthPath(projectId, cover.id, 512) };
   }
 
   if (typeof getProjectThumbnailUrl === "function") {
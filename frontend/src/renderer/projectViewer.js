@@ -335,9 +335,14 @@ async function _loadFileContent(path) {
     const data = await res.json();
 
     if (data.type === "image") {
+      // Image bytes come from the cacheable /raw URL rather than inline base64.
+      const imgRes = await authFetch(data.url);
+      if (!imgRes.ok) throw new Error(`HTTP ${imgRes.status}`);
+      const objectUrl = URL.createObjectURL(await imgRes.blob());
       contentEl.innerHTML = `<div class="pv-image-viewer">
-        <img src="data:${data.mime};base64,${data.content}" alt="${_esc(path)}" />
+        <img src="${objectUrl}" alt="${_esc(path)}" />
       </div>`;
+      contentEl.querySelector("img").addEventListener("load", () => URL.revokeObjectURL(objectUrl), { once: true });
     } else if (data.type === "text") {
       toolbar.style.display = "flex";
       document.getElementById("pv-save-status").textContent = "";
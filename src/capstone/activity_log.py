@@ -1,14 +1,116 @@
-from datetime import datetime
+"""User-visible activity feed, persisted per user in the ``activity_log`` table.
+
+:func:`log_event` is called from request handlers, so it only appends to an
+in-memory buffer (tagged with the storage user bound to the request) and
+returns.  The buffer is written to each user's database in one transaction
+by a short-lived timer thread ``FLUSH_DELAY_S`` seconds later, when it
+reaches ``FLUSH_AT`` events, before every read and at exit.  Each flush
+also applies retention: the newest ``CAPSTONE_ACTIVITY_MAX_ROWS`` events
+(default 5000) no older than ``CAPSTONE_ACTIVITY_RETENTION_DAYS`` (default 90).
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+from capstone import storage
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_ROWS = int(os.getenv("CAPSTONE_ACTIVITY_MAX_ROWS", "5000"))
+RETENTION_DAYS = int(os.getenv("CAPSTONE_ACTIVITY_RETENTION_DAYS", "90"))
+FLUSH_DELAY_S = 1.0
+FLUSH_AT = 100
+
+# (storage user key, (created_at, level, message))
+_pending: deque[tuple[str | None, tuple[str, str, str]]] = deque()
+_flush_lock = threading.Lock()
+_timer: threading.Timer | None = None
+_timer_lock = threading.Lock()
 
-activity_logs = []
 
 def log_event(level: str, message: str):
-    activity_logs.insert(0, {
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-        "level": level,
-        "message": message
-    })
-
-    # keep only last 200 logs
-    if len(activity_logs) > 200:
-        activity_logs.pop()
\ No newline at end of file
+    _pending.append(
+        (
+            storage.get_current_user(),
+            (datetime.utcnow().strftime(TIMESTAMP_FORMAT), level, message),
+        )
+    )
+    if len(_pending) >= FLUSH_AT:
+        flush()
+    else:
+        _schedule_flush()
+
+
+def _schedule_flush() -> None:
+    global _timer
+    with _timer_lock:
+        if _timer is None:
+            _timer = threading.Timer(FLUSH_DELAY_S, _flush_from_timer)
+            _timer.daemon = True
+            _timer.start()
+
+
+def _flush_from_timer() -> None:
+    global _timer
+    with _timer_lock:
+        _timer = None
+    flush()
+
+
+def flush() -> int:
+    """Write buffered events to their users' databases; returns how many."""
+    with _flush_lock:
+        by_user: dict[str | None, list[tuple[str, str, str]]] = {}
+        while _pending:
+            user, event = _pending.popleft()
+            by_user.setdefault(user, []).append(event)
+        written = 0
+        for user, events in by_user.items():
+            try:
+                conn = storage.open_db(user=user)
+                try:
+                    storage.insert_activity_events(conn, events)
+                    storage.prune_activity_events(conn, max_rows=MAX_ROWS, older_than=_retention_cutoff())
+                    conn.commit()
+                finally:
+                    storage.close_db(conn)
+                written += len(events)
+            except Exception:
+                logger.warning("Dropped %d activity event(s) for user %r", len(events), user, exc_info=True)
+        return written
+
+
+def _retention_cutoff() -> str | None:
+    if RETENTION_DAYS <= 0:
+        return None
+    return (datetime.utcnow() - timedelta(days=RETENTION_DAYS)).strftime(TIMESTAMP_FORMAT)
+
+
+def fetch_events(
+    *,
+    level: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> tuple[list[dict], int]:
+    """The current user's events (newest first) and the total matching the filters."""
+    flush()
+    conn = storage.open_db()
+    try:
+        events = storage.fetch_activity_events(
+            conn, level=level, since=since, until=until, limit=limit, after=after
+        )
+        return events, storage.count_activity_events(conn, level=level, since=since, until=until)
+    finally:
+        storage.close_db(conn)
+
+
+atexit.register(flush)
@@ -0,0 +1,332 @@
+"""Dedicated thread pool for blocking work reached from the event loop.
+
+Uploads, analysis, GitHub downloads and psutil sampling are synchronous.
+Running them inline in an ``async def`` route freezes every other client, and
+leaving them to Starlette's shared default pool lets one slow import starve
+cheap sync routes.  Routes hand such work to this bounded pool instead::
+
+    @router.post("/import")
+    @offload
+    def import_repository(...):
+        ...
+
+or, inside a coroutine, ``await run_blocking(func, *args)``.
+
+Work is scheduled in two priority classes, each with its own threads and
+queue limit:
+
+``Priority.INTERACTIVE``
+    What a user is waiting on (file tree, file view, dashboard reads);
+    ``CAPSTONE_BLOCKING_WORKERS`` threads (default 8), at most
+    ``CAPSTONE_INTERACTIVE_QUEUE`` jobs waiting (default 256).
+``Priority.BACKGROUND``
+    Bulk jobs (cloud sync, GitHub imports, PDF builds, batch analyses);
+    ``CAPSTONE_BACKGROUND_WORKERS`` threads (default 2), at most
+    ``CAPSTONE_BACKGROUND_QUEUE`` waiting (default 32).  ``@offload(priority=
+    Priority.BACKGROUND)`` or ``await run_background(func, *args)``.
+
+Background jobs yield to interactive ones: before starting, and wherever
+long jobs call :func:`yield_to_interactive`, they wait while any interactive
+job is running, for at most ``CAPSTONE_BACKGROUND_MAX_DEFER_S`` seconds
+(default 2) each time so they cannot starve.  A full queue raises
+:class:`SchedulerBusy` from :func:`submit`; ``@offload``, :func:`run_blocking`
+and :func:`run_background` turn it into ``503`` with ``Retry-After``.
+
+The request's ``contextvars`` (e.g. the storage user bound by the server
+middleware) are copied into the worker thread.  A job whose request was
+cancelled (``capstone.cancellation``) while it was queued is dropped.
+
+Set ``CAPSTONE_LOOP_LAG_MS`` to log whenever the event loop is blocked for
+longer than that many milliseconds (debug aid; off by default).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from capstone import cancellation, telemetry
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_WORKERS = int(os.getenv("CAPSTONE_BLOCKING_WORKERS", "8"))
+BACKGROUND_WORKERS = int(os.getenv("CAPSTONE_BACKGROUND_WORKERS", "2"))
+INTERACTIVE_QUEUE = int(os.getenv("CAPSTONE_INTERACTIVE_QUEUE", "256"))
+BACKGROUND_QUEUE = int(os.getenv("CAPSTONE_BACKGROUND_QUEUE", "32"))
+BACKGROUND_MAX_DEFER_S = float(os.getenv("CAPSTONE_BACKGROUND_MAX_DEFER_S", "2"))
+BUSY_RETRY_AFTER_S = 5
+# Shared budget for archive analyses fanned out by batch requests.
+ANALYSIS_WORKERS = int(os.getenv("CAPSTONE_ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("CAPSTONE_LOOP_LAG_MS", "0") or 0)
+
+
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+class SchedulerBusy(RuntimeError):
+    """The priority class already has its maximum number of jobs queued."""
+
+
+_executor: ThreadPoolExecutor | None = None
+_background_executor: ThreadPoolExecutor | None = None
+_analysis_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+# Jobs submitted and not yet finished, per class (running + queued).
+_pending = {Priority.INTERACTIVE: 0, Priority.BACKGROUND: 0}
+_pending_lock = threading.Lock()
+# Interactive jobs currently running; background jobs wait on this.
+_interactive_running = 0
+_interactive_idle = threading.Condition()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """The interactive pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, DEFAULT_WORKERS),
+                thread_name_prefix="capstone-blocking",
+            )
+        return _executor
+
+
+def get_background_executor() -> ThreadPoolExecutor:
+    global _background_executor
+    with _executor_lock:
+        if _background_executor is None:
+            _background_executor = ThreadPoolExecutor(
+                max_workers=max(1, BACKGROUND_WORKERS),
+                thread_name_prefix="capstone-background",
+            )
+        return _background_executor
+
+
+def get_analysis_executor() -> ThreadPoolExecutor:
+    """Pool shared by every batch analysis, so concurrent batches split one budget."""
+    global _analysis_executor
+    with _executor_lock:
+        if _analysis_executor is None:
+            _analysis_executor = ThreadPoolExecutor(
+                max_workers=max(1, ANALYSIS_WORKERS),
+                thread_name_prefix="capstone-analysis",
+            )
+        return _analysis_executor
+
+
+def _queue_depths():
+    pools = (
+        ("blocking", _executor),
+        ("background", _background_executor),
+        ("analysis", _analysis_executor),
+    )
+    for pool, executor in pools:
+        # Jobs accepted but not yet picked up by a worker.
+        queue = getattr(executor, "_work_queue", None)
+        yield {"pool": pool}, queue.qsize() if queue is not None else 0
+
+
+telemetry.REGISTRY.gauge(
+    "capstone_executor_queue_depth",
+    "Jobs waiting for a worker in the blocking (interactive), background and analysis pools.",
+    _queue_depths,
+    ("pool",),
+)
+
+
+def yield_to_interactive(max_wait_s: float | None = None) -> float:
+    """Wait while interactive jobs are running (at most *max_wait_s*); returns seconds waited.
+
+    Long background jobs call this between steps (e.g. between archives of a
+    batch) so a user's request is not stuck behind them on threads or on the
+    SQLite writer.
+    """
+    limit = BACKGROUND_MAX_DEFER_S if max_wait_s is None else max_wait_s
+    start = time.monotonic()
+    with _interactive_idle:
+        _interactive_idle.wait_for(lambda: _interactive_running == 0, timeout=limit)
+    return time.monotonic() - start
+
+
+def _run_interactive(call: Callable[[], T]) -> T:
+    global _interactive_running
+    with _interactive_idle:
+        _interactive_running += 1
+    try:
+        return call()
+    finally:
+        with _interactive_idle:
+            _interactive_running -= 1
+            if _interactive_running == 0:
+                _interactive_idle.notify_all()
+
+
+def _run_background(call: Callable[[], T]) -> T:
+    yield_to_interactive()
+    return call()
+
+
+def _start(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # A job queued for a request that was cancelled meanwhile never starts.
+    cancellation.check()
+    return func(*args, **kwargs)
+
+
+def submit(
+    func: Callable[..., T], *args: Any, priority: Priority = Priority.INTERACTIVE, **kwargs: Any
+) -> "Future[T]":
+    """Queue *func* in *priority*'s pool, carrying the caller's contextvars.
+
+    Raises :class:`SchedulerBusy` when that class's queue is full.
+    """
+    priority = Priority(priority)
+    if priority is Priority.INTERACTIVE:
+        pool, limit, runner = get_executor(), DEFAULT_WORKERS + INTERACTIVE_QUEUE, _run_interactive
+    else:
+        pool, limit, runner = get_background_executor(), BACKGROUND_WORKERS + BACKGROUND_QUEUE, _run_background
+    with _pending_lock:
+        if _pending[priority] >= max(1, limit):
+            raise SchedulerBusy(f"{priority.value} queue is full")
+        _pending[priority] += 1
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _start, func, *args, **kwargs)
+    try:
+        future = pool.submit(runner, call)
+    except BaseException:
+        _finished(priority)
+        raise
+    future.add_done_callback(lambda _f: _finished(priority))
+    return future
+
+
+def _finished(priority: Priority) -> None:
+    with _pending_lock:
+        _pending[priority] -= 1
+
+
+def pending_jobs() -> dict[str, int]:
+    """Jobs submitted and not yet finished, per priority class."""
+    with _pending_lock:
+        return {p.value: n for p, n in _pending.items()}
+
+
+def submit_analysis(func: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+    """Queue *func* on the analysis pool, carrying the caller's contextvars.
+
+    Analyses are background work: each one waits for running interactive
+    jobs before it starts.
+    """
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _start, func, *args, **kwargs)
+    return get_analysis_executor().submit(_run_background, call)
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global _executor, _background_executor, _analysis_executor
+    with _executor_lock:
+        pools = [_executor, _background_executor, _analysis_executor]
+        _executor = _background_executor = _analysis_executor = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _submit_for_request(func: Callable[..., T], args, kwargs, priority: Priority) -> "Future[T]":
+    """``submit``, with a full queue answered as ``503`` and ``Retry-After``."""
+    try:
+        return submit(func, *args, priority=priority, **kwargs)
+    except SchedulerBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy; retry shortly",
+            headers={"Retry-After": str(BUSY_RETRY_AFTER_S)},
+        )
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run *func* on the interactive pool without stalling the event loop."""
+    return await asyncio.wrap_future(_submit_for_request(func, args, kwargs, Priority.INTERACTIVE))
+
+
+async def run_background(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run *func* on the background pool, behind any interactive work."""
+    return await asyncio.wrap_future(_submit_for_request(func, args, kwargs, Priority.BACKGROUND))
+
+
+def offload(func: Callable[..., T] | None = None, *, priority: Priority = Priority.INTERACTIVE):
+    """Turn a sync route function into an async one that runs on a worker pool.
+
+    Use as ``@offload`` (interactive) or ``@offload(priority=Priority.BACKGROUND)``.
+    A full queue answers ``503`` with ``Retry-After``.
+
+    The signature is copied with string annotations already evaluated, so
+    FastAPI still sees the original parameters even though the wrapper's
+    ``__globals__`` belong to this module.
+    """
+    if func is None:
+        return functools.partial(offload, priority=priority)
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(_submit_for_request(func, args, kwargs, priority))
+
+    wrapper.__signature__ = inspect.signature(func, eval_str=True)
+    return wrapper
+
+
+class LoopLagMonitor:
+    """Periodic ``call_later`` timer that reports how late the event loop fires it."""
+
+    def __init__(self, threshold_ms: float, interval_s: float = 0.1) -> None:
+        self.threshold_ms = threshold_ms
+        self.interval_s = interval_s
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self._handle: asyncio.TimerHandle | None = None
+        self._due = 0.0
+
+    def start(self) -> None:
+        self._schedule(asyncio.get_running_loop())
+
+    async def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._due = loop.time() + self.interval_s
+        self._handle = loop.call_later(self.interval_s, self._tick, loop)
+
+    def _tick(self, loop: asyncio.AbstractEventLoop) -> None:
+        lag_ms = (loop.time() - self._due) * 1000.0
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms > self.threshold_ms:
+            self.stalls += 1
+            logger.warning("Event loop blocked for %.0f ms (threshold %.0f ms)", lag_ms, self.threshold_ms)
+        self._schedule(loop)
+
+
+def start_loop_lag_monitor() -> LoopLagMonitor | None:
+    """Start the monitor when ``CAPSTONE_LOOP_LAG_MS`` is set; call from the running loop."""
+    if LOOP_LAG_THRESHOLD_MS <= 0:
+        return None
+    monitor = LoopLagMonitor(LOOP_LAG_THRESHOLD_MS)
+    monitor.start()
+    logger.info("Event loop lag monitor enabled (threshold %.0f ms)", LOOP_LAG_THRESHOLD_MS)
+    return monitor
@@ -0,0 +1,133 @@
+"""Conditional and ranged responses for content-addressed bytes.
+
+Thumbnails and archive members are identified by a content hash, so the hash
+is a strong validator: a matching ``If-None-Match`` always means the client
+already holds the exact bytes, and byte ranges can be served safely.  JSON
+bodies get weak validators from ``middleware.compression`` instead.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Anything outside printable ASCII, plus the characters that would end or split
+# the quoted-string, is replaced with ``_`` in the legacy ``filename=`` parameter.
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\x20-\x7e]|["\\;]')
+
+
+def strong_etag(content_hash: str) -> str:
+    return f'"{content_hash}"'
+
+
+def weak_etag(data: bytes) -> str:
+    """Validator for a serialized body that may be re-encoded (e.g. compressed)."""
+    return f'W/"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def etag_matches_header(header: str, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for ``If-None-Match``."""
+    if header.strip() == "*":
+        return True
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return etag_matches_header(header, etag)
+
+
+def content_disposition(filename: str, disposition: str = "inline") -> str:
+    """RFC 6266 value: an ASCII-safe ``filename`` fallback plus the exact UTF-8 ``filename*``."""
+    fallback = _UNSAFE_FILENAME_CHARS.sub("_", filename) or "download"
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None | bool:
+    """Return ``(start, end)`` inclusive for a single satisfiable range.
+
+    ``None`` means serve the full body (no header, malformed or multi-range);
+    ``False`` means the range cannot be satisfied (416).
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def content_response(
+    request: Request,
+    *,
+    etag_hash: str,
+    media_type: str,
+    data: bytes | None = None,
+    path: Path | None = None,
+    filename: str | None = None,
+    disposition: str = "inline",
+    immutable: bool = False,
+) -> Response:
+    """Serve *data* (or the file at *path*) with ETag, Cache-Control and Range handling.
+
+    ``nosniff`` is always sent so browsers render the bytes only as *media_type*.
+    """
+    etag = strong_etag(etag_hash)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename, disposition)
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if data is None and path is not None and request.headers.get("range") is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    if data is None:
+        data = Path(path).read_bytes() if path is not None else b""
+
+    size = len(data)
+    byte_range = parse_range(request.headers.get("range"), size)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return Response(
+            content=data[start : end + 1],
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
+    return Response(content=data, media_type=media_type, headers=headers)
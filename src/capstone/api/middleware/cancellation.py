@@ -0,0 +1,76 @@
+"""Cancel a request's work when its client disconnects or its deadline passes.
+
+Each HTTP request gets a :class:`capstone.cancellation.CancelToken` bound as
+the current token, so it reaches the executor threads running the route.
+The middleware reads the request body one message ahead of the app; once
+the body is in, it keeps waiting for ``http.disconnect`` and cancels the
+token as soon as it arrives.  ``CAPSTONE_REQUEST_DEADLINE_S`` gives every
+request a deadline (none by default).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+from capstone.cancellation import CancelToken, use_token
+
+
+def _deadline_from_env() -> float | None:
+    raw = os.getenv("CAPSTONE_REQUEST_DEADLINE_S")
+    try:
+        value = float(raw) if raw else 0.0
+    except ValueError:
+        value = 0.0
+    return value if value > 0 else None
+
+
+REQUEST_DEADLINE_S = _deadline_from_env()
+
+
+class CancellationMiddleware:
+    def __init__(self, app, deadline_s: float | None = REQUEST_DEADLINE_S):
+        self.app = app
+        self.deadline_s = deadline_s
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = CancelToken(self.deadline_s)
+        # One message of read-ahead keeps uploads streaming with backpressure.
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        disconnected = False
+
+        async def watch():
+            nonlocal disconnected
+            while True:
+                try:
+                    message = await receive()
+                except Exception as exc:
+                    await messages.put(exc)
+                    return
+                if message["type"] == "http.disconnect":
+                    # Cancel before queueing: an app that never reads the body
+                    # leaves the queue full.
+                    token.cancel("disconnected")
+                    await messages.put(message)
+                    disconnected = True
+                    return
+                await messages.put(message)
+
+        async def receive_wrapper():
+            if disconnected and messages.empty():
+                return {"type": "http.disconnect"}
+            message = await messages.get()
+            if isinstance(message, Exception):
+                raise message
+            return message
+
+        watcher = asyncio.create_task(watch())
+        try:
+            with use_token(token):
+                await self.app(scope, receive_wrapper, send)
+        finally:
+            watcher.cancel()
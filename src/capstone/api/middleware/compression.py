@@ -0,0 +1,145 @@
+"""Conditional GET and response compression for JSON/text bodies.
+
+Buffered (single-message) responses of a compressible type get a weak ETag
+computed from the uncompressed body unless the route already set one; a
+matching ``If-None-Match`` turns the response into a bodiless 304.  Bodies
+of at least ``min_size`` bytes are then compressed with brotli (when the
+``brotli`` package is installed and the client accepts ``br``) or gzip.
+
+Streaming responses, ranged responses (``FileResponse`` and
+``http_caching.content_response`` advertise ``Accept-Ranges``, and byte
+offsets must refer to the identity body) and responses that already carry a
+``Content-Encoding`` pass through untouched.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+
+try:  # optional dependency: gzip is used when it is missing
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+from capstone.api.http_caching import etag_matches_header, weak_etag
+
+MIN_SIZE = int(os.getenv("CAPSTONE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"application/javascript",
+    b"application/xml",
+    b"image/svg+xml",
+    b"text/",
+)
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip().lower()] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.lower(): v for k, v in scope.get("headers") or []}
+        method = scope.get("method", "GET")
+        accept_encoding = request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"")
+                if (
+                    message.get("status") != 200
+                    or b"content-encoding" in headers
+                    or b"accept-ranges" in headers
+                    or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Streaming body: emit as-is from here on.
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            await self._finish(send, start_message, body, method, accept_encoding, if_none_match)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(self, send, start_message, body, method, accept_encoding, if_none_match):
+        headers = [(k, v) for k, v in start_message.get("headers", []) if k.lower() != b"content-length"]
+        existing_etag = next((v for k, v in headers if k.lower() == b"etag"), None)
+        etag = existing_etag.decode("latin-1") if existing_etag else None
+
+        if method == "GET":
+            if etag is None:
+                etag = weak_etag(body)
+                headers.append((b"etag", etag.encode("latin-1")))
+            if if_none_match and etag_matches_header(if_none_match, etag):
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if len(body) >= self.min_size:
+            encoding = _choose_encoding(accept_encoding)
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode("ascii")))
+            headers.append((b"vary", b"Accept-Encoding"))
+
+        headers.append((b"content-length", str(len(body)).encode("ascii")))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,40 @@
+"""Per-route request counts and latency for ``capstone.telemetry``.
+
+Requests are labelled with the matched route template (``/projects/{id}``),
+never the raw path, so label cardinality stays bounded.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+
+from capstone import telemetry
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            method = scope.get("method", "GET")
+            telemetry.HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            telemetry.HTTP_LATENCY.observe(perf_counter() - start, method=method, route=route)
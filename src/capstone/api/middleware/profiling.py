@@ -0,0 +1,62 @@
+"""Profile selected requests with ``capstone.profiling`` (opt-in, admin-only).
+
+A request is profiled when profiling is enabled and either it carries
+``X-Profile: 1`` with a valid ``X-Profile-Token``, or it falls within
+``CAPSTONE_PROFILE_SAMPLE_RATE``.  The profile id is returned in the
+``X-Profile-Id`` response header.
+"""
+
+from __future__ import annotations
+
+import random
+
+from capstone import profiling
+from capstone.api.executor import run_blocking
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+def _wants_profile(headers: dict) -> bool:
+    if headers.get(PROFILE_HEADER, b"").strip() in (b"1", b"true"):
+        token = headers.get(TOKEN_HEADER, b"").decode("latin-1")
+        return profiling.token_matches(token)
+    return profiling.SAMPLE_RATE > 0 and random.random() < profiling.SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling.is_enabled():
+            await self.app(scope, receive, send)
+            return
+        headers = {k.lower(): v for k, v in scope.get("headers") or []}
+        # Never profile the profile listing itself.
+        if scope.get("path", "").startswith("/profiles") or not _wants_profile(headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.begin(f"{scope.get('method', 'GET')} {scope.get('path', '')}")
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile.profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Joining the sampler and diffing snapshots is too slow for the loop.
+            await run_blocking(profile.finish, status)
@@ -0,0 +1,90 @@
+"""Reject expensive requests over the limits in ``capstone.rate_limit``.
+
+Limited requests are counted per signed-in user, or per client address for
+guests.  A rejected request gets ``429`` with ``Retry-After`` (seconds) and
+never reaches the route.  Mounted inside CORS so browsers can read the 429.
+Admission can wait on the shared bucket database, so it runs in a worker
+thread rather than on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from starlette.requests import Request
+
+from capstone import rate_limit, telemetry
+from capstone.api.storage_context import resolve_storage_context_async
+
+
+async def _client_key(scope) -> str:
+    ctx = await resolve_storage_context_async(Request(scope))
+    if ctx.user is not None:
+        return f"user:{ctx.user}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: rate_limit.RateLimiter | None = None):
+        self.app = app
+        self.limiter = limiter or rate_limit.RateLimiter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not rate_limit.ENABLED:
+            await self.app(scope, receive, send)
+            return
+        endpoint_class = self.limiter.classify(
+            scope.get("method", "GET"),
+            scope.get("path", ""),
+            (scope.get("query_string") or b"").decode("latin-1"),
+        )
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self._admit(endpoint_class, await _client_key(scope))
+        if isinstance(decision, rate_limit.Rejection):
+            telemetry.RATE_LIMITED.inc(endpoint_class=decision.endpoint_class, reason=decision.reason)
+            await _reject(send, decision)
+            return
+        with decision:
+            await self.app(scope, receive, send)
+
+
+    async def _admit(self, endpoint_class, client_key: str):
+        pending = asyncio.ensure_future(asyncio.to_thread(self.limiter.admit, endpoint_class, client_key))
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # The thread still finishes; give back a slot nobody will use.
+            pending.add_done_callback(_release_unused)
+            raise
+
+
+def _release_unused(pending: asyncio.Future) -> None:
+    if not pending.cancelled() and pending.exception() is None:
+        decision = pending.result()
+        if isinstance(decision, rate_limit.Admission):
+            decision.release()
+
+
+async def _reject(send, rejection: rate_limit.Rejection) -> None:
+    if rejection.reason == "busy":
+        detail = "Server is busy with other requests of this kind; retry shortly"
+    else:
+        detail = "Too many requests; retry later"
+    body = json.dumps({"detail": detail, "retry_after": rejection.retry_after_s}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(rejection.retry_after_s).encode("latin-1")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
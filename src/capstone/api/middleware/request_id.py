@@ -1,6 +1,16 @@
 import uuid
 
+from capstone.logging_utils import request_id_var
+
+
 class RequestIdMiddleware:
+    """Tag each request with an id (the client's ``X-Request-ID`` or a new UUID).
+
+    The id is echoed in the response header, stored in ``request.state`` and
+    bound to ``logging_utils.request_id_var`` so every log line written while
+    handling the request carries it.
+    """
+
     def __init__(self, app, header_name: str = "X-Request-ID"):
         self.app = app
         self.header_name = header_name
@@ -13,7 +23,7 @@ class RequestIdMiddleware:
 
         headers = dict(scope.get("headers") or [])
         incoming = headers.get(self.header_name_bytes)
-        request_id = incoming.decode() if incoming else str(uuid.uuid4())
+        request_id = incoming.decode("latin-1")[:128] if incoming else str(uuid.uuid4())
 
         scope.setdefault("state", {})
         scope["state"]["request_id"] = request_id
@@ -21,7 +31,11 @@ class RequestIdMiddleware:
         async def send_wrapper(message):
             if message["type"] == "http.response.start":
                 message.setdefault("headers", [])
-                message["headers"].append((self.header_name_bytes, request_id.encode()))
+                message["headers"].append((self.header_name_bytes, request_id.encode("latin-1")))
             await send(message)
 
-        await self.app(scope, receive, send_wrapper)
\ No newline at end of file
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -5,7 +5,9 @@ import sqlite3
 import uuid
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from capstone.api.pagination import json_projection
 
 ALLOWED_PORTFOLIO_TEMPLATES = {"classic", "case_study", "gallery"}
 ALLOWED_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
@@ -18,6 +20,7 @@ class SnapshotRow:
     primary_contributor: Optional[str]
     snapshot: Dict[str, Any]
     created_at: str  # ISO string stored as TEXT in SQLite
+    id: Optional[int] = None
 
 
 def ensure_indexes(conn: sqlite3.Connection) -> None:
@@ -87,11 +90,23 @@ def list_snapshots(
     sort_dir: str = "desc",
     classification: Optional[str] = None,
     primary_contributor: Optional[str] = None,
+    after: Optional[Sequence[Any]] = None,
+    snapshot_fields: Optional[Iterable[str]] = None,
+    lookahead: bool = False,
 ) -> Tuple[List[SnapshotRow], int]:
+    """Page through a project's snapshots.
+
+    With *after* (the ``(sort value, id)`` of the last row already seen) the
+    page is located by keyset instead of ``OFFSET``; a NULL classification
+    sorts and compares as ``""``.  *snapshot_fields* limits the snapshot keys
+    SQLite extracts and returns.  *lookahead* reads one row past the page so
+    the caller can tell whether another page follows.
+    """
     sort_field, sort_dir = _validate_sort(sort_field, sort_dir)
     page = max(1, int(page))
     page_size = max(1, min(200, int(page_size)))
-    offset = (page - 1) * page_size
+    offset = (page - 1) * page_size if after is None else 0
+    sort_expr = "COALESCE(classification, '')" if sort_field == "classification" else sort_field
 
     where = ["project_id = ?"]
     params: List[Any] = [project_id]
@@ -108,15 +123,23 @@ def list_snapshots(
         params,
     ).fetchone()[0]
 
+    page_where = list(where)
+    page_params = list(params)
+    if after is not None:
+        op = "<" if sort_dir == "desc" else ">"
+        page_where.append(f"({sort_expr}, id) {op} (?, ?)")
+        page_params.extend(after)
+    snapshot_sql = "snapshot" if snapshot_fields is None else json_projection("snapshot", snapshot_fields)
+
     rows = conn.execute(
         f"""
-        SELECT project_id, classification, primary_contributor, snapshot, created_at
+        SELECT project_id, classification, primary_contributor, {snapshot_sql}, created_at, id
         FROM project_analysis
-        WHERE {where_sql}
-        ORDER BY {sort_field} {sort_dir.upper()}
+        WHERE {" AND ".join(page_where)}
+        ORDER BY {sort_expr} {sort_dir.upper()}, id {sort_dir.upper()}
         LIMIT ? OFFSET ?
         """,
-        params + [page_size, offset],
+        page_params + [page_size + 1 if lookahead else page_size, offset],
     ).fetchall()
 
     items = [
@@ -124,8 +147,9 @@ def list_snapshots(
             project_id=r[0],
             classification=r[1],
             primary_contributor=r[2],
-            snapshot=json.loads(r[3]),
+            snapshot=json.loads(r[3]) if r[3] else {},
             created_at=r[4],
+            id=r[5],
         )
         for r in rows
     ]
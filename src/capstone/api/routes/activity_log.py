@@ -1,11 +1,36 @@
-from fastapi import APIRouter
-from capstone.activity_log import activity_logs
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from capstone.activity_log import fetch_events
+from capstone.api.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, set_next_cursor
 
 router = APIRouter()
 
 @router.get("/activity")
-def get_activity(limit: int = 50):
+def get_activity(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    level: Optional[str] = Query(None, description="Only events of this level, e.g. ERROR"),
+    since: Optional[str] = Query(None, description="Events at or after this UTC time (YYYY-MM-DD HH:MM:SS)"),
+    until: Optional[str] = Query(None, description="Events before this UTC time"),
+):
+    after = None
+    if cursor:
+        try:
+            after = tuple(decode_cursor(cursor, 2))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    level = level.upper() if level else None
+    logs, total = fetch_events(level=level, since=since, until=until, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1]["timestamp"], logs[-1]["id"])
+    set_next_cursor(response, next_cursor)
     return {
-        "count": len(activity_logs),
-        "logs": activity_logs[:limit]
-    }
\ No newline at end of file
+        "count": total,
+        "logs": logs,
+        "next_cursor": next_cursor,
+    }
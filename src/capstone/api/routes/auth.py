@@ -6,41 +6,17 @@ from typing import Optional
 import requests
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-import json
 from pathlib import Path
 import capstone.storage as storage
+from capstone.session_store import DB_FILENAME as _SESSION_DB_FILENAME, SessionStore
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 # server.py still calls configure(), so keep it
 _AUTH_BASE_URL: Optional[str] = None
 
-# local in memory sessions for the desktop app
-_SESSIONS: dict[str, dict] = {}
-
-_SESSION_FILE = Path(__file__).resolve().parent / "auth_sessions.json"
-
-
-def _load_sessions() -> None:
-    global _SESSIONS
-    if not _SESSION_FILE.exists():
-        _SESSIONS = {}
-        return
-
-    try:
-        with open(_SESSION_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            _SESSIONS = data if isinstance(data, dict) else {}
-    except Exception:
-        _SESSIONS = {}
-
-
-def _save_sessions() -> None:
-    try:
-        with open(_SESSION_FILE, "w", encoding="utf-8") as f:
-            json.dump(_SESSIONS, f, indent=2)
-    except Exception:
-        pass
+# sign-in sessions, shared with the other server processes through SQLite
+_SESSIONS = SessionStore()
 
 
 def _sync_profile_to_local_db(auth_user: dict) -> None:
@@ -96,10 +72,10 @@ class ChangePasswordRequest(BaseModel):
 
 
 def configure(db_dir: Optional[str] = None):
-    # server.py passes db_dir here, but auth no longer uses SQLite locally.
+    # Accounts live in the auth service; only the session database is local.
     global _AUTH_BASE_URL
     _AUTH_BASE_URL = "https://loom-auth.amirparsaaminian1383.workers.dev"
-    _load_sessions()
+    _SESSIONS.open(Path(db_dir) / _SESSION_DB_FILENAME if db_dir else None)
 
 
 def _get_auth_base_url() -> str:
@@ -119,10 +95,10 @@ def _extract_bearer(request: Request) -> Optional[str]:
 
 
 def _require_session(request: Request) -> dict:
-    token = _extract_bearer(request)
-    if not token or token not in _SESSIONS:
+    session = _SESSIONS.get(_extract_bearer(request))
+    if session is None:
         raise HTTPException(status_code=401, detail="invalid or expired token")
-    return _SESSIONS[token]
+    return session
 
 
 def _request_auth(method: str, path: str, payload: dict) -> dict:
@@ -205,12 +181,12 @@ def register(payload: RegisterRequest):
     if payload.github_url and not user.get("github_url"):
         user["github_url"] = payload.github_url
 
-    storage.set_current_user(user["username"])
+    # The rest of this request works in the new user's database.
+    storage.bind_request_user(user["username"])
     _sync_profile_to_local_db(user)
 
     token = _new_token()
     _SESSIONS[token] = {"user": user}
-    _save_sessions()
     print(
         f"[auth/register] username={user.get('username')!r} "
         f"local_db={str(storage.get_database_path())!r}",
@@ -237,12 +213,12 @@ def login(payload: LoginRequest):
     if not user:
         raise HTTPException(status_code=502, detail="auth service did not return user")
 
-    storage.set_current_user(user["username"])
+    # The rest of this request works in the new user's database.
+    storage.bind_request_user(user["username"])
     _sync_profile_to_local_db(user)
 
     token = _new_token()
     _SESSIONS[token] = {"user": user}
-    _save_sessions()
     print(
         f"[auth/login] username={user.get('username')!r} "
         f"local_db={str(storage.get_database_path())!r}",
@@ -258,8 +234,6 @@ def login(payload: LoginRequest):
 def me(request: Request):
     session = _require_session(request)
     user = session["user"]
-    # Always restore CURRENT_USER from the session — critical after server restart
-    storage.set_current_user(user["username"])
     from capstone.portfolio_retrieval import _db_session
     from capstone.api.routes.resumes import _get_current_user_contributor_id
     with _db_session(None) as conn:
@@ -288,13 +262,13 @@ def update_me(payload: UpdateProfileRequest, request: Request):
     if not updated_user:
         raise HTTPException(status_code=502, detail="auth service did not return updated user")
 
-    storage.set_current_user(updated_user["username"])
+    storage.bind_request_user(updated_user["username"])
     _sync_profile_to_local_db(updated_user)
 
     token = _extract_bearer(request)
-    if token and token in _SESSIONS:
-        _SESSIONS[token]["user"] = updated_user
-        _save_sessions()
+    session = _SESSIONS.get(token)
+    if session is not None:
+        _SESSIONS[token] = {**session, "user": updated_user}
 
     return {
         "ok": True,
@@ -359,9 +333,8 @@ def logout(request: Request):
     before_user = storage.get_current_user()
     if token:
         _SESSIONS.pop(token, None)
-        _save_sessions()
 
-    storage.set_current_user(None)
+    storage.bind_request_user(None)
     print(
         f"[auth/logout] previous_user={before_user!r} mode='guest' "
         f"local_db={str(storage.get_database_path())!r}",
@@ -4,7 +4,8 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 import capstone.storage as storage
-import capstone.api.routes.auth as auth_routes
+from capstone.api.executor import Priority, offload
+from capstone.api.storage_context import resolve_storage_context
 from capstone.system.cloud_storage import (
     test_connection,
     test_upload,
@@ -25,10 +26,9 @@ class ProjectZipPayload(BaseModel):
 
 
 def _get_current_username(request: Request) -> str:
-    username = auth_routes.get_authenticated_username(request)
-    storage_user_key = auth_routes.get_authenticated_storage_user_key(request)
+    ctx = resolve_storage_context(request)
+    username, storage_user_key = ctx.username, ctx.user
     if storage_user_key:
-        storage.set_current_user(storage_user_key)
         print(
             "[cloud-route] "
             f"username={username!r} "
@@ -67,24 +67,28 @@ def debug_db():
 
 
 @router.post("/db/upload")
+@offload(priority=Priority.BACKGROUND)
 def cloud_db_upload(request: Request):
     username = _get_current_username(request)
     return upload_database(username)
 
 
 @router.post("/db/download")
+@offload(priority=Priority.BACKGROUND)
 def cloud_db_download(request: Request):
     username = _get_current_username(request)
     return download_database(username)
 
 
 @router.post("/projects/download-all")
+@offload(priority=Priority.BACKGROUND)
 def cloud_projects_download_all(request: Request):
     username = _get_current_username(request)
     return download_all_project_zips(username)
 
 
 @router.post("/project/upload")
+@offload(priority=Priority.BACKGROUND)
 def cloud_project_upload(payload: ProjectZipPayload, request: Request):
     username = _get_current_username(request)
 
@@ -101,6 +105,7 @@ def cloud_project_upload(payload: ProjectZipPayload, request: Request):
 
 
 @router.post("/project/download")
+@offload(priority=Priority.BACKGROUND)
 def cloud_project_download(payload: ProjectZipPayload, request: Request):
     username = _get_current_username(request)
 
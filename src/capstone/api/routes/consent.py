@@ -2,6 +2,7 @@ import sqlite3
 from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from capstone.activity_log import log_event
+from capstone.consent import clear_consent_cache
 from capstone.storage import open_db
 from datetime import datetime, timezone
 from capstone.api.routes.auth import get_authenticated_username
@@ -41,9 +42,6 @@ def _ensure_row(conn):
     return _read_row(conn)
 
 
-def _bind_current_user_from_session(request: Request) -> None:
-    username = get_authenticated_username(request)
-    storage_module.set_current_user(username)
 
 
 # ------------------------------------------------
@@ -52,7 +50,6 @@ def _bind_current_user_from_session(request: Request) -> None:
 
 @router.get("/privacy-consent")
 def get_consent(request: Request):
-    _bind_current_user_from_session(request)
     conn = open_db()
     try:
         row = _read_row(conn)
@@ -76,7 +73,6 @@ def get_consent(request: Request):
 
 @router.post("/privacy-consent/local")
 def set_local_consent(payload: ConsentIn, request: Request):
-    _bind_current_user_from_session(request)
     conn = open_db()
     try:
         _ensure_row(conn)
@@ -89,6 +85,7 @@ def set_local_consent(payload: ConsentIn, request: Request):
             (int(payload.consent), datetime.now(timezone.utc).isoformat())
         )
         conn.commit()
+        clear_consent_cache()
 
         log_event(
             "INFO" if payload.consent else "WARNING",
@@ -110,7 +107,6 @@ def set_local_consent(payload: ConsentIn, request: Request):
 
 @router.post("/privacy-consent/external")
 def set_external_consent(payload: ConsentIn, request: Request):
-    _bind_current_user_from_session(request)
     conn = open_db()
     try:
         _ensure_row(conn)
@@ -123,6 +119,7 @@ def set_external_consent(payload: ConsentIn, request: Request):
             (int(payload.consent), datetime.now(timezone.utc).isoformat())
         )
         conn.commit()
+        clear_consent_cache()
 
         log_event(
             "INFO" if payload.consent else "WARNING",
@@ -10,6 +10,8 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
+from capstone import cancellation, telemetry
+from capstone.api.executor import Priority, offload
 from capstone.zip_analyzer import ZipAnalyzer
 from capstone.config import Preferences
 from capstone.modes import ModeResolution
@@ -46,6 +48,7 @@ def _verify_github_token_remote(token: str) -> tuple[bool, str | None, dict | No
                 "Accept": "application/vnd.github+json",
             },
             timeout=15,
+            hooks=telemetry.GITHUB_HOOKS,
         )
         if res.status_code == 200:
             data = res.json()
@@ -96,6 +99,7 @@ def _fetch_latest_commit_sha(owner: str, repo: str, branch: str, headers: dict)
             headers=headers,
             params={"sha": branch, "per_page": 1},
             timeout=10,
+            hooks=telemetry.GITHUB_HOOKS,
         )
         if latest_res.status_code != 200:
             return None
@@ -108,7 +112,8 @@ def _fetch_latest_commit_sha(owner: str, repo: str, branch: str, headers: dict)
 
 
 def _github_get(url: str, headers: dict, params: dict | None = None, timeout: int = 15):
-    return requests.get(url, headers=headers, params=params, timeout=timeout)
+    cancellation.check()
+    return requests.get(url, headers=headers, params=params, timeout=timeout, hooks=telemetry.GITHUB_HOOKS)
 
 
 def _list_user_repos(headers: dict) -> tuple[list[dict], dict]:
@@ -297,12 +302,14 @@ def _build_collaboration_from_commits_api(owner: str, repo: str, branch: str, he
     page = 1
 
     while True:
+        cancellation.check()
         commits_url = f"{GITHUB_API}/repos/{owner}/{repo}/commits"
         res = requests.get(
             commits_url,
             headers=headers,
             params={"sha": branch, "per_page": 100, "page": page},
             timeout=15,
+            hooks=telemetry.GITHUB_HOOKS,
         )
         if res.status_code != 200:
             break
@@ -420,6 +427,7 @@ def _patch_github_commit_dates(
             headers=headers,
             params={"sha": branch, "per_page": 1},
             timeout=10,
+            hooks=telemetry.GITHUB_HOOKS,
         )
         if latest_res.status_code != 200:
             return
@@ -442,7 +450,7 @@ def _patch_github_commit_dates(
                 break
 
         if last_page_url:
-            oldest_res = requests.get(last_page_url, headers=headers, timeout=10)
+            oldest_res = requests.get(last_page_url, headers=headers, timeout=10, hooks=telemetry.GITHUB_HOOKS)
             if oldest_res.status_code == 200:
                 oldest_data = oldest_res.json()
                 if oldest_data:
@@ -493,6 +501,7 @@ def _patch_github_commit_dates(
 # ------------------------------------------------
 
 @router.get("/repos")
+@offload
 def list_repositories():
     """
     Repositories the authenticated token can access: /user/repos plus every
@@ -551,6 +560,7 @@ def list_repositories():
 # ------------------------------------------------
 
 @router.post("/import")
+@offload(priority=Priority.BACKGROUND)
 def import_repository(
     owner: str,
     repo: str,
@@ -588,7 +598,7 @@ def import_repository(
 
     zip_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
 
-    response = requests.get(zip_url, headers=headers, stream=True)
+    response = requests.get(zip_url, headers=headers, stream=True, hooks=telemetry.GITHUB_HOOKS)
 
     if response.status_code != 200:
         raise HTTPException(status_code=400, detail="Failed to download repository")
@@ -599,6 +609,7 @@ def import_repository(
 
         with open(zip_path, "wb") as f:
             for chunk in response.iter_content(chunk_size=8192):
+                cancellation.check()
                 f.write(chunk)
 
         analyzer = ZipAnalyzer()
@@ -692,6 +703,7 @@ def import_repository(
 # ------------------------------------------------
 
 @router.post("/pull")
+@offload(priority=Priority.BACKGROUND)
 def pull_repository(project_id: str, refresh: bool = False):
 
     token = get_github_token()
@@ -745,7 +757,7 @@ def pull_repository(project_id: str, refresh: bool = False):
 
     zip_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
 
-    response = requests.get(zip_url, headers=headers, stream=True)
+    response = requests.get(zip_url, headers=headers, stream=True, hooks=telemetry.GITHUB_HOOKS)
 
     if response.status_code != 200:
         raise HTTPException(400, "Failed to pull repository")
@@ -756,6 +768,7 @@ def pull_repository(project_id: str, refresh: bool = False):
 
         with open(zip_path, "wb") as f:
             for chunk in response.iter_content(8192):
+                cancellation.check()
                 if chunk:
                     f.write(chunk)
 
@@ -820,6 +833,7 @@ def github_token_status():
 
 
 @router.put("/token")
+@offload
 def put_github_token(payload: GithubTokenUpdate):
     """Replace stored GitHub token after remote validation; does not return the raw token."""
     return _apply_github_token_update(payload.token)
@@ -835,6 +849,7 @@ def github_auth_status():
     return {"authenticated": True}
 
 @router.post("/login")
+@offload
 def github_login(token: str):
     save_github_token(token)
 
@@ -852,6 +867,7 @@ def github_login(token: str):
 
 
 @router.get("/branches")
+@offload
 def get_branches(owner: str, repo: str):
     token = get_github_token()
     if not token:
@@ -866,8 +882,9 @@ def get_branches(owner: str, repo: str):
     page = 1
 
     while True:
+        cancellation.check()
         url = f"https://api.github.com/repos/{owner}/{repo}/branches?per_page=100&page={page}"
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers, hooks=telemetry.GITHUB_HOOKS)
 
         data = response.json()
 
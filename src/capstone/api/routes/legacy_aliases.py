@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Request, Query
+from fastapi import APIRouter, Depends, Request, Query, Response
+
+from capstone.api.pagination import PageRequest, page_request
 
 from capstone.api.routes.portfolio_showcase import (
     list_users as showcase_list_users,
@@ -14,12 +16,14 @@ from capstone.api.routes.portfolio_showcase import (
 router = APIRouter()
 
 @router.get("/users")
-def legacy_users(request: Request):
-    return showcase_list_users(request=request)
+def legacy_users(request: Request, response: Response, page: PageRequest = Depends(page_request)):
+    return showcase_list_users(request=request, response=response, page=page)
 
 @router.get("/users/{user}/projects")
-def legacy_user_projects(user: str, request: Request):
-    return showcase_list_user_projects(user=user, request=request)
+def legacy_user_projects(
+    user: str, request: Request, response: Response, page: PageRequest = Depends(page_request)
+):
+    return showcase_list_user_projects(user=user, request=request, response=response, page=page)
 
 @router.get("/portfolio/summary")
 def legacy_portfolio_summary(user: str, request: Request, limit: int = 3):
@@ -41,15 +45,19 @@ def legacy_portfolios_evidence(request: Request, projectId: str = Query(...)):
 @router.get("/portfolios")
 def legacy_portfolios_list(
     request: Request,
+    response: Response,
     projectId: str = Query(...),
     page: int = Query(1),
     pageSize: int = Query(20),
     sort: str = Query("created_at:desc"),
+    paging: PageRequest = Depends(page_request),
 ):
     return showcase_portfolios_list(
         request=request,
+        response=response,
         projectId=projectId,
         page=page,
         pageSize=pageSize,
         sort=sort,
+        paging=paging,
     )
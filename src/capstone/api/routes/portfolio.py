@@ -14,14 +14,16 @@ from fastapi import APIRouter, Body, HTTPException, Request, Response, UploadFil
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, ConfigDict, Field
 
+from capstone import archive_pool, image_variants
 from capstone.activity_log import log_event
+from capstone.api import http_caching
+from capstone.api.executor import Priority, offload
 from capstone.language_detection import classify_activity
 from capstone.metrics import FileMetric, compute_metrics
 from capstone.portfolio_pdf_builder import build_portfolio_pdf_with_pandoc
 from capstone.portfolio_retrieval import _db_session, _extract_evidence, get_portfolio_entry, get_portfolio_entries
 from capstone.storage import _UNSET as _DB_UNSET
 from capstone.api.routes.auth import get_authenticated_username
-import capstone.storage as storage_module
 from capstone.storage import fetch_latest_snapshot, fetch_latest_snapshots, fetch_latest_snapshots_with_zip, fetch_project_snapshot_history
 from capstone.project_role import infer_project_role_from_snapshot
 from capstone.top_project_summaries import gather_evidence
@@ -68,11 +70,6 @@ def _check_auth(request: Request) -> None:
         raise HTTPException(status_code=401, detail="Missing or invalid token")
 
 
-def _bind_current_user_from_session(request: Request) -> None:
-    username = get_authenticated_username(request)
-    storage_module.set_current_user(username)
-
-
 def _load_heatmap_rows(db_dir: str, *, user=_DB_UNSET) -> list[dict[str, Any]]:
     with _db_session(db_dir, user=user) as c:
         return fetch_latest_snapshots_with_zip(c) or []
@@ -506,7 +503,7 @@ def _build_file_summary_from_zip_path(zip_path: str | None) -> dict[str, Any]:
     metrics_inputs: list[FileMetric] = []
 
     try:
-        with zipfile.ZipFile(path) as zf:
+        with archive_pool.open_path_archive(path) as zf:
             roots = set()
             for info in zf.infolist():
                 if info.is_dir():
@@ -550,7 +547,7 @@ def _build_daily_activity_from_zip_path(zip_path: str | None) -> dict[str, int]:
     daily_counts: dict[str, int] = {}
 
     try:
-        with zipfile.ZipFile(path) as zf:
+        with archive_pool.open_path_archive(path) as zf:
             for info in zf.infolist():
                 if info.is_dir():
                     continue
@@ -1034,7 +1031,6 @@ async def edit_portfolio_showcase(request: Request, payload: dict[str, Any] = Bo
 @router.post("/{id}/edit")
 def edit_portfolio(id: str, payload: EditPortfolioRequest, request: Request) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     if id == "showcase":
         raise HTTPException(status_code=400, detail="Use /portfolio/showcase/edit with projectId and summary")
@@ -1111,7 +1107,6 @@ def edit_portfolio(id: str, payload: EditPortfolioRequest, request: Request) ->
 def latest_portfolio_summary(request: Request) -> dict[str, Any]:
     try:
         _check_auth(request)
-        _bind_current_user_from_session(request)
 
         db_dir = _resolve_db_dir(request)
         if not db_dir:
@@ -1157,7 +1152,6 @@ def latest_portfolio_summary(request: Request) -> dict[str, Any]:
 def portfolio_activity_heatmap(request: Request) -> dict[str, Any]:
     try:
         _check_auth(request)
-        _bind_current_user_from_session(request)
 
         db_dir = _resolve_db_dir(request)
         if not db_dir:
@@ -1204,7 +1198,6 @@ def portfolio_project_evolution(
 ) -> dict[str, Any]:
     try:
         _check_auth(request)
-        _bind_current_user_from_session(request)
 
         db_dir = _resolve_db_dir(request)
         if not db_dir:
@@ -1241,6 +1234,7 @@ def portfolio_project_evolution(
 
 
 @router.get("/{id}/export")
+@offload(priority=Priority.BACKGROUND)
 def export_portfolio(id: str, request: Request, format: ExportFormat = ExportFormat.json) -> Any:
     _check_auth(request)
 
@@ -1316,7 +1310,6 @@ def export_portfolio(id: str, request: Request, format: ExportFormat = ExportFor
 @router.get("/{id}")
 def read_portfolio_entry(id: str, request: Request) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1378,7 +1371,6 @@ def read_portfolio_entry(id: str, request: Request) -> dict[str, Any]:
 @router.get("/{id}/images")
 def read_portfolio_images(id: str, request: Request) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1391,7 +1383,8 @@ def read_portfolio_images(id: str, request: Request) -> dict[str, Any]:
 
 
 @router.post("/{id}/images")
-async def upload_portfolio_image(
+@offload
+def upload_portfolio_image(
     id: str,
     request: Request,
     file: UploadFile = File(...),
@@ -1399,13 +1392,13 @@ async def upload_portfolio_image(
     is_cover: bool = Form(False),
 ) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
         raise HTTPException(status_code=500, detail="Database not configured")
 
-    file_bytes = await file.read()
+    # Image decoding and resizing block, so the whole route runs on the pool.
+    file_bytes = file.file.read()
 
     with _db_session(db_dir) as conn:
         ensure_portfolio_tables(conn)
@@ -1428,13 +1421,15 @@ async def upload_portfolio_image(
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
+        variants = image_variants.store_variants(conn, image_variants.portfolio_source_key(image["id"]), file_bytes)
+        image["variant_widths"] = [v["width"] for v in variants]
+
     return {"data": image, "error": None}
 
 
 @router.delete("/{id}/images/{image_id}")
 def remove_portfolio_image(id: str, image_id: str, request: Request) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1447,6 +1442,11 @@ def remove_portfolio_image(id: str, image_id: str, request: Request) -> dict[str
         deleted = delete_portfolio_image(conn, project_id=id, image_id=image_id)
         if not deleted:
             raise HTTPException(status_code=404, detail="Image not found")
+        orphaned = image_variants.release_variants(conn, image_variants.portfolio_source_key(image_id))
+        conn.commit()
+
+    for path in orphaned:
+        path.unlink(missing_ok=True)
 
     return {"data": {"ok": True}, "error": None}
 
@@ -1454,7 +1454,6 @@ def remove_portfolio_image(id: str, image_id: str, request: Request) -> dict[str
 @router.post("/{id}/images/{image_id}/cover")
 def choose_cover_portfolio_image(id: str, image_id: str, request: Request) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1478,7 +1477,6 @@ def reorder_project_portfolio_images(
     request: Request,
 ) -> dict[str, Any]:
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1497,9 +1495,8 @@ def reorder_project_portfolio_images(
 
 
 @router.get("/{id}/images/{image_id}/file")
-def get_portfolio_image_file(id: str, image_id: str, request: Request):
+def get_portfolio_image_file(id: str, image_id: str, request: Request, w: Optional[int] = None):
     _check_auth(request)
-    _bind_current_user_from_session(request)
 
     db_dir = _resolve_db_dir(request)
     if not db_dir:
@@ -1517,10 +1514,24 @@ def get_portfolio_image_file(id: str, image_id: str, request: Request):
             """,
             (image_id, id),
         ).fetchone()
+        # ?w=<px>: grids ask for a small pre-generated variant instead of the original.
+        variant = image_variants.pick_variant(conn, image_variants.portfolio_source_key(image_id), w)
+        variant_file = image_variants.variant_path(conn, variant) if variant else None
 
     if not row:
         raise HTTPException(status_code=404, detail="Image not found")
 
+    if variant_file is not None:
+        # An image id never gets new bytes (a re-upload is a new id), so its
+        # variants can be cached for good.
+        return http_caching.content_response(
+            request,
+            etag_hash=variant["file_id"],
+            media_type=variant["mime"],
+            path=variant_file,
+            immutable=True,
+        )
+
     image_path = Path(row[0])
     if not image_path.exists():
         raise HTTPException(status_code=404, detail="Image file missing")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from capstone.activity_log import log_event
 
 from capstone.portfolio_retrieval import _db_session, _extract_evidence, _parse_view, get_portfolio_entry
@@ -13,6 +13,14 @@ from capstone.resume_retrieval import (
 from capstone.storage import fetch_latest_snapshot, fetch_latest_snapshots
 from capstone.top_project_summaries import generate_top_project_summaries, export_markdown
 
+from capstone.api.pagination import (
+    PageRequest,
+    keyset_predicate,
+    page_request,
+    select_fields,
+    set_next_cursor,
+    split_page,
+)
 from capstone.api.portfolio_helpers import ensure_indexes, list_snapshots, ensure_portfolio_tables
 
 router = APIRouter(prefix="/showcase", tags=["portfolio", "resume", "users"])
@@ -50,11 +58,13 @@ async def _get_payload(request: Request) -> dict:
         return {}
 
 @router.get("/users")
-def list_users(request: Request):
+def list_users(request: Request, response: Response, page: PageRequest = Depends(page_request)):
     from capstone.github_contributors import _is_bot_contributor
     _check_auth(request)
+    after = page.after(2)
+    keyset = f"AND {keyset_predicate(['LOWER(u.github_username)', 'u.id'], descending=False)}" if after else ""
     with _db_session(_require_db()) as c:
-        rows = c.execute("""
+        rows = c.execute(f"""
             SELECT DISTINCT u.id, u.github_username, u.email
             FROM contributors u
             INNER JOIN project_contributors pc ON u.id = pc.contributor_id
@@ -71,32 +81,47 @@ def list_users(request: Request):
                       )
                 )
             )
-            ORDER BY LOWER(u.github_username)
-        """).fetchall()
+            {keyset}
+            ORDER BY LOWER(u.github_username), u.id
+            {"LIMIT ?" if page.paginated else ""}
+        """, [*(after or []), *([page.fetch_size()] if page.paginated else [])]).fetchall()
+    # The cursor tracks the last row read, so skipped bots never repeat a page.
+    rows, next_cursor = split_page(rows, page, key=lambda r: ((r[1] or "").lower(), r[0]))
+    set_next_cursor(response, next_cursor)
     users = [
-        {"id": r[0], "username": r[1]}
+        select_fields({"id": r[0], "username": r[1]}, page.fields)
         for r in rows
         if r and r[1]
         and not _is_bot_contributor(r[1])
     ]
-    return {"data": users, "error": None}
+    return {"data": users, "meta": {"next_cursor": next_cursor}, "error": None}
 
 @router.get("/users/{user}/projects")
-def list_user_projects(user: str, request: Request):
+def list_user_projects(
+    user: str,
+    request: Request,
+    response: Response,
+    page: PageRequest = Depends(page_request),
+):
     _check_auth(request)
+    after = page.after(1)
     with _db_session(_require_db()) as c:
         rows = c.execute(
-            """
+            f"""
             SELECT DISTINCT pc.project_id
             FROM project_contributors pc
             JOIN contributors c ON c.id = pc.contributor_id
             WHERE c.github_username = ?
+            {"AND pc.project_id > ?" if after else ""}
             ORDER BY pc.project_id
+            {"LIMIT ?" if page.paginated else ""}
             """,
-            (user,),
+            [user, *(after or []), *([page.fetch_size()] if page.paginated else [])],
         ).fetchall()
+    rows, next_cursor = split_page(rows, page, key=lambda r: (r[0],))
+    set_next_cursor(response, next_cursor)
     projects = [r[0] for r in rows if r and r[0]]
-    return {"data": projects, "error": None}
+    return {"data": projects, "meta": {"next_cursor": next_cursor}, "error": None}
 
 @router.get("/portfolio/summary")
 def portfolio_summary(user: str, request: Request, limit: int = 3):
@@ -158,9 +183,21 @@ def evidence_latest(request: Request, projectId: str):
 
 
 @router.get("/portfolios")
-def list_(request: Request, projectId: str, page: int = 1, pageSize: int = 20, sort: str = "created_at:desc"):
+def list_(
+    request: Request,
+    response: Response,
+    projectId: str,
+    page: int = 1,
+    pageSize: int = 20,
+    sort: str = "created_at:desc",
+    paging: PageRequest = Depends(page_request),
+):
+    """Snapshots of one project.  ``cursor``/``limit`` switch from page
+    numbers to keyset paging; ``fields`` selects snapshot keys."""
     _check_auth(request)
     sort_field, _, sort_dir = sort.partition(":")
+    after = paging.after(2)
+    page_size = paging.limit if paging.paginated else int(pageSize)
     with _db_session(_require_db()) as c:
         ensure_portfolio_tables(c)
         ensure_indexes(c)
@@ -168,14 +205,30 @@ def list_(request: Request, projectId: str, page: int = 1, pageSize: int = 20, s
             c,
             project_id=projectId,
             page=int(page),
-            page_size=int(pageSize),
+            page_size=page_size,
             sort_field=sort_field or "created_at",
             sort_dir=sort_dir or "desc",
+            after=after,
+            snapshot_fields=paging.fields,
+            lookahead=paging.paginated,
         )
+    by_classification = (sort_field or "created_at") == "classification"
+    items, next_cursor = split_page(
+        items,
+        paging,
+        key=lambda s: (s.classification or "" if by_classification else s.created_at, s.id),
+    )
+    set_next_cursor(response, next_cursor)
     payload = [s.snapshot for s in items]
     return {
         "data": payload,
-        "meta": {"projectId": projectId, "page": int(page), "pageSize": int(pageSize), "total": total},
+        "meta": {
+            "projectId": projectId,
+            "page": int(page),
+            "pageSize": page_size,
+            "total": total,
+            "nextCursor": next_cursor,
+        },
         "error": None,
     }
 
@@ -0,0 +1,35 @@
+"""Admin listing of request profiles written by ``ProfilingMiddleware``."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from capstone import profiling
+
+router = APIRouter(prefix="/profiles", tags=["profiling"])
+
+
+def _require_admin(token: Optional[str]) -> None:
+    if not profiling.is_enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.token_matches(token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@router.get("")
+def list_profiles(x_profile_token: Optional[str] = Header(default=None)):
+    _require_admin(x_profile_token)
+    profiles = profiling.list_profiles()
+    return {"count": len(profiles), "max_files": profiling.MAX_FILES, "profiles": profiles}
+
+
+@router.get("/{name}")
+def download_profile(name: str, x_profile_token: Optional[str] = Header(default=None)):
+    _require_admin(x_profile_token)
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
@@ -6,7 +6,6 @@ retrieve analysis snapshots, update files, and fetch collaboration data.
 
 from __future__ import annotations
 
-import base64
 import json
 import mimetypes
 import re
@@ -15,17 +14,21 @@ import subprocess
 import tempfile
 import time
 import zipfile
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path, PurePosixPath
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from urllib.error import HTTPError, URLError
 from urllib.parse import quote
 from urllib.request import Request, urlopen
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi import Request as FastAPIRequest
 from pydantic import BaseModel
 
-from capstone import file_store, storage
+from capstone import archive_pool, cancellation, file_store, storage, telemetry
+from capstone.api import http_caching
+from capstone.api.executor import offload
 from capstone.git_analysis import _parse_git_log_lines, run_git_log
 from capstone.logging_utils import get_logger
 from capstone.system.cloud_storage import (
@@ -57,6 +60,7 @@ _TEXT_EXTENSIONS = {
 _IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".bmp"}
 
 _MAX_TEXT_SIZE = 2 * 1024 * 1024  # 2 MB
+_MAX_RAW_SIZE = 32 * 1024 * 1024  # 32 MB; members are decompressed in memory
 
 
 # ── Project lookup (multi-source) ──────────────────────────────────
@@ -149,7 +153,7 @@ def _get_file_id_for_project(project_id: str) -> str:
 
 
 def _get_zip_path_for_project(project_id: str) -> Path:
-    """Return the local filesystem path to the project's zip."""
+    """Return the path of the project's zip blob (which packed archives do not have on disk)."""
     conn = storage.open_db()
     file_id = _get_file_id_for_project(project_id)
     row = conn.execute("SELECT path FROM files WHERE file_id = ?", (file_id,)).fetchone()
@@ -157,6 +161,8 @@ def _get_zip_path_for_project(project_id: str) -> Path:
         raise HTTPException(status_code=404, detail="Zip file not found in storage")
     p = row[0] if isinstance(row, tuple) else row["path"]
     path = Path(p)
+    if not path.exists() and file_store.is_packed(conn, file_id):
+        return path
     if not path.exists():
         from capstone.file_store import DEFAULT_FILES_ROOT
         candidates = list(DEFAULT_FILES_ROOT.glob(f"{file_id}*"))
@@ -167,13 +173,25 @@ def _get_zip_path_for_project(project_id: str) -> Path:
     return path
 
 
-def _open_project_zip(file_id: str) -> zipfile.ZipFile:
+@contextmanager
+def _project_zip_on_disk(project_id: str) -> Iterator[Path]:
+    """The project's zip as a file; packed archives are rebuilt into a temp file for the block."""
+    blob_path = _get_zip_path_for_project(project_id)
+    if blob_path.exists():
+        yield blob_path
+        return
+    with file_store.materialize_file(storage.open_db(), _get_file_id_for_project(project_id)) as path:
+        yield path
+
+
+@contextmanager
+def _open_project_zip(file_id: str) -> Iterator[archive_pool.PooledArchive]:
+    """Lease the project's archive from the shared pool (no per-request reparse)."""
     conn = storage.open_db()
-    fh = file_store.open_file(conn, file_id)
     try:
-        return zipfile.ZipFile(fh)
+        with archive_pool.open_stored_archive(conn, file_id) as zf:
+            yield zf
     except zipfile.BadZipFile:
-        fh.close()
         raise HTTPException(status_code=400, detail="Stored file is not a valid zip")
 
 
@@ -197,12 +215,11 @@ def _detect_root(zf: zipfile.ZipFile) -> str | None:
 # ── File tree ──────────────────────────────────────────────────────
 
 @router.get("/{project_id}/tree")
+@offload
 def get_project_file_tree(project_id: str):
     """Return the file tree structure for a project zip."""
     file_id = _get_file_id_for_project(project_id)
-    zf = _open_project_zip(file_id)
-
-    try:
+    with _open_project_zip(file_id) as zf:
         root = _detect_root(zf)
         tree: dict = {}
 
@@ -225,8 +242,6 @@ def get_project_file_tree(project_id: str):
                 "size": info.file_size,
                 "path": rel_path,
             }
-    finally:
-        zf.close()
 
     def build_nodes(subtree: dict, prefix: str = "") -> list:
         items = []
@@ -253,31 +268,36 @@ def get_project_file_tree(project_id: str):
     return {"project_id": project_id, "tree": build_nodes(tree)}
 
 
+def _find_member(zf: archive_pool.PooledArchive, path: str) -> zipfile.ZipInfo:
+    root = _detect_root(zf)
+    lookup_path = f"{root}/{path}" if root else path
+    try:
+        return zf.getinfo(lookup_path)
+    except KeyError:
+        for zi in zf.infolist():
+            if _strip_root(zi.filename.strip("/"), root) == path:
+                return zi
+    raise HTTPException(status_code=404, detail=f"File not found: {path}")
+
+
 # ── File content ───────────────────────────────────────────────────
 
+def _member_version(info: zipfile.ZipInfo) -> str:
+    # CRC-32 and size from the central directory identify the content
+    # without reading (or hashing) the member.
+    return f"{info.CRC:08x}-{info.file_size:x}"
+
+
 @router.get("/{project_id}/file")
+@offload
 def get_project_file_content(
     project_id: str,
     path: str = Query(..., description="Relative file path within the project"),
 ):
     """Return the content of a specific file from the project zip."""
     file_id = _get_file_id_for_project(project_id)
-    zf = _open_project_zip(file_id)
-
-    try:
-        root = _detect_root(zf)
-        lookup_path = f"{root}/{path}" if root else path
-
-        try:
-            info = zf.getinfo(lookup_path)
-        except KeyError:
-            for zi in zf.infolist():
-                stripped = _strip_root(zi.filename.strip("/"), root)
-                if stripped == path:
-                    info = zi
-                    break
-            else:
-                raise HTTPException(status_code=404, detail=f"File not found: {path}")
+    with _open_project_zip(file_id) as zf:
+        info = _find_member(zf, path)
 
         suffix = PurePosixPath(path).suffix.lower()
         name_lower = PurePosixPath(path).name.lower()
@@ -289,11 +309,13 @@ def get_project_file_content(
         )
 
         if is_image:
-            raw = zf.read(info)
+            # Images are served as raw bytes from /raw; the JSON only carries a
+            # URL pinned to the member's version, so the image is never read here.
+            content_hash = _member_version(info)
             mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
             return {
                 "path": path, "type": "image", "mime": mime,
-                "content": base64.b64encode(raw).decode("ascii"),
+                "url": f"/projects/{quote(project_id, safe='')}/raw?path={quote(path, safe='')}&v={content_hash}",
                 "size": info.file_size,
             }
 
@@ -310,8 +332,47 @@ def get_project_file_content(
             return {"path": path, "type": "text", "language": lang, "content": text, "size": info.file_size}
 
         return {"path": path, "type": "binary", "content": None, "size": info.file_size}
-    finally:
-        zf.close()
+
+
+@router.get("/{project_id}/raw")
+@offload
+def get_project_file_raw(
+    request: FastAPIRequest,
+    project_id: str,
+    path: str = Query(..., description="Relative file path within the project"),
+    v: Optional[str] = Query(None, description="Member version the URL is pinned to"),
+):
+    """Serve a project file's raw bytes with ETag, Cache-Control and Range support.
+
+    Only images are rendered inline; anything else (HTML, SVG, scripts from an
+    uploaded project) is sent as an octet-stream attachment so it can never run
+    in the app's origin.
+    """
+    file_id = _get_file_id_for_project(project_id)
+    with _open_project_zip(file_id) as zf:
+        info = _find_member(zf, path)
+        if info.is_dir():
+            raise HTTPException(status_code=404, detail=f"File not found: {path}")
+        if info.file_size > _MAX_RAW_SIZE:
+            raise HTTPException(status_code=413, detail="File too large to serve")
+        raw = zf.read(info)
+        content_hash = _member_version(info)
+
+    if PurePosixPath(path).suffix.lower() in _IMAGE_EXTENSIONS:
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        disposition = "inline"
+    else:
+        mime = "application/octet-stream"
+        disposition = "attachment"
+    return http_caching.content_response(
+        request,
+        etag_hash=content_hash,
+        media_type=mime,
+        data=raw,
+        filename=PurePosixPath(path).name,
+        disposition=disposition,
+        immutable=v == content_hash,
+    )
 
 
 # ── Update file (save edits) ──────────────────────────────────────
@@ -331,7 +392,7 @@ def update_project_file(payload: UpdateFilePayload):
 
     zip_path = _get_zip_path_for_project(project_id)
 
-    with zipfile.ZipFile(zip_path, "r") as zf:
+    with _project_zip_on_disk(project_id) as source_path, zipfile.ZipFile(source_path, "r") as zf:
         root = _detect_root(zf)
         internal_path = f"{root}/{file_path}" if root else file_path
 
@@ -355,7 +416,7 @@ def update_project_file(payload: UpdateFilePayload):
         tmp_path = Path(tmp.name)
 
     try:
-        with zipfile.ZipFile(zip_path, "r") as zf_in:
+        with _project_zip_on_disk(project_id) as source_path, zipfile.ZipFile(source_path, "r") as zf_in:
             with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf_out:
                 for item in zf_in.infolist():
                     if item.filename == internal_path:
@@ -363,6 +424,9 @@ def update_project_file(payload: UpdateFilePayload):
                     else:
                         zf_out.writestr(item, zf_in.read(item))
 
+        # Release pooled handles first: the blob is replaced in place (an
+        # edited packed archive gets a blob of its own).
+        archive_pool.invalidate_file(_get_file_id_for_project(project_id), zip_path)
         shutil.move(str(tmp_path), str(zip_path))
     except Exception as exc:
         tmp_path.unlink(missing_ok=True)
@@ -416,6 +480,7 @@ def _slim_snapshot_for_project_viewer(snapshot: dict) -> dict:
 
 
 @router.get("/{project_id}/analysis")
+@offload
 def get_project_analysis(project_id: str):
     """Return analysis data for the project viewer (slim payload + optional bundled collaboration).
 
@@ -687,13 +752,19 @@ def _normalize_contributor_key(name: str) -> tuple[list[str], list[str], str | N
 
 def _github_request(url: str, *, token: str | None) -> object:
     """Fetch JSON from GitHub API. Returns parsed object or empty list on failure."""
+    cancellation.check()
     headers = {"Accept": "application/vnd.github+json", "User-Agent": "capstone-cli/1.0"}
     if token:
         headers["Authorization"] = f"Bearer {token}"
     try:
         with urlopen(Request(url, headers=headers), timeout=15) as resp:
+            telemetry.record_github_status(resp.status)
             return json.loads(resp.read().decode("utf-8"))
     except (HTTPError, URLError, json.JSONDecodeError, OSError) as exc:
+        if isinstance(exc, HTTPError):
+            telemetry.record_github_status(exc.code)
+        elif isinstance(exc, OSError):
+            telemetry.record_github_status("error")
         logger.debug("GitHub API request failed %s: %s", url[:80], exc)
         return []
 
@@ -902,6 +973,38 @@ def _extract_git_root(zf: zipfile.ZipFile, dest: Path) -> Path | None:
     return None
 
 
+def _tally_git_log(lines: Iterable[str]) -> dict | None:
+    """Per-author commit, review and line totals of a git log (None if it has no commits)."""
+    tally = {
+        "commits": {},
+        "reviews": {},
+        "lines": {},
+        "last_commit": {},
+        "timestamps": [],
+        "bots": set(),
+    }
+    for rec in _parse_git_log_lines(lines):
+        author = (rec.author or "Unknown").strip()
+        if not author:
+            continue
+        if _is_bot_contributor(author):
+            tally["bots"].add(author)
+            continue
+        tally["commits"][author] = tally["commits"].get(author, 0) + 1
+        reviews = 1 if rec.is_review else 0
+        tally["reviews"][author] = tally["reviews"].get(author, 0) + reviews
+        lines_changed = rec.lines_added + rec.lines_deleted
+        tally["lines"][author] = tally["lines"].get(author, 0) + lines_changed
+        ts = _normalize_git_epoch_seconds(rec.timestamp)
+        tally["timestamps"].append(ts)
+        prev = tally["last_commit"].get(author, 0)
+        if ts > prev:
+            tally["last_commit"][author] = ts
+    if not tally["timestamps"] and not tally["bots"]:
+        return None
+    return tally
+
+
 def _compute_collaboration_from_git(
     project_id: str,
     zip_path: Path,
@@ -917,55 +1020,40 @@ def _compute_collaboration_from_git(
     if not isinstance(pr_snapshot, dict):
         pr_snapshot = {}
 
-    git_log_text: str | None = None
+    tally: dict | None = None
     repo_path: Path | None = None
 
     try:
         with zipfile.ZipFile(zip_path, "r") as zf:
             git_log_text = _read_git_log_from_zip(zf)
             if git_log_text:
-                pass
+                tally = _tally_git_log(git_log_text.splitlines())
             elif _zip_has_git_dir(zf):
                 with tempfile.TemporaryDirectory(prefix="capstone-collab-") as tmp:
                     repo_path = _extract_git_root(zf, Path(tmp))
                     if repo_path:
                         try:
-                            git_log_text = run_git_log(repo_path)
+                            # Parsed as git streams it, while the checkout still exists.
+                            tally = _tally_git_log(run_git_log(repo_path))
                         except subprocess.CalledProcessError as exc:
                             logger.warning("git log failed for %s: %s", project_id, exc)
                         except FileNotFoundError:
                             logger.warning("git executable not found for %s", project_id)
+    except cancellation.OperationCancelled:
+        raise
     except Exception as exc:
         logger.warning("Failed to read zip for collaboration %s: %s", project_id, exc)
         return None
 
-    if not git_log_text:
+    if tally is None:
         return None
 
-    commits_by_author: dict[str, int] = {}
-    reviews_by_author: dict[str, int] = {}
-    lines_by_author: dict[str, int] = {}
-    last_commit_by_author: dict[str, int] = {}
-    all_timestamps: list[int] = []
-    bot_names: set[str] = set()
-
-    for rec in _parse_git_log_lines(git_log_text.splitlines()):
-        author = (rec.author or "Unknown").strip()
-        if not author:
-            continue
-        if _is_bot_contributor(author):
-            bot_names.add(author)
-            continue
-        commits_by_author[author] = commits_by_author.get(author, 0) + 1
-        reviews = 1 if rec.is_review else 0
-        reviews_by_author[author] = reviews_by_author.get(author, 0) + reviews
-        lines = rec.lines_added + rec.lines_deleted
-        lines_by_author[author] = lines_by_author.get(author, 0) + lines
-        ts = _normalize_git_epoch_seconds(rec.timestamp)
-        all_timestamps.append(ts)
-        prev = last_commit_by_author.get(author, 0)
-        if ts > prev:
-            last_commit_by_author[author] = ts
+    commits_by_author: dict[str, int] = tally["commits"]
+    reviews_by_author: dict[str, int] = tally["reviews"]
+    lines_by_author: dict[str, int] = tally["lines"]
+    last_commit_by_author: dict[str, int] = tally["last_commit"]
+    all_timestamps: list[int] = tally["timestamps"]
+    bot_names: set[str] = tally["bots"]
 
     logger.info(
         "Collaboration git parse: project=%s commits=%d contributors=%d",
@@ -1036,6 +1124,7 @@ def _compute_collaboration_from_git(
 
 
 @router.get("/collaboration/{project_id}")
+@offload
 def get_project_collaboration(project_id: str):
     """Return detailed collaboration data for a project."""
     conn = storage.open_db()
@@ -1062,8 +1151,8 @@ def get_project_collaboration(project_id: str):
 
     git_result = None
     try:
-        zip_path = _get_zip_path_for_project(project_id)
-        git_result = _compute_collaboration_from_git(project_id, zip_path, conn, snapshot)
+        with _project_zip_on_disk(project_id) as zip_path:
+            git_result = _compute_collaboration_from_git(project_id, zip_path, conn, snapshot)
     except HTTPException:
         raise
     except Exception as exc:
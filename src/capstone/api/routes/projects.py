@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
-from fastapi import APIRouter, Form, UploadFile, File, HTTPException, Response, Request
+from fastapi import APIRouter, Depends, Form, UploadFile, File, HTTPException, Response, Request
 from pathlib import Path
 from datetime import datetime
 import tempfile
@@ -8,17 +8,37 @@ import shutil
 import time
 import zipfile
 import hashlib
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import ExitStack
 from capstone.activity_log import log_event
-from capstone import file_store, storage
+from capstone import archive_pool, file_store, image_variants, storage
+from capstone.api import http_caching
+from capstone.api import executor
+from capstone.api.executor import Priority, offload
+from capstone.api.storage_context import StorageContext, get_db, get_storage_context
+from capstone.api.pagination import PageRequest, keyset_predicate, page_request, set_next_cursor, split_page
+from capstone.api.portfolio_helpers import ensure_portfolio_tables
 from capstone.language_detection import classify_activity
 from capstone.metrics import FileMetric, compute_metrics
-from capstone.zip_analyzer import ZipAnalyzer
+from capstone.cancellation import OperationCancelled
+from capstone.zip_analyzer import ZipAnalyzer, discard_stored_upload
 from capstone.config import Preferences
 from capstone.modes import ModeResolution
 from capstone.resume_retrieval import build_resume_project_item
-from capstone.system.cloud_storage import upload_database, upload_project_zip, delete_project_zip
-import capstone.storage as storage_module
+from capstone.system.cloud_storage import (
+    delete_blob,
+    delete_project_zip,
+    download_blob,
+    upload_blob,
+    upload_database,
+    upload_project_zip,
+)
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
 class ProjectEdit(BaseModel):
     key_role: Optional[str] = None
     evidence: Optional[str] = None
@@ -48,19 +68,6 @@ _EXT_TO_SKILL = {
 }
 
 
-def _restore_user_from_request(request: Request | None) -> None:
-    """Restore storage.CURRENT_USER from the Bearer session when available."""
-    if request is None:
-        return
-    try:
-        from capstone.api.routes.auth import get_authenticated_storage_user_key
-
-        storage_user_key = get_authenticated_storage_user_key(request)
-        storage_module.set_current_user(storage_user_key)
-    except Exception:
-        pass
-
-
 def _normalize_token(value: str | None) -> str:
     token = (value or "").strip().lower()
     out = []
@@ -303,12 +310,12 @@ def _generate_project_id_from_zip(conn, tmp_zip_path: Path, filename: str) -> st
 
 
 @router.post("/upload")
-async def upload_project(
-    request: Request,
+@offload
+def upload_project(
     project_id: str = "",
     file: UploadFile = File(...),
+    ctx: StorageContext = Depends(get_storage_context),
 ):
-    _restore_user_from_request(request)
     filename = file.filename or "upload.zip"
     if not filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="Only .zip files are supported")
@@ -317,11 +324,25 @@ async def upload_project(
         shutil.copyfileobj(file.file, tmp)
         tmp_path = Path(tmp.name)
 
-    conn = storage.open_db()
+    return ingest_uploaded_zip(tmp_path, filename, project_id, ctx=ctx)
+
+
+def ingest_uploaded_zip(
+    tmp_path: Path,
+    filename: str,
+    project_id: str = "",
+    *,
+    ctx: StorageContext,
+    precomputed: tuple[str, int] | None = None,
+) -> dict:
+    """Store a received zip, analyze it and sync it; *tmp_path* is consumed.
+
+    Shared by the single-request upload and resumable upload finalize, which
+    passes the incrementally computed ``(sha256, size)`` as *precomputed*.
+    Everything is read from and written to *ctx*'s database.
+    """
+    conn = ctx.open_db()
     try:
-        active_user = storage_module.get_current_user()
-        mode = "user" if active_user else "guest"
-        db_path = str(storage.get_database_path())
         auto_detected = False
         if not project_id:
             project_id = _auto_detect_project_id(conn, tmp_path, filename)
@@ -333,14 +354,12 @@ async def upload_project(
             "SELECT 1 FROM uploads WHERE upload_id = ? LIMIT 1",
             (project_id,),
         ).fetchone()
-        print(
-            "[projects/upload-duplicate-check] "
-            f"mode={mode!r} "
-            f"current_user={active_user!r} "
-            f"db_path={db_path!r} "
-            f"project_id={project_id!r} "
-            f"exists={bool(existing)!r}",
-            flush=True,
+        logger.debug(
+            "upload duplicate check user=%r db_path=%s project_id=%r exists=%s",
+            ctx.user,
+            ctx.db_path,
+            project_id,
+            bool(existing),
         )
 
         if existing:
@@ -355,6 +374,8 @@ async def upload_project(
             source="api_upload",
             mime="application/zip",
             upload_id=project_id,  #this is for uploading project id 
+            precomputed=precomputed,
+            move=True,
         )
     finally:
         try:
@@ -365,15 +386,23 @@ async def upload_project(
     project_id = stored["upload_id"]
     
     analyzer = ZipAnalyzer()
-    analyzer.analyze(
-        zip_path=Path(stored["path"]),
-        metadata_path=Path("data") / f"{project_id}_metadata.jsonl",
-        summary_path=Path("data") / f"{project_id}_summary.json",
-        mode=ModeResolution(requested="local", resolved="local", reason="project upload"),
-        preferences=Preferences(),
-        project_id=project_id,
-        conn=conn,
-    )
+    try:
+        # A packed archive has no blob of its own; analyse a rebuilt copy.
+        with file_store.materialize_file(conn, stored["file_id"]) as zip_path:
+            analyzer.analyze(
+                zip_path=zip_path,
+                metadata_path=Path("data") / f"{project_id}_metadata.jsonl",
+                summary_path=Path("data") / f"{project_id}_summary.json",
+                mode=ModeResolution(requested="local", resolved="local", reason="project upload"),
+                preferences=Preferences(),
+                project_id=project_id,
+                conn=conn,
+                user=ctx.user,
+            )
+    except OperationCancelled:
+        # The client is gone: leave no upload behind for a project it never saw.
+        discard_stored_upload(conn, stored)
+        raise
     log_event("SUCCESS", f"Full analysis snapshot stored · Project: {project_id}")
     # Mirror GitHub import flow: extract git-log contributors and store in users/user_projects.
     # Pass email alongside the git author name so upsert_contributor can reconcile with the same
@@ -395,7 +424,7 @@ async def upload_project(
         message = "Upload stored and matched to existing project automatically."
     else: 
         log_event("SUCCESS", f"New project uploaded · Project: {project_id}")
-    active_user = storage_module.get_current_user()
+    active_user = ctx.user
     if active_user:
         try:
             upload_project_zip(
@@ -420,7 +449,11 @@ async def upload_project(
 
 
 @router.post("/upload-bundle")
-async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
+@offload
+def upload_project_bundle(
+    file: UploadFile = File(...),
+    ctx: StorageContext = Depends(get_storage_context),
+):
     """Upload a multi-project zip bundle.
 
     Each top-level directory inside the zip is treated as a separate project
@@ -429,7 +462,6 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
     If the zip contains only one top-level directory it is stored the same as
     a regular ``POST /projects/upload`` call.
     """
-    _restore_user_from_request(request)
     filename = file.filename or "upload.zip"
     if not filename.lower().endswith(".zip"):
         raise HTTPException(status_code=400, detail="Only .zip files are supported")
@@ -460,7 +492,7 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
         if not top_dirs:
             raise HTTPException(status_code=400, detail="Zip archive is empty")
 
-        conn = storage.open_db()
+        conn = ctx.open_db()
         results = []
 
         for sub_name in sorted(top_dirs.keys()):
@@ -496,15 +528,17 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
 
                 manifest = _inspect_stored_zip_manifest(conn, stored["file_id"])
                 analyzer = ZipAnalyzer()
-                summary = analyzer.analyze(
-                    zip_path=Path(stored["path"]),
-                    metadata_path=Path("data") / f"{project_id}_metadata.jsonl",
-                    summary_path=Path("data") / f"{project_id}_summary.json",
-                    mode=ModeResolution(requested="local", resolved="local", reason="bundle upload"),
-                    preferences=Preferences(),
-                    project_id=project_id,
-                    conn=conn,
-                )
+                with file_store.materialize_file(conn, stored["file_id"]) as zip_path:
+                    summary = analyzer.analyze(
+                        zip_path=zip_path,
+                        metadata_path=Path("data") / f"{project_id}_metadata.jsonl",
+                        summary_path=Path("data") / f"{project_id}_summary.json",
+                        mode=ModeResolution(requested="local", resolved="local", reason="bundle upload"),
+                        preferences=Preferences(),
+                        project_id=project_id,
+                        conn=conn,
+                        user=ctx.user,
+                    )
 
                 try:
                     contributors = _extract_contributors_from_zip(conn, stored["file_id"])
@@ -527,7 +561,7 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
                         "skills": summary.get("skills", []),
                     }
                 )
-                active_user = storage_module.get_current_user()
+                active_user = ctx.user
                 if active_user:
                     try:
                         upload_project_zip(
@@ -550,7 +584,7 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
         except Exception:
             pass
 
-        active_user = storage_module.get_current_user()
+        active_user = ctx.user
         if active_user:
             try:
                 upload_database(active_user)
@@ -564,54 +598,273 @@ async def upload_project_bundle(request: Request, file: UploadFile = File(...)):
     }
 
 
+def _analyze_stored_archive(zip_path: Path, project_id: str, reason: str, user: str | None) -> dict:
+    analyzer = ZipAnalyzer()
+    return analyzer.analyze(
+        zip_path=zip_path,
+        metadata_path=Path("data") / f"{project_id}_metadata.jsonl",
+        summary_path=Path("data") / f"{project_id}_summary.json",
+        mode=ModeResolution(requested="local", resolved="local", reason=reason),
+        preferences=Preferences(),
+        project_id=project_id,
+        user=user,
+    )
+
+
+@router.post("/upload-batch")
+@offload(priority=Priority.BACKGROUND)
+def upload_project_batch(
+    files: List[UploadFile] = File(default=[]),
+    project_ids: List[str] = Form(default=[]),
+    file_ids: List[str] = Form(default=[]),
+    ctx: StorageContext = Depends(get_storage_context),
+):
+    """Store and analyze many archives in one request.
+
+    ``files`` are new archives (``project_ids`` optionally names them, by
+    position); ``file_ids`` re-analyze archives already in the file store.
+    Registration and contributor linking run serially on one connection and
+    are committed per phase.  The analyses run concurrently on the shared
+    analysis pool, at most ``CAPSTONE_ANALYSIS_WORKERS`` of this batch in
+    flight at a time; each analysis writes its snapshot through its own
+    connection and commits it, so the batch is not one transaction.  The
+    cloud database is synced once at the end.  The batch is background work:
+    it yields to interactive requests between archives.
+    Failures are reported per item instead of failing the whole batch.
+    """
+    if not files and not file_ids:
+        raise HTTPException(status_code=400, detail="Provide at least one archive or file_id")
+
+    items: list[dict] = []
+    spooled: list[Path] = []
+    # Packed archives are rebuilt into temp files for the analyses and removed at the end.
+    materialized = ExitStack()
+    try:
+        for index, upload in enumerate(files):
+            filename = upload.filename or f"upload-{index}.zip"
+            item = {"source": "upload", "filename": filename}
+            items.append(item)
+            if not filename.lower().endswith(".zip"):
+                item["error"] = "Only .zip files are supported"
+                continue
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp:
+                shutil.copyfileobj(upload.file, tmp)
+                item["tmp_path"] = Path(tmp.name)
+                spooled.append(item["tmp_path"])
+            item["project_id"] = project_ids[index].strip() if index < len(project_ids) else ""
+
+        for file_id in file_ids:
+            items.append({"source": "file_id", "file_id": file_id})
+
+        # --- Phase 1: register archives (serial, one connection) ---
+        conn = ctx.open_db()
+        for item in items:
+            if "error" in item:
+                continue
+            executor.yield_to_interactive()
+            try:
+                if item["source"] == "upload":
+                    _register_batch_upload(conn, item)
+                else:
+                    _resolve_batch_file_id(conn, item)
+            except HTTPException as exc:
+                item["error"] = exc.detail
+            except Exception as exc:
+                item["error"] = str(exc)
+        conn.commit()
+        for item in items:
+            if "error" not in item:
+                item["zip_path"] = materialized.enter_context(file_store.materialize_file(conn, item["file_id"]))
+
+        # --- Phase 2: analyze concurrently under the shared worker budget ---
+        # Submit a bounded window so one large batch cannot queue every
+        # archive on the pool ahead of other batches.
+        waiting = deque(item for item in items if "error" not in item)
+        pending = {}
+        in_flight = max(1, executor.ANALYSIS_WORKERS)
+        while waiting or pending:
+            while waiting and len(pending) < in_flight:
+                item = waiting.popleft()
+                future = executor.submit_analysis(
+                    _analyze_stored_archive, item["zip_path"], item["project_id"], "batch upload", ctx.user
+                )
+                pending[future] = item
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    summary = future.result()
+                    item["file_count"] = int((summary.get("file_summary") or {}).get("file_count", 0))
+                    item["skills"] = summary.get("skills", [])
+                except Exception as exc:
+                    item["error"] = getattr(exc, "detail", None) or str(exc)
+                    log_event("ERROR", f"Batch analysis failed · Project: {item['project_id']}")
+
+        # --- Phase 3: contributors for every analyzed project (serial) ---
+        for item in items:
+            if "error" in item:
+                continue
+            executor.yield_to_interactive()
+            try:
+                for cname, cemail in _extract_contributors_from_zip(conn, item["file_id"]):
+                    uid = storage.upsert_contributor(conn, cname, email=cemail)
+                    storage.link_contributor_to_project(conn, uid, item["project_id"], contributor_name=cname)
+            except Exception:
+                pass  # non-fatal, as in /projects/upload
+        conn.commit()
+
+        # --- Phase 4: one cloud database sync for the whole batch ---
+        active_user = ctx.user
+        succeeded = [item for item in items if "error" not in item]
+        if active_user and succeeded:
+            try:
+                for item in succeeded:
+                    if item["source"] == "upload":
+                        upload_project_zip(active_user, item["project_id"], item["zip_path"], item["filename"])
+                upload_database(active_user)
+            except Exception:
+                log_event("WARNING", "Cloud sync failed after batch upload")
+    finally:
+        materialized.close()
+        for path in spooled:
+            path.unlink(missing_ok=True)
+
+    log_event("SUCCESS", f"Batch analysis complete · {len(succeeded)}/{len(items)} project(s)")
+    results = []
+    for item in items:
+        result = {
+            key: item.get(key)
+            for key in ("source", "filename", "project_id", "file_id", "hash", "dedup", "file_count", "skills", "error")
+            if key in item
+        }
+        result["ok"] = "error" not in item
+        results.append(result)
+    return {
+        "count": len(items),
+        "succeeded": len(succeeded),
+        "failed": len(items) - len(succeeded),
+        "projects": results,
+    }
+
+
+def _register_batch_upload(conn, item: dict) -> None:
+    tmp_path: Path = item["tmp_path"]
+    filename = item["filename"]
+    project_id = item["project_id"]
+    auto_detected = False
+    if not project_id:
+        project_id = _auto_detect_project_id(conn, tmp_path, filename)
+        auto_detected = bool(project_id)
+    if not project_id:
+        project_id = _generate_project_id_from_zip(conn, tmp_path, filename)
+    elif not auto_detected and conn.execute(
+        "SELECT 1 FROM uploads WHERE upload_id = ? LIMIT 1", (project_id,)
+    ).fetchone():
+        raise HTTPException(status_code=400, detail=f"Project ID '{project_id}' already exists.")
+
+    stored = file_store.ensure_file(
+        conn,
+        tmp_path,
+        original_name=filename,
+        source="api_upload_batch",
+        mime="application/zip",
+        upload_id=project_id,
+        move=True,
+    )
+    item.update(
+        project_id=stored["upload_id"],
+        file_id=stored["file_id"],
+        hash=stored["hash"],
+        dedup=stored["dedup"],
+        auto_detected_project_id=auto_detected,
+    )
+
+
+def _resolve_batch_file_id(conn, item: dict) -> None:
+    file_id = item["file_id"]
+    row = conn.execute(
+        """
+        SELECT u.upload_id, u.original_name, f.hash
+        FROM uploads u
+        JOIN files f ON f.file_id = u.file_id
+        WHERE u.file_id = ?
+        ORDER BY u.created_at DESC, u.id DESC
+        LIMIT 1
+        """,
+        (file_id,),
+    ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Unknown file_id: {file_id}")
+    upload_id, original_name, file_hash = row
+    item.update(
+        project_id=upload_id,
+        filename=original_name,
+        hash=file_hash,
+        dedup=True,
+    )
+
+
+_PROJECT_LIST_COLUMNS = {
+    "project_id": "u.upload_id",
+    "filename": "u.original_name",
+    "file_id": "u.file_id",
+    "hash": "u.hash",
+    "created_at": "u.created_at",
+    "size_bytes": "f.size_bytes",
+    "stored_path": "f.path",
+}
+
+
 @router.get("")
-def list_projects(request: Request):
+def list_projects(
+    response: Response,
+    page: PageRequest = Depends(page_request),
+    conn=Depends(get_db),
+):
     """
-    Lists uploaded .zip projects from CAS storage.
+    Lists uploaded .zip projects from CAS storage, newest first.
+    Supports ``limit``/``cursor`` keyset pagination and ``fields`` selection.
     """
-    _restore_user_from_request(request)
-    conn = storage.open_db()
+    names = [name for name in _PROJECT_LIST_COLUMNS if page.wants(name)]
+    # The sort key is always read so the next cursor can be built.
+    columns = ["u.created_at", "u.upload_id"] + [_PROJECT_LIST_COLUMNS[name] for name in names]
+    where = ["u.id = (SELECT MIN(u2.id) FROM uploads u2 WHERE u2.upload_id = u.upload_id)"]
+    params: list = []
+    after = page.after(2)
+    if after is not None:
+        where.append(keyset_predicate(["u.created_at", "u.upload_id"]))
+        params.extend(after)
+    sql = f"""
+        SELECT {", ".join(columns)}
+        FROM uploads u
+        JOIN files f ON f.file_id = u.file_id
+        WHERE {" AND ".join(where)}
+        ORDER BY u.created_at DESC, u.upload_id DESC
+    """
+    if page.paginated:
+        sql += " LIMIT ?"
+        params.append(page.fetch_size())
+
     try:
-        rows = conn.execute(
-            """
-            SELECT u.upload_id, u.original_name, u.file_id, u.hash, u.created_at,
-                   f.size_bytes, f.path
-            FROM uploads u
-            JOIN files f ON f.file_id = u.file_id
-            WHERE u.id = (
-                SELECT MIN(u2.id) FROM uploads u2 WHERE u2.upload_id = u.upload_id
-            )
-            ORDER BY datetime(u.created_at) DESC
-            """
-        ).fetchall()
+        rows = conn.execute(sql, params).fetchall()
     except Exception as exc:
         if "no such table" not in str(exc).lower():
             raise
         rows = []
+    rows, next_cursor = split_page(rows, page, key=lambda r: (r[0], r[1]))
+    set_next_cursor(response, next_cursor)
     return {
         "count": len(rows),
-        "projects": [
-            {
-                "project_id": r[0],
-                "filename": r[1],
-                "file_id": r[2],
-                "hash": r[3],
-                "created_at": r[4],
-                "size_bytes": r[5],
-                "stored_path": r[6],
-            }
-            for r in rows
-        ],
+        "next_cursor": next_cursor,
+        "projects": [dict(zip(names, r[2:])) for r in rows],
     }
 
 
 @router.get("/{id}")
-def get_project(id: str, request: Request):
+def get_project(id: str, conn=Depends(get_db)):
     """
     Returns info for a specific uploaded project zip by upload_id.
     """
-    _restore_user_from_request(request)
-    conn = storage.open_db()
     try:
         row = conn.execute(
             """
@@ -643,13 +896,13 @@ def get_project(id: str, request: Request):
     }
 
 @router.delete("/{id}")
-def delete_project(id: str, request: Request):
+def delete_project(id: str, ctx: StorageContext = Depends(get_storage_context)):
     """
     Deletes a project and its associated stored file (ZIP upload) or
     GitHub-imported entry (no local blob).
     """
-    _restore_user_from_request(request)
-    conn = storage.open_db()
+    conn = ctx.open_db()
+    ensure_portfolio_tables(conn)
 
     # --- ZIP-upload path: project lives in uploads + files tables ---
     upload_row = conn.execute(
@@ -694,6 +947,7 @@ def delete_project(id: str, request: Request):
         should_delete_blob = remaining_refs == 0
 
         if should_delete_blob:
+            file_store.release_file(conn, file_id)
             conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
         else:
             conn.execute(
@@ -701,21 +955,48 @@ def delete_project(id: str, request: Request):
                 (file_id,),
             )
 
+    # Thumbnail rows cascade below, but their bytes live in the file store
+    # (and, for signed-in users, in the cloud next to the project).
+    orphaned_images = []
+    orphaned_blob_ids = []
+    for (image_file_id,) in conn.execute(
+        "SELECT file_id FROM project_images WHERE project_id = ?", (id,)
+    ).fetchall():
+        released = file_store.release_bytes(conn, image_file_id)
+        if released is not None:
+            orphaned_images.append(released)
+            orphaned_blob_ids.append(image_file_id)
+            orphaned_images.extend(image_variants.release_variants(conn, image_file_id))
+
+    # Portfolio images have no foreign key to projects; drop them and their variants here.
+    for image_id, image_path in conn.execute(
+        "SELECT id, image_path FROM portfolio_images WHERE project_id = ?", (id,)
+    ).fetchall():
+        orphaned_images.append(Path(image_path))
+        orphaned_images.extend(
+            image_variants.release_variants(conn, image_variants.portfolio_source_key(image_id))
+        )
+    conn.execute("DELETE FROM portfolio_images WHERE project_id = ?", (id,))
+
     # Deleting from projects cascades to all child tables (project_analysis,
     # error_analysis_results, project_overrides, project_images, project_evidence,
     # project_contributors) via ON DELETE CASCADE FKs added in M24.
     conn.execute("DELETE FROM projects WHERE project_id = ?", (id,))
     conn.commit()
 
+    for image_path in orphaned_images:
+        image_path.unlink(missing_ok=True)
+
     # Remove physical blob only when no other upload references it
     if upload_row and should_delete_blob:
         try:
+            archive_pool.invalidate_file(file_id, file_path)
             Path(file_path).unlink(missing_ok=True)
         except Exception:
             pass
 
     # Best-effort cloud cleanup
-    active_user = storage_module.get_current_user()
+    active_user = ctx.user
     if active_user:
         try:
             delete_project_zip(
@@ -726,6 +1007,12 @@ def delete_project(id: str, request: Request):
         except Exception:
             pass
 
+        for blob_id in orphaned_blob_ids:
+            try:
+                delete_blob(active_user, blob_id)
+            except Exception:
+                pass
+
         try:
             upload_database(active_user)
         except Exception:
@@ -744,16 +1031,22 @@ def delete_project(id: str, request: Request):
 
 
 @router.post("/{id}/thumbnail")
-async def upload_project_thumbnail(id: str, file: UploadFile = File(...)):
+@offload
+def upload_project_thumbnail(
+    id: str,
+    file: UploadFile = File(...),
+    ctx: StorageContext = Depends(get_storage_context),
+):
     # Only accept images
     if not (file.content_type or "").startswith("image/"):
         raise HTTPException(status_code=400, detail="Only image uploads are supported")
     filename = file.filename or "thumbnail"
-    image_bytes = await file.read()
+    # Decoding, resizing and the cloud sync block, so the whole route runs on the pool.
+    image_bytes = file.file.read()
     if not image_bytes:
         raise HTTPException(status_code=400, detail="Empty image upload")
 
-    conn = storage.open_db()
+    conn = ctx.open_db()
     try:
         # Store latest thumbnail
         stored = storage.upsert_project_thumbnail(
@@ -763,28 +1056,77 @@ async def upload_project_thumbnail(id: str, file: UploadFile = File(...)):
             filename=filename,
             content_type=file.content_type or "application/octet-stream",
         )
+        variants = image_variants.store_variants(conn, stored["file_id"], image_bytes)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    stored["variant_widths"] = [v["width"] for v in variants]
     log_event("SUCCESS", f"Thumbnail updated · Project: {id}")
+    active_user = ctx.user
+    if active_user:
+        # The DB row only references the blob, so ship the bytes alongside it.
+        try:
+            blob_path = Path(conn.execute(
+                "SELECT path FROM files WHERE file_id = ?", (stored["file_id"],)
+            ).fetchone()[0])
+            upload_blob(active_user, stored["file_id"], blob_path)
+            upload_database(active_user)
+        except Exception:
+            log_event("WARNING", f"Cloud sync failed after thumbnail upload · Project: {id}")
+    stored["url"] = f"/projects/{id}/thumbnail?v={stored['file_id']}"
     return {"data": stored, "error": None}
 
 
+def _restore_thumbnail_from_cloud(
+    ctx: StorageContext, project_id: str, file_id: str, blob_path: Path
+) -> None:
+    # A synced DB can reference a thumbnail blob that only exists in the cloud.
+    if not ctx.user:
+        return
+    try:
+        download_blob(ctx.user, file_id, blob_path)
+    except Exception:
+        log_event("WARNING", f"Cloud thumbnail restore failed · Project: {project_id}")
+
+
 @router.get("/{id}/thumbnail")
-def get_project_thumbnail(id: str):
-    # Return the latest thumbnail bytes
-    conn = storage.open_db()
+def get_project_thumbnail(
+    id: str,
+    request: Request,
+    v: Optional[str] = None,
+    w: Optional[int] = None,
+    ctx: StorageContext = Depends(get_storage_context),
+):
+    # Return the latest thumbnail bytes. A URL pinned to the current content
+    # hash (?v=<file_id>) never changes, so it may be cached as immutable.
+    # ?w=<px> serves the smallest pre-generated variant at least that wide.
+    conn = ctx.open_db()
     meta = storage.fetch_project_thumbnail_meta(conn, id)
     if not meta:
         raise HTTPException(status_code=404, detail="Thumbnail not found")
-    image_bytes = storage.fetch_project_thumbnail_bytes(conn, id)
-    if not image_bytes:
+    file_id = meta["file_id"]
+    variant = image_variants.pick_variant(conn, file_id, w)
+    variant_file = image_variants.variant_path(conn, variant) if variant else None
+    if variant_file is not None:
+        return http_caching.content_response(
+            request,
+            etag_hash=variant["file_id"],
+            media_type=variant["mime"],
+            path=variant_file,
+            immutable=v == file_id,
+        )
+    row = conn.execute("SELECT path FROM files WHERE file_id = ?", (file_id,)).fetchone()
+    blob_path = Path(row[0]) if row else None
+    if blob_path is not None and not blob_path.exists():
+        _restore_thumbnail_from_cloud(ctx, id, file_id, blob_path)
+    if blob_path is None or not blob_path.exists():
         raise HTTPException(status_code=404, detail="Thumbnail not found")
-    return Response(
-        content=image_bytes,
+    return http_caching.content_response(
+        request,
+        etag_hash=file_id,
         media_type=meta.get("content_type") or "application/octet-stream",
-        headers={
-            "Content-Disposition": f"inline; filename=\"{meta.get('filename') or 'thumbnail'}\"",
-        },
+        path=blob_path,
+        filename=meta.get("filename") or "thumbnail",
+        immutable=v == file_id,
     )
 
 @router.get("/{id}/uploads")
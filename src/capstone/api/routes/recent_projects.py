@@ -1,24 +1,27 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, Depends, Response
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import sqlite3
 from capstone.portfolio_retrieval import _db_session
 from capstone.activity_log import log_event
 import capstone.storage as storage
+from capstone.api.executor import offload
+from capstone.api.pagination import PageRequest, page_request, paginate_sorted, select_fields, set_next_cursor
 
 router = APIRouter()
 
 
 class RecentProject(BaseModel):
-    project_id: str
-    created_at: datetime
-    total_files: int
-    total_skills: int
-    classification: str | None
-    primary_contributor: str | None
-    is_github: bool
-    contributor_count: int
+    # Optional so ``fields=`` can return a subset; unset fields are omitted.
+    project_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    total_files: Optional[int] = None
+    total_skills: Optional[int] = None
+    classification: str | None = None
+    primary_contributor: str | None = None
+    is_github: Optional[bool] = None
+    contributor_count: Optional[int] = None
 
 
 import json
@@ -107,8 +110,32 @@ def _fallback_projects_from_cloud(storage_user_key: str | None) -> list[dict]:
     except Exception:
         return []
 
-@router.get("/dashboard/recent-projects", response_model=List[RecentProject])
-def get_recent_projects():
+def _recent_sort_key(row: dict) -> tuple[str, str]:
+    return (str(row.get("created_at") or ""), str(row.get("project_id") or ""))
+
+
+@router.get(
+    "/dashboard/recent-projects",
+    response_model=List[RecentProject],
+    response_model_exclude_unset=True,
+)
+@offload
+def get_recent_projects(response: Response, page: PageRequest = Depends(page_request)):
+    """
+    Recent projects, newest first.  With ``limit`` the list is paged by
+    (created_at, project_id) and the next cursor is sent in ``X-Next-Cursor``;
+    the list is merged from local analysis, uploads and the cloud prefix, so
+    the keyset is applied after the merge.
+    """
+    projects = _load_recent_projects()
+    if page.paginated:
+        projects = sorted(projects, key=_recent_sort_key, reverse=True)
+    projects, next_cursor = paginate_sorted(projects, page, key=_recent_sort_key)
+    set_next_cursor(response, next_cursor)
+    return [select_fields(row, page.fields) for row in projects]
+
+
+def _load_recent_projects() -> list[dict]:
     with _db_session(None) as db:
         rows = db.execute("""
 SELECT
@@ -7,9 +7,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
+from capstone.api.executor import Priority, offload, run_background
+from capstone.api.pagination import PageRequest, page_request, select_fields, set_next_cursor, split_page
 from capstone.portfolio_retrieval import _db_session
 from capstone.resume_pdf_builder import build_pdf_with_latex
 from capstone.resume_retrieval import build_resume_project_item, build_resume_summary
@@ -152,12 +154,25 @@ def _get_current_user_contributor_id(conn) -> Optional[int]:
 
 
 @router.get("")
-def list_resumes(request: Request, user_id: Optional[int] = None):
+def list_resumes(
+    request: Request,
+    response: Response,
+    user_id: Optional[int] = None,
+    page: PageRequest = Depends(page_request),
+):
     _check_auth(request)
+    after = page.after(2)
     with _db_session(_get_db_dir()) as conn:
         # After M23 all resumes belong to user_id=1 (singleton user per DB)
-        resumes = storage.fetch_resumes(conn, 1)
-    return {"data": resumes, "meta": {"total": len(resumes)}, "error": None}
+        resumes = storage.fetch_resumes(
+            conn, 1, limit=page.fetch_size(), after=tuple(after) if after else None
+        )
+    resumes, next_cursor = split_page(resumes, page, key=lambda r: (r["updated_at"], r["id"]))
+    set_next_cursor(response, next_cursor)
+    meta = {"total": len(resumes)}
+    if page.paginated:
+        meta = {"count": len(resumes), "limit": page.limit, "next_cursor": next_cursor}
+    return {"data": [select_fields(r, page.fields) for r in resumes], "meta": meta, "error": None}
 
 
 @router.post("/blank")
@@ -187,14 +202,18 @@ async def render_pdf(request: Request):
     resume_payload = payload.get("resume")
     if not isinstance(resume_payload, dict):
         raise HTTPException(status_code=400, detail="resume object is required")
+    encoded = await run_background(_render_pdf_base64, resume_payload)
+    return {"data": {"format": "pdf", "payload": encoded}, "error": None}
+
+
+def _render_pdf_base64(resume_payload: dict) -> str:
     with tempfile.TemporaryDirectory() as tmpdir:
         out_path = Path(tmpdir) / "resume.pdf"
         try:
             build_pdf_with_latex(resume_payload, out_path)
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"PDF render failed: {exc}")
-        encoded = base64.b64encode(out_path.read_bytes()).decode("ascii")
-    return {"data": {"format": "pdf", "payload": encoded}, "error": None}
+        return base64.b64encode(out_path.read_bytes()).decode("ascii")
 
 
 @router.post("/auto-generate")
@@ -433,6 +452,7 @@ def delete_resume(resume_id: str, request: Request):
 
 
 @router.get("/{resume_id}/export")
+@offload(priority=Priority.BACKGROUND)
 def export_resume(resume_id: str, request: Request, format: str = "json"):
     """Export a resume as JSON, Markdown, or PDF (base64)."""
     _check_auth(request)
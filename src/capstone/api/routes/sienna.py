@@ -10,18 +10,18 @@ from dataclasses import dataclass
 from pathlib import PurePosixPath, Path
 from typing import Any
 
-import capstone.storage as storage_module
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field
 
-from capstone import file_store
+from capstone import archive_pool
 from capstone.consent import ensure_external_permission, ExternalPermissionDenied
+from capstone.llm_client import load_openai
 from capstone.portfolio_retrieval import _db_session
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None
+# ``openai.OpenAI``, imported by _openai_class() on first use; tests replace
+# it with a stub, or with ``None`` to simulate the package being missing.
+_NOT_LOADED = object()
+OpenAI: Any = _NOT_LOADED
 
 
 router = APIRouter(prefix="/sienna", tags=["sienna"])
@@ -197,16 +197,6 @@ class _ProjectContext:
     zip_path: str | None
 
 
-def _restore_user_from_request(request: Request) -> None:
-    try:
-        from capstone.api.routes.auth import get_authenticated_username
-
-        username = get_authenticated_username(request)
-        storage_module.set_current_user(username)
-    except Exception:
-        pass
-
-
 def _is_debug_intent(message: str, explicit_debug_flag: bool) -> bool:
     if explicit_debug_flag:
         return True
@@ -408,15 +398,14 @@ def _collect_relevant_code_snippets(
 
     if file_id:
         try:
-            with file_store.open_file(conn, file_id) as fh:
-                with zipfile.ZipFile(fh) as zf:
-                    _extract_from_zip(zf)
+            with archive_pool.open_stored_archive(conn, file_id) as zf:
+                _extract_from_zip(zf)
         except Exception:
             pass
 
     if not snippets and zip_path and Path(zip_path).exists():
         try:
-            with zipfile.ZipFile(zip_path) as zf:
+            with archive_pool.open_path_archive(zip_path) as zf:
                 _extract_from_zip(zf)
         except Exception:
             pass
@@ -523,15 +512,9 @@ def _build_openai_messages(
 
 
 def _call_openai(messages: list[dict[str, str]]) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=503, detail="OPENAI_API_KEY is not set")
-    if OpenAI is None:
-        raise HTTPException(status_code=503, detail="openai package is not installed")
-
+    client = _build_openai_client()
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     try:
-        client = OpenAI(api_key=api_key, timeout=45.0)
         response = client.chat.completions.create(
             model=model,
             messages=messages,
@@ -546,13 +529,21 @@ def _call_openai(messages: list[dict[str, str]]) -> str:
     return content.strip()
 
 
-def _build_openai_client() -> OpenAI:
+def _openai_class():
+    global OpenAI
+    if OpenAI is _NOT_LOADED:
+        OpenAI = load_openai()
+    return OpenAI
+
+
+def _build_openai_client():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise HTTPException(status_code=503, detail="OPENAI_API_KEY is not set")
-    if OpenAI is None:
+    client_class = _openai_class()
+    if client_class is None:
         raise HTTPException(status_code=503, detail="openai package is not installed")
-    return OpenAI(api_key=api_key, timeout=45.0)
+    return client_class(api_key=api_key, timeout=45.0)
 
 
 def _extract_audio_bytes(response: Any) -> bytes | None:
@@ -606,7 +597,6 @@ def _synthesize_openai_voice(text: str) -> dict[str, str] | None:
 
 @router.get("/projects", response_model=list[SiennaProject])
 def list_sienna_projects(request: Request):
-    _restore_user_from_request(request)
     with _db_session(None) as conn:
         rows = conn.execute(
             """
@@ -654,8 +644,6 @@ def list_sienna_projects(request: Request):
 
 @router.post("/chat")
 def ask_sienna(payload: SiennaChatRequest, request: Request) -> dict[str, Any]:
-    _restore_user_from_request(request)
-
     message = (payload.message or "").strip()
     project_id = (payload.project_id or "").strip()
     if not message:
@@ -709,7 +697,6 @@ def synthesize_sienna_voice(payload: SiennaVoiceRequest, request: Request) -> di
     Explicit TTS endpoint used for greeting/replay so frontend can request
     speech without forcing a full chat completion call.
     """
-    _restore_user_from_request(request)
     try:
         ensure_external_permission("capstone.external.ask_sienna_voice")
     except ExternalPermissionDenied:
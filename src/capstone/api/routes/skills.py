@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pathlib import Path
 import zipfile
 import json
 
 from capstone import storage, file_store
 from capstone.activity_log import log_event
+from capstone.api.pagination import (
+    PageRequest,
+    json_projection,
+    keyset_predicate,
+    page_request,
+    select_fields,
+    set_next_cursor,
+    split_page,
+)
 router = APIRouter(tags=["skills"])
 
 EXT_TO_SKILL = {
@@ -211,24 +220,32 @@ def skills_all(limit: int = 200):
         conn.close()
 
 @router.get("/skills/timeline")
-def skills_timeline(top_n: int = 5):
+def skills_timeline(response: Response, top_n: int = 5, page: PageRequest = Depends(page_request)):
     """
     Return one skills timeline node per stored analysis snapshot.
     Each node is timestamped using project_analysis.created_at so the frontend can
     render exact analysis times instead of coarse yearly buckets.
+    Paged oldest-first by (created_at, id) when ``limit``/``cursor`` are given.
     """
+    after = page.after(2)
     conn = storage.open_db()
     try:
-        rows = conn.execute(
-            """
-            SELECT project_id, snapshot, created_at, zip_path
+        # Only the two snapshot keys the timeline reads are extracted by SQLite.
+        sql = f"""
+            SELECT project_id, {json_projection("snapshot", ("skills", "file_summary"))},
+                   created_at, zip_path, id
             FROM project_analysis
-            ORDER BY datetime(created_at) ASC, id ASC
-            """
-        ).fetchall()
+            {"WHERE " + keyset_predicate(["created_at", "id"], descending=False) if after else ""}
+            ORDER BY created_at ASC, id ASC
+            {"LIMIT ?" if page.paginated else ""}
+        """
+        params = list(after or []) + ([page.fetch_size()] if page.paginated else [])
+        rows, next_cursor = split_page(
+            conn.execute(sql, params).fetchall(), page, key=lambda r: (r[2], r[4])
+        )
 
         timeline = []
-        for project_id, snapshot_raw, created_at, zip_path in rows:
+        for project_id, snapshot_raw, created_at, zip_path, _row_id in rows:
             try:
                 snapshot = json.loads(snapshot_raw) if isinstance(snapshot_raw, str) else snapshot_raw
             except Exception:
@@ -302,9 +319,11 @@ def skills_timeline(top_n: int = 5):
 
         log_event("INFO", f"Skills timeline generated · Nodes: {len(timeline)}")
 
+        set_next_cursor(response, next_cursor)
         return {
             "count": len(timeline),
-            "timeline": timeline,
+            "next_cursor": next_cursor,
+            "timeline": [select_fields(node, page.fields) for node in timeline],
         }
 
     except Exception as exc:
@@ -1,17 +1,50 @@
-import psutil
+"""Host and process metrics for the system dashboard.
+
+A background :class:`MetricsSampler` reads CPU, memory, disk I/O, storage and
+process RSS every ``CAPSTONE_METRICS_INTERVAL_S`` seconds (default 2) into a
+ring buffer of the last ``CAPSTONE_METRICS_HISTORY`` samples (default 150),
+so ``GET /system/system-metrics`` answers from memory instead of sleeping in
+``psutil.cpu_percent(interval=...)``.  GPU and temperature probes spawn a
+process or make an HTTP call, so they are refreshed only every
+``SLOW_PROBE_EVERY`` samples.  psutil is imported when sampling starts, not
+when the API imports this module.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
 import shutil
 import subprocess
 import requests
 import platform
 
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
 IS_WINDOWS = platform.system().lower() == "windows"
 
-def get_cpu_usage():
-    return psutil.cpu_percent(interval=0.5)
+INTERVAL_S = float(os.getenv("CAPSTONE_METRICS_INTERVAL_S", "2"))
+HISTORY_SIZE = int(os.getenv("CAPSTONE_METRICS_HISTORY", "150"))
+SLOW_PROBE_EVERY = 5
+SUMMARY_FIELDS = ("cpu", "memory", "storage", "disk_read_bps", "disk_write_bps", "process_rss_mb", "gpu")
+
+
+def _psutil():
+    import psutil
+
+    return psutil
+
+
+def get_cpu_usage(interval=0.5):
+    return _psutil().cpu_percent(interval=interval)
 
 
 def get_memory_metrics():
-    mem = psutil.virtual_memory()
+    mem = _psutil().virtual_memory()
     return {
         "usage": mem.percent,
         "used_gb": round(mem.used / (1024**3), 2),
@@ -94,6 +127,16 @@ def get_gpu_metrics():
         return {"detected": False}
 
 
+def get_disk_io_counters():
+    try:
+        counters = _psutil().disk_io_counters()
+    except Exception:
+        return None
+    if counters is None:
+        return None
+    return counters.read_bytes, counters.write_bytes
+
+
 def get_system_metrics():
     cpu_temp, gpu_temp = get_hardware_temperatures()
     gpu_data = get_gpu_metrics()
@@ -110,3 +153,148 @@ def get_system_metrics():
         },
         "storage": get_storage_metrics()
     }
+
+
+class MetricsSampler:
+    """Background thread that fills a fixed-size ring buffer of samples."""
+
+    def __init__(self, interval_s=INTERVAL_S, history_size=HISTORY_SIZE):
+        self.interval_s = max(0.1, interval_s)
+        self._samples = deque(maxlen=max(1, history_size))
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = None
+        self._last_io = None
+        self._ticks = 0
+        self._slow = {"cpu_temp": None, "gpu_temp": None, "gpu": {"detected": False}}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        # The first non-blocking cpu_percent() call only sets the baseline.
+        _psutil().cpu_percent(interval=None)
+        self._last_io = (time.monotonic(), get_disk_io_counters())
+        self._thread = threading.Thread(target=self._run, name="capstone-metrics", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 5)
+            self._thread = None
+
+    def _run(self):
+        # First sample after a short warm-up so the dashboard fills quickly.
+        wait = min(self.interval_s, 0.5)
+        while not self._stop.wait(wait):
+            try:
+                self.sample()
+            except Exception:
+                logger.warning("System metrics sample failed", exc_info=True)
+            wait = self.interval_s
+
+    def sample(self):
+        """Take one sample now (non-blocking CPU reading) and store it."""
+        with self._sample_lock:
+            return self._sample()
+
+    def _sample(self):
+        if self._process is None:
+            self._process = _psutil().Process()
+        if self._ticks % SLOW_PROBE_EVERY == 0:
+            cpu_temp, gpu_temp = get_hardware_temperatures()
+            self._slow = {"cpu_temp": cpu_temp, "gpu_temp": gpu_temp, "gpu": get_gpu_metrics()}
+        self._ticks += 1
+
+        now = time.monotonic()
+        io = get_disk_io_counters()
+        read_bps = write_bps = None
+        if io is not None and self._last_io is not None and self._last_io[1] is not None:
+            elapsed = max(now - self._last_io[0], 1e-6)
+            read_bps = max(0, io[0] - self._last_io[1][0]) / elapsed
+            write_bps = max(0, io[1] - self._last_io[1][1]) / elapsed
+        self._last_io = (now, io)
+
+        memory = get_memory_metrics()
+        gpu = self._slow["gpu"]
+        entry = {
+            "ts": time.time(),
+            "cpu": _psutil().cpu_percent(interval=None),
+            "memory": memory["usage"],
+            "memory_used_gb": memory["used_gb"],
+            "memory_total_gb": memory["total_gb"],
+            "storage": get_storage_metrics()["usage"],
+            "disk_read_bps": None if read_bps is None else round(read_bps, 1),
+            "disk_write_bps": None if write_bps is None else round(write_bps, 1),
+            "process_rss_mb": round(self._process.memory_info().rss / (1024**2), 1),
+            "gpu": gpu.get("usage") if gpu.get("detected") else None,
+            "gpu_detected": bool(gpu.get("detected")),
+            "cpu_temp": self._slow["cpu_temp"],
+            "gpu_temp": self._slow["gpu_temp"] or gpu.get("temperature"),
+        }
+        with self._lock:
+            self._samples.append(entry)
+        return entry
+
+    def history(self, window_s=None):
+        with self._lock:
+            samples = list(self._samples)
+        if window_s is not None and samples:
+            cutoff = samples[-1]["ts"] - window_s
+            samples = [s for s in samples if s["ts"] >= cutoff]
+        return samples
+
+    def latest(self):
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+
+def summarize(samples, fields=SUMMARY_FIELDS):
+    """``{field: {"min", "avg", "max"}}`` over the non-null values of *samples*."""
+    summary = {}
+    for field in fields:
+        values = [s[field] for s in samples if s.get(field) is not None]
+        if values:
+            summary[field] = {
+                "min": min(values),
+                "avg": round(sum(values) / len(values), 2),
+                "max": max(values),
+            }
+        else:
+            summary[field] = None
+    return summary
+
+
+def metrics_response(latest, samples, interval_s):
+    """Dashboard payload: the latest reading in the original shape plus history."""
+    return {
+        "cpu": {"usage": latest["cpu"], "temperature": latest["cpu_temp"]},
+        "memory": {
+            "usage": latest["memory"],
+            "used_gb": latest["memory_used_gb"],
+            "total_gb": latest["memory_total_gb"],
+        },
+        "gpu": {
+            "detected": latest["gpu_detected"],
+            "usage": latest["gpu"],
+            "temperature": latest["gpu_temp"],
+        },
+        "storage": {"usage": latest["storage"]},
+        "disk_io": {"read_bps": latest["disk_read_bps"], "write_bps": latest["disk_write_bps"]},
+        "process": {"rss_mb": latest["process_rss_mb"]},
+        "sampled_at": datetime.fromtimestamp(latest["ts"], tz=timezone.utc).isoformat(),
+        "interval_s": interval_s,
+        "history": samples,
+        "summary": summarize(samples),
+    }
+
+
+SAMPLER = MetricsSampler()
@@ -0,0 +1,156 @@
+"""Resumable chunked upload endpoints (see ``capstone.upload_sessions``).
+
+Protocol::
+
+    POST   /projects/upload-sessions                 {filename, size, project_id?, sha256?}
+    PUT    /projects/upload-sessions/{id}            Content-Range: bytes <start>-<end>/<size>
+    GET    /projects/upload-sessions/{id}            -> {received_bytes, ...} to resume
+    POST   /projects/upload-sessions/{id}/finalize   -> same payload as POST /projects/upload
+    DELETE /projects/upload-sessions/{id}
+
+A chunk that would leave a gap is rejected with 409 and the offset to resume
+from; re-sent ranges that were already received are acknowledged and skipped.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from capstone import storage, upload_sessions
+from capstone.api.executor import offload, run_blocking
+from capstone.api.routes.projects import ingest_uploaded_zip
+from capstone.api.storage_context import StorageContext, get_db, get_storage_context
+
+router = APIRouter(prefix="/projects/upload-sessions", tags=["projects"])
+
+_CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1)
+    size: int = Field(..., gt=0)
+    project_id: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+def _public(session: dict) -> dict:
+    return {k: v for k, v in session.items() if k != "part_path"}
+
+
+def _offset_conflict(expected: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=409,
+        content={"detail": f"Chunk must start at byte {expected}", "received_bytes": expected},
+    )
+
+
+@router.post("")
+@offload
+def create_upload_session(payload: UploadSessionCreate, conn=Depends(get_db)):
+    if not payload.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Only .zip files are supported")
+    try:
+        session = upload_sessions.create_session(
+            conn,
+            filename=payload.filename,
+            total_size=payload.size,
+            project_id=payload.project_id,
+            expected_sha256=payload.sha256,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {**_public(session), "max_chunk_bytes": upload_sessions.MAX_CHUNK_BYTES}
+
+
+@router.get("/{session_id}")
+@offload
+def get_upload_session(session_id: str, conn=Depends(get_db)):
+    session = upload_sessions.get_session(conn, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return _public(session)
+
+
+@router.put("/{session_id}")
+async def put_upload_chunk(
+    session_id: str,
+    request: Request,
+    ctx: StorageContext = Depends(get_storage_context),
+):
+    header = request.headers.get("content-range", "")
+    match = _CONTENT_RANGE_RE.match(header.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range: bytes <start>-<end>/<size> is required")
+    start, end, total = (int(v) for v in match.groups())
+    if end < start:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range")
+    if end - start + 1 > upload_sessions.MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+
+    body = await request.body()
+    if len(body) != end - start + 1:
+        raise HTTPException(status_code=400, detail="Body length does not match Content-Range")
+
+    def _write() -> dict:
+        conn = ctx.open_db()
+        try:
+            session = upload_sessions.get_session(conn, session_id)
+            if session is None:
+                raise LookupError(session_id)
+            if session["total_size"] != total:
+                raise ValueError("Content-Range total does not match the session size")
+            return upload_sessions.append_chunk(conn, session_id, start, body)
+        finally:
+            storage.close_db(conn)
+
+    try:
+        session = await run_blocking(_write)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.OffsetMismatch as exc:
+        return _offset_conflict(exc.expected)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _public(session)
+
+
+@router.post("/{session_id}/finalize")
+@offload
+def finalize_upload_session(
+    session_id: str,
+    ctx: StorageContext = Depends(get_storage_context),
+    conn=Depends(get_db),
+):
+    try:
+        part_path, digest, size, session = upload_sessions.complete_session(conn, session_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.OffsetMismatch as exc:
+        return _offset_conflict(exc.expected)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    try:
+        # The part file is moved into the content-addressed store (or removed).
+        return ingest_uploaded_zip(
+            part_path,
+            session["filename"],
+            session["project_id"] or "",
+            ctx=ctx,
+            precomputed=(digest, size),
+        )
+    finally:
+        upload_sessions.delete_session(conn, session_id)
+
+
+@router.delete("/{session_id}")
+@offload
+def abort_upload_session(session_id: str, conn=Depends(get_db)):
+    if not upload_sessions.delete_session(conn, session_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return {"deleted": True, "session_id": session_id}
@@ -1,15 +1,29 @@
+import logging
 import os
 import traceback
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from capstone.api.routes.consent import router as consent_router
 from capstone.api.routes.projects import router as projects_router
+from capstone.api.routes.upload_sessions import router as upload_sessions_router
 from capstone.api.routes.skills import router as skills_router
 from capstone.api.routes.legacy_aliases import router as legacy_aliases_router
 from fastapi.middleware.cors import CORSMiddleware
-from capstone.api.routes.system_metrics import get_system_metrics
+from capstone.api.middleware.cancellation import CancellationMiddleware
+from capstone.api.middleware.compression import CompressionMiddleware
+from capstone.api.middleware.metrics import MetricsMiddleware
+from capstone.api.middleware.profiling import ProfilingMiddleware
+from capstone.api.middleware.rate_limit import RateLimitMiddleware
+from capstone.api.middleware.request_id import RequestIdMiddleware
+from capstone.api.storage_context import resolve_storage_context_async
+from capstone.cancellation import OperationCancelled
+from capstone.logging_utils import get_logger
+from capstone import telemetry
+from capstone.api.routes.system_metrics import SAMPLER as metrics_sampler, metrics_response
+from capstone.api.executor import run_blocking, shutdown_executor, start_loop_lag_monitor
 from capstone.system.monitor_manager import start_monitor, stop_monitor
 from capstone.api.routes.activity_log import router as activity_router
 from capstone.api.routes.recent_projects import router as dashboard_router
@@ -20,6 +34,9 @@ from capstone.api.routes.sienna import router as sienna_router
 from capstone.api.routes.auth import router as auth_router, configure as configure_auth
 from capstone.api.routes.cloud import router as cloud_router
 from capstone.api.routes.project_viewer import router as project_viewer_router
+from capstone.api.routes.profiling import router as profiling_router
+
+logger = get_logger(__name__)
 
 def _safe_import_job_match():
     """Attempt to import job_match router (optional)."""
@@ -56,23 +73,32 @@ def _safe_import_resumes():
     except Exception:
         return None, None, traceback.format_exc()
 
-
 def create_app(db_dir: str | None = None, auth_token: str | None = None) -> FastAPI:
     @asynccontextmanager
     async def lifespan(app):
         # Startup
         start_monitor()
+        lag_monitor = start_loop_lag_monitor()
+        metrics_sampler.start()
         print("Application startup complete.")
 
         yield
 
         # Shutdown
+        if lag_monitor is not None:
+            await lag_monitor.stop()
         stop_monitor()
+        metrics_sampler.stop()
+        shutdown_executor(wait=False)
         print("Application shutdown complete.")
     app = FastAPI(title="Capstone API", lifespan=lifespan)
     app.state.auth_token = auth_token
     app.state.db_dir = db_dir
 
+    # Weak ETag / 304 and gzip/brotli for JSON bodies (inside CORS).
+    app.add_middleware(CompressionMiddleware)
+    # 429 for expensive endpoints over their limits (inside CORS so browsers see it).
+    app.add_middleware(RateLimitMiddleware)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],  # for development
@@ -83,26 +109,43 @@ def create_app(db_dir: str | None = None, auth_token: str | None = None) -> Fast
 
     @app.middleware("http")
     async def storage_current_user_middleware(request: Request, call_next):
-        """Bind SQLite scope to the Bearer session on every request (guest = None)."""
+        """Resolve the request's StorageContext once and bind its user (guest = None)."""
         import capstone.storage as storage_module
-        from capstone.api.routes.auth import get_authenticated_storage_user_key
-
-        storage_user_key = get_authenticated_storage_user_key(request)
-        token = storage_module.bind_request_user(storage_user_key)
-        mode = "user" if storage_user_key else "guest"
-        print(
-            "[storage-bind] "
-            f"path={request.url.path!r} "
-            f"mode={mode!r} "
-            f"user_id={storage_user_key!r} "
-            f"db_path={str(storage_module.get_database_path())!r}",
-            flush=True,
-        )
+
+        ctx = await resolve_storage_context_async(request)
+        token = storage_module.bind_request_user(ctx.user)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "storage-bind path=%r mode=%s user_id=%r db_path=%s",
+                request.url.path,
+                "guest" if ctx.is_guest else "user",
+                ctx.user,
+                ctx.db_path,
+            )
         try:
             return await call_next(request)
         finally:
             storage_module.reset_request_user(token)
 
+    # Cancels the request's work when the client disconnects or the deadline passes.
+    app.add_middleware(CancellationMiddleware)
+
+    @app.exception_handler(OperationCancelled)
+    async def operation_cancelled_handler(request: Request, exc: OperationCancelled):
+        telemetry.CANCELLED.inc(reason=exc.reason)
+        logger.info("Request %s %s cancelled (%s)", request.method, request.url.path, exc.reason)
+        if exc.reason == "deadline":
+            return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+        # 499: nginx's "client closed request"; nobody is left to read it.
+        return JSONResponse({"detail": "Request cancelled"}, status_code=499)
+
+    # No-op unless CAPSTONE_PROFILE_TOKEN is set.
+    app.add_middleware(ProfilingMiddleware)
+    # Binds the request id used in every log line written for this request.
+    app.add_middleware(RequestIdMiddleware)
+    # Outermost, so the latency covers every other middleware.
+    app.add_middleware(MetricsMiddleware)
+
     @app.get("/")
     def root():
         return {"message": "Capstone API is running"}
@@ -115,11 +158,22 @@ def create_app(db_dir: str | None = None, auth_token: str | None = None) -> Fast
     def api_health():
         return {"status": "ok"}
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(telemetry.render(), media_type=telemetry.CONTENT_TYPE)
+
     @app.get("/system/system-metrics")
-    def system_metrics():
-        return get_system_metrics()
+    async def system_metrics(window_s: float | None = Query(None, gt=0)):
+        # Served from the background sampler's ring buffer; only the very first
+        # request after startup takes a (non-blocking) sample itself.
+        metrics_sampler.start()
+        latest = metrics_sampler.latest()
+        if latest is None:
+            latest = await run_blocking(metrics_sampler.sample)
+        return metrics_response(latest, metrics_sampler.history(window_s), metrics_sampler.interval_s)
     # Always-available routers
     app.include_router(consent_router)
+    app.include_router(upload_sessions_router)
     app.include_router(projects_router)
     app.include_router(skills_router)
     app.include_router(dashboard_router)
@@ -131,6 +185,7 @@ def create_app(db_dir: str | None = None, auth_token: str | None = None) -> Fast
     app.add_api_route("/api/github/token", put_github_token, methods=["PUT"], tags=["github"])
     app.include_router(cloud_router)
     app.include_router(project_viewer_router)
+    app.include_router(profiling_router)
     configure_auth(db_dir)
     app.include_router(auth_router)
     # Optional job-match routes (since routes/job_match.py may not exist in this branch)
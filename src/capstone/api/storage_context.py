@@ -0,0 +1,88 @@
+"""Request-scoped storage: which user's database and files a request uses.
+
+The server middleware resolves the Bearer session once per request into a
+:class:`StorageContext`, keeps it on ``request.state`` and binds its user for
+``storage.get_current_user()`` (code reached through helpers that do not take
+a context yet).  Routes ask for it explicitly instead of re-reading the
+session::
+
+    @router.get("/things")
+    def list_things(ctx: StorageContext = Depends(get_storage_context)):
+        conn = ctx.open_db()
+        ...
+
+or take a connection that is closed after the response::
+
+    def list_things(conn=Depends(get_db)):
+        ...
+
+The context is an immutable value, so it can be handed to worker threads and
+to ``ZipAnalyzer.analyze(user=ctx.user)`` without consulting process state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from fastapi import Depends, Request
+
+from capstone import storage
+
+_STATE_KEY = "storage_context"
+
+
+@dataclass(frozen=True)
+class StorageContext:
+    username: str | None
+    user: str | None  # storage user key; ``None`` is the guest database
+    db_path: Path
+
+    @property
+    def is_guest(self) -> bool:
+        return self.user is None
+
+    def open_db(self) -> sqlite3.Connection:
+        return storage.open_db(user=self.user)
+
+
+def resolve_storage_context(request: Request) -> StorageContext:
+    """The request's context, resolved from the session on first use."""
+    ctx = getattr(request.state, _STATE_KEY, None)
+    if ctx is None:
+        from capstone.api.routes.auth import get_authenticated_username
+
+        username = get_authenticated_username(request)
+        user = storage.resolve_storage_user_key(username)
+        ctx = StorageContext(username=username, user=user, db_path=storage.get_database_path(user=user))
+        setattr(request.state, _STATE_KEY, ctx)
+    return ctx
+
+
+async def resolve_storage_context_async(request: Request) -> StorageContext:
+    """:func:`resolve_storage_context` for async code.
+
+    The session lookup may wait on the session database, so a first
+    resolution runs in a worker thread instead of on the event loop.
+    """
+    ctx = getattr(request.state, _STATE_KEY, None)
+    if ctx is not None:
+        return ctx
+    return await asyncio.to_thread(resolve_storage_context, request)
+
+
+async def get_storage_context(request: Request) -> StorageContext:
+    """FastAPI dependency returning the request's :class:`StorageContext`."""
+    return await resolve_storage_context_async(request)
+
+
+def get_db(ctx: StorageContext = Depends(get_storage_context)) -> Iterator[sqlite3.Connection]:
+    """FastAPI dependency yielding a connection to the request user's database."""
+    conn = ctx.open_db()
+    try:
+        yield conn
+    finally:
+        storage.close_db(conn)
@@ -0,0 +1,320 @@
+"""Process-wide pool of open zip archives with a cache of hot decompressed members.
+
+Project viewer clicks, Sienna snippet lookups, code bundling and portfolio
+summaries all read from the same stored blobs.  Opening a fresh ``ZipFile``
+per request re-parses the central directory and re-inflates every member, so
+this module keeps a bounded LRU of open archives keyed by blob and a
+byte-bounded LRU of recently read member bytes.
+
+Usage::
+
+    with open_stored_archive(conn, file_id) as zf:
+        for info in zf.infolist():
+            data = zf.read(info)
+
+Handles are leased, never closed by callers.  An archive evicted while leased
+is closed once its last lease is released.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Hashable, Iterator
+from zipfile import ZipFile, ZipInfo
+
+from . import file_store, telemetry
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_HANDLES = int(os.getenv("CAPSTONE_ZIP_POOL_HANDLES", "16"))
+DEFAULT_MEMBER_CACHE_BYTES = int(os.getenv("CAPSTONE_ZIP_MEMBER_CACHE_MB", "64")) * 1024 * 1024
+# Members larger than this are read straight through without caching.
+DEFAULT_MAX_MEMBER_BYTES = 4 * 1024 * 1024
+
+
+class _MemberCache:
+    """Byte-bounded LRU of decompressed member bytes."""
+
+    def __init__(self, max_bytes: int, max_item_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._items: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> bytes | None:
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Hashable, data: bytes) -> None:
+        if len(data) > self.max_item_bytes or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def discard_archive(self, archive_key: str) -> None:
+        with self._lock:
+            for key in [k for k in self._items if k[0] == archive_key]:
+                self._bytes -= len(self._items.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class PooledArchive:
+    """Read-only view over a pooled ``ZipFile``; safe to share across threads."""
+
+    def __init__(
+        self,
+        pool: "ArchivePool",
+        key: str,
+        token: Hashable,
+        zf: ZipFile,
+        fh: BinaryIO | None,
+    ) -> None:
+        self._pool = pool
+        self.key = key
+        self.token = token
+        self._zf = zf
+        self._fh = fh
+        self._read_lock = threading.Lock()
+        self.leases = 0
+        self.evicted = False
+
+    def infolist(self) -> list[ZipInfo]:
+        return self._zf.infolist()
+
+    def namelist(self) -> list[str]:
+        return self._zf.namelist()
+
+    def getinfo(self, name: str) -> ZipInfo:
+        return self._zf.getinfo(name)
+
+    def read(self, member: str | ZipInfo) -> bytes:
+        info = member if isinstance(member, ZipInfo) else self._zf.getinfo(member)
+        cache_key = (self.key, self.token, info.filename, info.CRC)
+        cached = self._pool.members.get(cache_key)
+        if cached is not None:
+            return cached
+        with self._read_lock:
+            data = self._zf.read(info)
+        self._pool.members.put(cache_key, data)
+        return data
+
+    def _close(self) -> None:
+        try:
+            self._zf.close()
+        finally:
+            if self._fh is not None:
+                self._fh.close()
+
+
+class ArchivePool:
+    """LRU of open archives keyed by blob, with leased access."""
+
+    def __init__(
+        self,
+        max_handles: int = DEFAULT_MAX_HANDLES,
+        member_cache_bytes: int = DEFAULT_MEMBER_CACHE_BYTES,
+        max_member_bytes: int = DEFAULT_MAX_MEMBER_BYTES,
+    ) -> None:
+        self.max_handles = max(1, max_handles)
+        self.members = _MemberCache(member_cache_bytes, max_member_bytes)
+        self._entries: OrderedDict[str, PooledArchive] = OrderedDict()
+        self._lock = threading.Lock()
+        self.opens = 0
+        self.reuses = 0
+
+    @contextmanager
+    def lease(
+        self,
+        key: str,
+        token: Hashable,
+        opener: Callable[[], BinaryIO],
+    ) -> Iterator[PooledArchive]:
+        """Yield the open archive for *key*, opening it with *opener* on a miss.
+
+        *token* identifies the blob version (path, mtime, size); a mismatch
+        replaces the pooled handle so in-place rewrites are never served stale.
+        """
+        entry = self._acquire(key, token, opener)
+        try:
+            yield entry
+        finally:
+            self._release(entry)
+
+    def _acquire(self, key: str, token: Hashable, opener: Callable[[], BinaryIO]) -> PooledArchive:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.token == token:
+                self._entries.move_to_end(key)
+                entry.leases += 1
+                self.reuses += 1
+                return entry
+
+        # Parse the central directory outside the pool lock.
+        fh = opener()
+        try:
+            zf = ZipFile(fh)
+        except Exception:
+            fh.close()
+            raise
+        fresh = PooledArchive(self, key, token, zf, fh)
+        fresh.leases = 1
+
+        with self._lock:
+            self.opens += 1
+            current = self._entries.get(key)
+            if current is not None and current.token == token:
+                # Another thread opened the same archive first; use theirs.
+                current.leases += 1
+                self._entries.move_to_end(key)
+                fresh._close()
+                return current
+            if current is not None:
+                self._retire(current)
+            self._entries[key] = fresh
+            while len(self._entries) > self.max_handles:
+                _, oldest = self._entries.popitem(last=False)
+                self._retire(oldest)
+        return fresh
+
+    def _release(self, entry: PooledArchive) -> None:
+        with self._lock:
+            entry.leases -= 1
+            if entry.evicted and entry.leases <= 0:
+                entry._close()
+
+    def _retire(self, entry: PooledArchive) -> None:
+        """Detach *entry* from the pool; close now or when its last lease ends. Caller holds the lock."""
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        entry.evicted = True
+        self.members.discard_archive(entry.key)
+        if entry.leases <= 0:
+            entry._close()
+
+    def invalidate(self, key: str) -> None:
+        """Drop the pooled handle for *key* (e.g. before the blob is replaced or deleted)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._retire(entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._retire(entry)
+        self.members.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            open_handles = len(self._entries)
+        return {
+            "open_handles": open_handles,
+            "max_handles": self.max_handles,
+            "opens": self.opens,
+            "reuses": self.reuses,
+            "member_cache_items": len(self.members),
+            "member_cache_bytes": self.members.size_bytes,
+            "member_cache_hits": self.members.hits,
+            "member_cache_misses": self.members.misses,
+        }
+
+
+DEFAULT_POOL = ArchivePool()
+
+
+def _ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def _cache_hit_ratios():
+    stats = DEFAULT_POOL.stats()
+    yield {"cache": "archive_handles"}, _ratio(stats["reuses"], stats["opens"])
+    yield {"cache": "archive_members"}, _ratio(stats["member_cache_hits"], stats["member_cache_misses"])
+
+
+telemetry.REGISTRY.gauge(
+    "capstone_cache_hit_ratio",
+    "Hit ratio of the shared archive handle pool and member byte cache.",
+    _cache_hit_ratios,
+    ("cache",),
+)
+
+
+def _stored_key(file_id: str) -> str:
+    return f"file:{file_id}"
+
+
+def _path_key(path: Path) -> str:
+    return f"path:{path}"
+
+
+def _path_token(path: Path) -> tuple:
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def open_stored_archive(
+    conn: sqlite3.Connection,
+    file_id: str,
+    *,
+    pool: ArchivePool | None = None,
+):
+    """Lease the archive stored under *file_id* in the content-addressed store."""
+    pool = pool or DEFAULT_POOL
+    row = conn.execute("SELECT path FROM files WHERE file_id = ?", (file_id,)).fetchone()
+    if not row:
+        raise FileNotFoundError(f"file_id not found: {file_id}")
+    path = Path(row[0])
+    # Packed archives are rebuilt by open_file; their content never changes for a file_id.
+    token = _path_token(path) if path.exists() else ("packed", file_id)
+    return pool.lease(_stored_key(file_id), token, lambda: file_store.open_file(conn, file_id))
+
+
+def open_path_archive(path: Path | str, *, pool: ArchivePool | None = None):
+    """Lease the archive at a filesystem path (snapshot ``zip_path`` values)."""
+    pool = pool or DEFAULT_POOL
+    resolved = Path(path).resolve()
+    token = _path_token(resolved)
+    return pool.lease(_path_key(resolved), token, lambda: open(resolved, "rb"))
+
+
+def invalidate_file(file_id: str | None = None, path: Path | str | None = None) -> None:
+    """Close pooled handles for a blob about to be rewritten or deleted."""
+    if file_id:
+        DEFAULT_POOL.invalidate(_stored_key(file_id))
+    if path:
+        DEFAULT_POOL.invalidate(_path_key(Path(path).resolve()))
@@ -0,0 +1,258 @@
+"""Cooperative cancellation and deadlines for long-running work.
+
+A :class:`CancelToken` is created per API request by
+``api.middleware.cancellation`` and bound to a context variable, so it
+follows the request into executor threads.  Long loops (archive members,
+git log lines, GitHub pagination) call :func:`check` every so often and
+stop with :class:`OperationCancelled` once the client has gone away or the
+token's deadline has passed; :func:`run_subprocess` and
+:func:`stream_subprocess_lines` kill a child process for the same reasons.
+Code running outside a request has no token and is never cancelled.
+
+Work that is cancelled must leave nothing behind: callers check before they
+start persisting, and remove what they already stored when they catch
+:class:`OperationCancelled`.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import io
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+# How often run_subprocess looks at the token while the child runs.
+POLL_INTERVAL_S = 0.1
+# stream_subprocess_lines keeps at most this much of the child's stderr (the tail).
+STDERR_LIMIT_BYTES = 64 * 1024
+# Longer stdout lines are cut to this many characters.
+MAX_LINE_CHARS = 1024 * 1024
+
+
+class OperationCancelled(RuntimeError):
+    """Raised when a :class:`CancelToken` is cancelled or its deadline passes.
+
+    ``reason`` is ``"disconnected"`` (the client went away), ``"deadline"``
+    or whatever was passed to :meth:`CancelToken.cancel`.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Operation cancelled ({reason})")
+        self.reason = reason
+
+
+class CancelToken:
+    """A cancellation flag with an optional deadline (``deadline_s`` from now)."""
+
+    def __init__(self, deadline_s: float | None = None) -> None:
+        self._deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        self._event = threading.Event()
+        self._reason: str | None = None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self.cancel("deadline")
+            return True
+        return False
+
+    @property
+    def reason(self) -> str | None:
+        return self._reason if self.cancelled else None
+
+    def remaining(self) -> float | None:
+        """Seconds until the deadline (``None`` without one)."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise OperationCancelled(self._reason or "cancelled")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Sleep up to *timeout* seconds (capped at the deadline); True if cancelled."""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
+
+
+_CURRENT: contextvars.ContextVar[CancelToken | None] = contextvars.ContextVar(
+    "capstone_cancel_token", default=None
+)
+
+
+def current_token() -> CancelToken | None:
+    """The token bound to the current request, if any."""
+    return _CURRENT.get()
+
+
+@contextmanager
+def use_token(token: CancelToken | None) -> Iterator[CancelToken | None]:
+    """Bind *token* as the current token for the duration of the block."""
+    reset = _CURRENT.set(token)
+    try:
+        yield token
+    finally:
+        _CURRENT.reset(reset)
+
+
+def check(token: CancelToken | None = None) -> None:
+    """Raise :class:`OperationCancelled` if *token* (default: current) is cancelled."""
+    token = token if token is not None else _CURRENT.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def sleep(seconds: float, token: CancelToken | None = None) -> None:
+    """``time.sleep`` that wakes up to raise once *token* (default: current) is cancelled."""
+    token = token if token is not None else _CURRENT.get()
+    if token is None:
+        time.sleep(seconds)
+    elif token.wait(seconds):
+        token.raise_if_cancelled()
+
+
+def run_subprocess(
+    args: Sequence[str],
+    *,
+    token: CancelToken | None = None,
+    timeout: float | None = None,
+    check: bool = False,
+    **popen_kwargs,
+) -> subprocess.CompletedProcess:
+    """``subprocess.run(args, capture_output=True, ...)`` that honours a token.
+
+    The child is killed (and reaped) when *token* (default: current) is
+    cancelled, raising :class:`OperationCancelled`, or when *timeout*
+    expires, raising :class:`subprocess.TimeoutExpired`.
+    """
+    token = token if token is not None else _CURRENT.get()
+    popen_kwargs.setdefault("stdout", subprocess.PIPE)
+    popen_kwargs.setdefault("stderr", subprocess.PIPE)
+    started = time.monotonic()
+    with subprocess.Popen(args, **popen_kwargs) as proc:
+        while True:
+            wait_s = POLL_INTERVAL_S if token is not None else None
+            if timeout is not None:
+                left = timeout - (time.monotonic() - started)
+                if left <= 0:
+                    _kill(proc)
+                    raise subprocess.TimeoutExpired(args, timeout)
+                wait_s = left if wait_s is None else min(wait_s, left)
+            try:
+                stdout, stderr = proc.communicate(timeout=wait_s)
+                break
+            except subprocess.TimeoutExpired:
+                if token is not None and token.cancelled:
+                    _kill(proc)
+                    token.raise_if_cancelled()
+    if check and proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+
+def stream_subprocess_lines(
+    args: Sequence[str],
+    *,
+    token: CancelToken | None = None,
+    timeout: float | None = None,
+    check: bool = False,
+    encoding: str = "utf-8",
+    errors: str = "replace",
+    **popen_kwargs,
+) -> Iterator[str]:
+    """Yield the child's stdout line by line while it runs.
+
+    Only a pipe's worth of output is buffered, so the child blocks until the
+    consumer catches up.  Lines longer than ``MAX_LINE_CHARS`` are cut short
+    and only the last ``STDERR_LIMIT_BYTES`` of stderr are kept.  The child
+    is killed when *token* (default: current) is cancelled, raising
+    :class:`OperationCancelled`, when *timeout* expires, raising
+    :class:`subprocess.TimeoutExpired`, or when the consumer stops early.
+    With *check*, a non-zero exit raises :class:`subprocess.CalledProcessError`.
+    """
+    token = token if token is not None else _CURRENT.get()
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+    stdout = io.TextIOWrapper(proc.stdout, encoding=encoding, errors=errors)
+    stderr = bytearray()
+    done = threading.Event()
+    killed_for: list[str] = []
+
+    def drain_stderr() -> None:
+        for chunk in iter(lambda: proc.stderr.read1(8192), b""):
+            stderr.extend(chunk)
+            del stderr[:-STDERR_LIMIT_BYTES]
+
+    def watch() -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(POLL_INTERVAL_S):
+            if deadline is not None and time.monotonic() >= deadline:
+                killed_for.append("timeout")
+            elif token is not None and token.cancelled:
+                killed_for.append("cancelled")
+            else:
+                continue
+            proc.kill()
+            return
+
+    threads = [threading.Thread(target=drain_stderr, daemon=True), threading.Thread(target=watch, daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            line = stdout.readline(MAX_LINE_CHARS)
+            if not line:
+                break
+            if len(line) == MAX_LINE_CHARS and not line.endswith("\n"):
+                while True:
+                    rest = stdout.readline(MAX_LINE_CHARS)
+                    if not rest or rest.endswith("\n"):
+                        break
+            yield line
+        returncode = proc.wait()
+    finally:
+        done.set()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for thread in threads:
+            thread.join()
+        stdout.close()
+        proc.stderr.close()
+    err = stderr.decode(encoding, errors)
+    if killed_for == ["timeout"]:
+        raise subprocess.TimeoutExpired(args, timeout, stderr=err)
+    if killed_for:
+        token.raise_if_cancelled()
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, args, stderr=err)
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    proc.kill()
+    proc.communicate()
+
+
+__all__ = [
+    "CancelToken",
+    "OperationCancelled",
+    "check",
+    "current_token",
+    "run_subprocess",
+    "sleep",
+    "stream_subprocess_lines",
+    "use_token",
+]
@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional
-from zipfile import ZipFile
+
+from .archive_pool import open_path_archive
 
 TEXT_EXTS = {
     ".py", ".js", ".ts", ".tsx", ".jsx", ".java", ".kt", ".cs", ".c", ".cpp", ".h",
@@ -48,7 +49,7 @@ def bundle_code_from_zip(
     results: list[BundledFile] = []
     total = 0
 
-    with ZipFile(zip_path) as z:
+    with open_path_archive(zip_path) as z:
         for info in z.infolist():
             if info.is_dir():
                 continue
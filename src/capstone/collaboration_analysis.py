@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import csv
+import functools
 import io
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Sequence
+from typing import Dict, Hashable, Iterable, List, Sequence
 
 from .collaboration import _normalize_email
 
@@ -277,6 +279,143 @@ def build_collaboration_analysis(
     return summary
 
 
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    """The ``numpy`` module, or ``None`` if it is not installed.
+
+    Imported on first use so the API does not pay for it at start-up.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class CommitColumns:
+    """Commits as parallel columns: author index, epoch seconds, lines added and deleted.
+
+    Authors are interned once; ``authors[i]`` is the key of index ``i``.
+    """
+
+    def __init__(self) -> None:
+        self.authors: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+        self.author_idx = array("q")
+        self.timestamps = array("q")
+        self.added = array("q")
+        self.deleted = array("q")
+
+    def __len__(self) -> int:
+        return len(self.author_idx)
+
+    def append(self, author: Hashable, timestamp: int, added: int, deleted: int) -> None:
+        idx = self._index.get(author)
+        if idx is None:
+            idx = self._index[author] = len(self.authors)
+            self.authors.append(author)
+        self.author_idx.append(idx)
+        self.timestamps.append(timestamp)
+        self.added.append(added)
+        self.deleted.append(deleted)
+
+
+@dataclass
+class AuthorTotals:
+    commits: int = 0
+    added: int = 0
+    deleted: int = 0
+    # Over commits with a positive timestamp; 0 when there are none.
+    first_ts: int = 0
+    last_ts: int = 0
+    # UTC day number (epoch seconds // 86400) -> commits that day.
+    day_counts: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def active_days(self) -> int:
+        return len(self.day_counts)
+
+
+def aggregate_commit_columns(columns: CommitColumns, *, use_numpy: bool | None = None) -> List[AuthorTotals]:
+    """Per-author totals of *columns*, in ``columns.authors`` order.
+
+    Uses NumPy grouped reductions when it is installed (``use_numpy`` forces
+    either path); both paths return the same totals.
+    """
+    np = load_numpy() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise RuntimeError("numpy is not installed")
+    if np is not None and len(columns):
+        return _aggregate_numpy(np, columns)
+    return _aggregate_python(columns)
+
+
+def _aggregate_python(columns: CommitColumns) -> List[AuthorTotals]:
+    totals = [AuthorTotals() for _ in columns.authors]
+    for idx, ts, added, deleted in zip(columns.author_idx, columns.timestamps, columns.added, columns.deleted):
+        total = totals[idx]
+        total.commits += 1
+        total.added += added
+        total.deleted += deleted
+        if ts > 0:
+            total.first_ts = ts if not total.first_ts else min(total.first_ts, ts)
+            total.last_ts = max(total.last_ts, ts)
+            day = ts // 86400
+            total.day_counts[day] = total.day_counts.get(day, 0) + 1
+    return totals
+
+
+def _aggregate_numpy(np, columns: CommitColumns) -> List[AuthorTotals]:
+    n = len(columns.authors)
+    idx = np.frombuffer(columns.author_idx, dtype=np.int64)
+    ts = np.frombuffer(columns.timestamps, dtype=np.int64)
+    commits = np.bincount(idx, minlength=n)
+    added = _grouped_sum(np, idx, np.frombuffer(columns.added, dtype=np.int64), n)
+    deleted = _grouped_sum(np, idx, np.frombuffer(columns.deleted, dtype=np.int64), n)
+    first = np.zeros(n, dtype=np.int64)
+    last = np.zeros(n, dtype=np.int64)
+
+    valid = ts > 0
+    idx_v, ts_v = idx[valid], ts[valid]
+    day_pairs: tuple = ((), (), ())
+    if len(idx_v):
+        order = np.lexsort((ts_v, idx_v))
+        idx_v, ts_v = idx_v[order], ts_v[order]
+        groups, starts = np.unique(idx_v, return_index=True)
+        ends = np.append(starts[1:], len(idx_v)) - 1
+        first[groups] = ts_v[starts]
+        last[groups] = ts_v[ends]
+        days = ts_v // 86400
+        day0 = int(days.min())
+        span = int(days.max()) - day0 + 1
+        keys, counts = np.unique(idx_v * span + (days - day0), return_counts=True)
+        day_pairs = ((keys // span).tolist(), (keys % span + day0).tolist(), counts.tolist())
+
+    totals = [
+        AuthorTotals(commits=c, added=a, deleted=d, first_ts=f, last_ts=l)
+        for c, a, d, f, l in zip(commits.tolist(), added.tolist(), deleted.tolist(), first.tolist(), last.tolist())
+    ]
+    for author, day, count in zip(*day_pairs):
+        totals[author].day_counts[day] = count
+    return totals
+
+
+def _grouped_sum(np, idx, values, n: int):
+    # Exact int64 sums (bincount's weights would go through float64).
+    out = np.zeros(n, dtype=np.int64)
+    np.add.at(out, idx, values)
+    return out
+
+
+def weekly_histogram(day_counts: Dict[int, int]) -> Dict[int, int]:
+    """Sum per-day commit counts into weeks starting on Monday, keyed by the Monday's day number."""
+    weeks: Dict[int, int] = {}
+    for day, count in day_counts.items():
+        monday = day - (day + 3) % 7  # day 0 (1970-01-01) was a Thursday
+        weeks[monday] = weeks.get(monday, 0) + count
+    return dict(sorted(weeks.items()))
+
+
 def format_analysis_as_csv(
     analysis: ContributionSummary,
     *,
@@ -1,10 +1,19 @@
-"""Configuration management with simple encryption."""
+"""Configuration management with simple encryption.
+
+:func:`load_config` is called on most analysis and LLM code paths, so the
+decoded file is cached per path and revalidated with a single ``stat``
+(mtime, size, inode); :func:`save_config` writes through.  Callers get a
+private copy they may mutate.
+"""
 
 from __future__ import annotations
 
 import base64
+import copy
 import hashlib
 import json
+import os
+import threading
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
@@ -15,6 +24,14 @@ CONFIG_DIR = Path("config")
 CONFIG_PATH = CONFIG_DIR / "user_config.json"
 CONFIG_SECRET = "capstone-local-secret"
 
+_SAVE_LOCK = threading.Lock()
+# Serializes read-modify-write updates (e.g. concurrent batch analyses).
+_UPDATE_LOCK = threading.RLock()
+
+# path -> ((st_mtime_ns, st_size, st_ino), Config)
+_CACHE: Dict[str, tuple[tuple[int, int, int], "Config"]] = {}
+_CACHE_LOCK = threading.Lock()
+
 
 def _ensure_config_dir() -> None:
     CONFIG_DIR.mkdir(exist_ok=True)
@@ -125,14 +142,48 @@ def validate_config_shape(payload: Dict[str, Any]) -> None:
             raise ValueError("Consent payload missing required fields")
 
 
+def _file_signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _cache_store(path: Path, signature: tuple[int, int, int] | None, config: Config) -> None:
+    with _CACHE_LOCK:
+        if signature is None:
+            _CACHE.pop(str(path), None)
+        else:
+            _CACHE[str(path)] = (signature, copy.deepcopy(config))
+
+
+def clear_config_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
 def load_config() -> Config:
+    signature = _file_signature(CONFIG_PATH)
+    if signature is not None:
+        with _CACHE_LOCK:
+            cached = _CACHE.get(str(CONFIG_PATH))
+        if cached is not None and cached[0] == signature:
+            return copy.deepcopy(cached[1])
+
     _ensure_config_dir()
     if not CONFIG_PATH.exists():
         default = _fresh_default_config()
         save_config(default)
         return default
 
-    with CONFIG_PATH.open("r", encoding="utf-8") as fh:
+    config = _read_config(CONFIG_PATH)
+    _cache_store(CONFIG_PATH, signature, config)
+    return config
+
+
+def _read_config(path: Path) -> Config:
+    with path.open("r", encoding="utf-8") as fh:
         stored = json.load(fh)
 
     if isinstance(stored, dict):
@@ -174,8 +225,13 @@ def save_config(config: Config) -> None:
         "preferences": _encrypt(config.preferences.__dict__),
         "saved_at": datetime.now(timezone.utc).isoformat(),
     }
-    with CONFIG_PATH.open("w", encoding="utf-8") as fh:
-        json.dump(payload, fh, indent=2)
+    # Write-then-rename so concurrent readers never see a half-written file.
+    tmp_path = CONFIG_PATH.with_suffix(CONFIG_PATH.suffix + ".tmp")
+    with _SAVE_LOCK:
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2)
+        os.replace(tmp_path, CONFIG_PATH)
+        _cache_store(CONFIG_PATH, _file_signature(CONFIG_PATH), config)
 
 
 def reset_config() -> Config:
@@ -199,9 +255,10 @@ def update_consent(granted: bool, decision: str, source: str = "cli") -> Config:
 
 
 def update_preferences(**kwargs: Any) -> Config:
-    config = load_config()
-    for key, value in kwargs.items():
-        if hasattr(config.preferences, key):
-            setattr(config.preferences, key, value)
-    save_config(config)
+    with _UPDATE_LOCK:
+        config = load_config()
+        for key, value in kwargs.items():
+            if hasattr(config.preferences, key):
+                setattr(config.preferences, key, value)
+        save_config(config)
     return config
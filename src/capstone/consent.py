@@ -10,7 +10,9 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
-from capstone.storage import open_db, close_db
+import threading
+
+from capstone.storage import open_db, close_db, get_database_path
 from .config import Config, ConsentState as ConfigConsentState, update_consent, load_config
 
 
@@ -30,6 +32,58 @@ class ConsentState:
     source: str = "cli"
 
 
+# -------------------------------------------------------
+# CONSENT CACHE
+# -------------------------------------------------------
+# Consent is checked on nearly every analysis and LLM path.  Answers are
+# cached per database file and revalidated with one ``stat`` (mtime, size,
+# inode), so a write from any process or a database replaced by cloud sync
+# is picked up; writes made here update the cache directly.
+
+_CACHE: dict[str, tuple[tuple[int, int, int], tuple[bool, bool]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _db_signature(path) -> tuple[int, int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def clear_consent_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _remember(path, state: tuple[bool, bool]) -> None:
+    signature = _db_signature(path)
+    with _CACHE_LOCK:
+        if signature is None:
+            _CACHE.pop(str(path), None)
+        else:
+            _CACHE[str(path)] = (signature, state)
+
+
+def _cached_consent() -> tuple[bool, bool]:
+    """``(local, external)`` for the current user's database."""
+    path = get_database_path()
+    signature = _db_signature(path)
+    if signature is not None:
+        with _CACHE_LOCK:
+            cached = _CACHE.get(str(path))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    conn = open_db()
+    try:
+        state = _get_consent_row(conn)
+    finally:
+        close_db(conn)
+    _remember(path, state)
+    return state
+
+
 # -------------------------------------------------------
 # DATABASE HELPERS
 # -------------------------------------------------------
@@ -96,42 +150,37 @@ def _upsert_consent(conn, *, local: bool | None = None, external: bool | None =
 # PUBLIC API FUNCTIONS
 # -------------------------------------------------------
 
-def set_local_consent(granted: bool) -> None:
+def _write_consent(*, local: bool | None = None, external: bool | None = None) -> None:
+    path = get_database_path()
     conn = open_db()
     try:
-        _upsert_consent(conn, local=granted)
+        _upsert_consent(conn, local=local, external=external)
+        state = _get_consent_row(conn)
     finally:
-        close_db()
+        close_db(conn)
+    _remember(path, state)
+
+
+def set_local_consent(granted: bool) -> None:
+    _write_consent(local=granted)
 
 
 def set_external_consent(granted: bool) -> None:
-    conn = open_db()
-    try:
-        _upsert_consent(conn, external=granted)
-    finally:
-        close_db()
+    _write_consent(external=granted)
 
 
 def get_consent() -> dict:
-    conn = open_db()
-    try:
-        local, external = _get_consent_row(conn)
-        return {
-            "local_consent": local,
-            "external_consent": external,
-        }
-    finally:
-        close_db()
+    local, external = _cached_consent()
+    return {
+        "local_consent": local,
+        "external_consent": external,
+    }
 
 
 def ensure_local_consent() -> None:
-    conn = open_db()
-    try:
-        local, _ = _get_consent_row(conn)
-        if not local:
-            raise ConsentError("Local consent required.")
-    finally:
-        close_db()
+    local, _ = _cached_consent()
+    if not local:
+        raise ConsentError("Local consent required.")
 
 
 def ensure_external_permission(service: str) -> None:
@@ -142,15 +191,11 @@ def ensure_external_permission(service: str) -> None:
     Raises if not allowed.
     """
 
-    conn = open_db()
-    try:
-        _, external = _get_consent_row(conn)
-        if not external:
-            raise ExternalPermissionDenied(
-                f"External permission denied for service '{service}'."
-            )
-    finally:
-        close_db()
+    _, external = _cached_consent()
+    if not external:
+        raise ExternalPermissionDenied(
+            f"External permission denied for service '{service}'."
+        )
 
 
 def _as_legacy_state(local: bool, external: bool) -> ConsentState:
@@ -4,18 +4,19 @@ import os
 import json
 from typing import List
 from zipfile import ZipFile
-from openai import OpenAI
 from pathlib import Path
 from capstone.code_bundle import bundle_code_from_zip
 from capstone.code_bundle import BundledFile
+from capstone.llm_client import load_openai
 
 MAX_FILES = 5
 MAX_CHARS_PER_FILE = 4000
 
 
-def _get_openai_client() -> OpenAI | None:
+def _get_openai_client():
     api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    OpenAI = load_openai() if api_key else None
+    if OpenAI is None:
         return None
     return OpenAI(api_key=api_key)
 
@@ -0,0 +1,310 @@
+"""Per-file and per-directory churn and ownership from ``git log --numstat``.
+
+:class:`ChurnTracker` is fed one commit at a time while the log is parsed,
+so hotspots come out of the same pass as the author totals.  Memory stays
+bounded on very large histories: each table keeps at most ``2 * top_k``
+paths and is pruned back to the ``top_k`` most changed ones when it fills.
+From the first prune on, a count-min sketch also counts every path, so a
+path that was pruned and changes again re-enters with an (over)estimate of
+its history; such entries are flagged ``approximate``.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+# Paths kept per table after a prune; the table holds up to twice this many.
+CHURN_TOP_K = 1000
+# Directory levels counted per file ("src", "src/capstone", ...).
+CHURN_DIR_DEPTH = 3
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+
+# numstat reports renames as "old => new" or "dir/{old => new}/file".
+_BRACE_RENAME = re.compile(r"\{([^{}]*) => ([^{}]*)\}")
+
+
+def numstat_path(raw: str) -> str:
+    """The post-rename path of a numstat path column."""
+    if " => " not in raw:
+        return raw
+    if "{" in raw:
+        return _BRACE_RENAME.sub(lambda m: m.group(2), raw).replace("//", "/")
+    return raw.split(" => ", 1)[1]
+
+
+class CountMinSketch:
+    """Count-min sketch of (changes, lines) per key; estimates never undercount."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH) -> None:
+        self.width = width
+        self.depth = depth
+        self.changes = array("q", bytes(8 * width * depth))
+        self.lines = array("q", bytes(8 * width * depth))
+
+    def _slots(self, key: str) -> list[int]:
+        # Stable across processes (unlike hash()), so stored sketches stay valid.
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, changes: int, lines: int) -> tuple[int, int]:
+        """Count *key* and return its estimate including this addition."""
+        slots = self._slots(key)
+        for slot in slots:
+            self.changes[slot] += changes
+            self.lines[slot] += lines
+        return min(self.changes[s] for s in slots), min(self.lines[s] for s in slots)
+
+    def estimate(self, key: str) -> tuple[int, int]:
+        slots = self._slots(key)
+        return min(self.changes[s] for s in slots), min(self.lines[s] for s in slots)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        for i, value in enumerate(other.changes):
+            self.changes[i] += value
+        for i, value in enumerate(other.lines):
+            self.lines[i] += value
+
+    def to_dict(self) -> dict:
+        # Counter rows are mostly zeros: stored as zlib-compressed little-endian
+        # int64 in base64, a few KB instead of 16384 JSON numbers.
+        return {
+            "width": self.width,
+            "depth": self.depth,
+            "changes": _pack_counters(self.changes),
+            "lines": _pack_counters(self.lines),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CountMinSketch":
+        sketch = cls(int(data["width"]), int(data["depth"]))
+        sketch.changes = _unpack_counters(data["changes"])
+        sketch.lines = _unpack_counters(data["lines"])
+        return sketch
+
+
+def _pack_counters(counters: array) -> str:
+    if sys.byteorder == "big":
+        counters = array("q", counters)
+        counters.byteswap()
+    return base64.b64encode(zlib.compress(counters.tobytes())).decode("ascii")
+
+
+def _unpack_counters(data: str) -> array:
+    counters = array("q")
+    counters.frombytes(zlib.decompress(base64.b64decode(data)))
+    if sys.byteorder == "big":
+        counters.byteswap()
+    return counters
+
+
+@dataclass
+class PathChurn:
+    commits: int = 0
+    added: int = 0
+    deleted: int = 0
+    # author -> ownership weight (lines changed, at least 1 per change).
+    authors: dict[str, int] = field(default_factory=dict)
+    # Counts include sketch estimates from before the path was last pruned;
+    # estimated lines are counted as added.
+    approximate: bool = False
+
+    @property
+    def churn(self) -> int:
+        return self.added + self.deleted
+
+    def add(self, author: str, added: int, deleted: int, commits: int = 1) -> None:
+        self.commits += commits
+        self.added += added
+        self.deleted += deleted
+        self.authors[author] = self.authors.get(author, 0) + max(added + deleted, 1)
+
+    def merge(self, other: "PathChurn") -> None:
+        self.commits += other.commits
+        self.added += other.added
+        self.deleted += other.deleted
+        for author, weight in other.authors.items():
+            self.authors[author] = self.authors.get(author, 0) + weight
+        self.approximate = self.approximate or other.approximate
+
+    def ownership(self) -> dict:
+        """Top author, their share, and the bus factor (fewest authors owning over half)."""
+        total = sum(self.authors.values())
+        ranked = sorted(self.authors.items(), key=lambda item: (-item[1], item[0]))
+        bus_factor = covered = 0
+        for _, weight in ranked:
+            bus_factor += 1
+            covered += weight
+            if covered * 2 > total:
+                break
+        return {
+            "top_author": ranked[0][0] if ranked else None,
+            "top_author_share": round(ranked[0][1] / total, 3) if total else 0.0,
+            "bus_factor": bus_factor,
+        }
+
+    def to_list(self) -> list:
+        return [self.commits, self.added, self.deleted, sorted(self.authors.items()), self.approximate]
+
+    @classmethod
+    def from_list(cls, data: Sequence) -> "PathChurn":
+        commits, added, deleted, authors, approximate = data
+        return cls(commits, added, deleted, {a: w for a, w in authors}, bool(approximate))
+
+
+def _hotness(entry: PathChurn) -> tuple[int, int]:
+    return entry.commits, entry.churn
+
+
+class _ChurnTable:
+    """Churn per path, keeping the ``top_k`` most changed paths once it fills up."""
+
+    def __init__(self, top_k: int) -> None:
+        self.top_k = top_k
+        self.paths: dict[str, PathChurn] = {}
+        self.sketch: CountMinSketch | None = None
+
+    def add(self, path: str, author: str, added: int, deleted: int) -> None:
+        entry = self.paths.get(path)
+        estimate = self.sketch.add(path, 1, added + deleted) if self.sketch is not None else None
+        if entry is None:
+            entry = self.paths[path] = PathChurn()
+            if estimate is not None and estimate[0] > 1:
+                # Re-seed from the sketch, which already counts this change.
+                entry.commits, entry.added, entry.approximate = estimate[0] - 1, estimate[1] - added - deleted, True
+        entry.add(author, added, deleted)
+        if len(self.paths) > 2 * self.top_k:
+            self._prune()
+
+    def _prune(self) -> None:
+        if self.sketch is None:
+            # Everything seen so far is still in the table, so the sketch starts exact.
+            self.sketch = CountMinSketch()
+            for path, entry in self.paths.items():
+                self.sketch.add(path, entry.commits, entry.churn)
+        ranked = sorted(self.paths.items(), key=lambda item: _hotness(item[1]), reverse=True)
+        self.paths = dict(ranked[: self.top_k])
+
+    def merge(self, other: "_ChurnTable") -> None:
+        if self.sketch is not None or other.sketch is not None:
+            mine = self._exact_sketch()
+            mine.merge(other._exact_sketch())
+            self.sketch = mine
+        for path, entry in self.paths.items():
+            if path not in other.paths and other.sketch is not None:
+                # Pruned from *other*: fold in its estimate for the path.
+                commits, lines = other.sketch.estimate(path)
+                if commits:
+                    entry.merge(PathChurn(commits, lines, approximate=True))
+        for path, entry in other.paths.items():
+            if path in self.paths:
+                self.paths[path].merge(entry)
+            else:
+                self.paths[path] = entry
+        if len(self.paths) > 2 * self.top_k:
+            self._prune()
+
+    def _exact_sketch(self) -> CountMinSketch:
+        if self.sketch is not None:
+            return self.sketch
+        sketch = CountMinSketch()
+        for path, entry in self.paths.items():
+            sketch.add(path, entry.commits, entry.churn)
+        return sketch
+
+    def ranked(self, limit: int) -> list[tuple[str, PathChurn]]:
+        ranked = sorted(self.paths.items(), key=lambda item: (-item[1].commits, -item[1].churn, item[0]))
+        return ranked[:limit]
+
+    def to_dict(self) -> dict:
+        return {
+            "paths": [[path, *entry.to_list()] for path, entry in self.paths.items()],
+            "sketch": self.sketch.to_dict() if self.sketch is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, top_k: int) -> "_ChurnTable":
+        table = cls(top_k)
+        table.paths = {row[0]: PathChurn.from_list(row[1:]) for row in data.get("paths") or []}
+        if data.get("sketch"):
+            table.sketch = CountMinSketch.from_dict(data["sketch"])
+        return table
+
+
+class ChurnTracker:
+    """Churn, author counts and ownership per file and per directory."""
+
+    def __init__(self, top_k: int = CHURN_TOP_K, dir_depth: int = CHURN_DIR_DEPTH) -> None:
+        self.top_k = top_k
+        self.dir_depth = dir_depth
+        self.files = _ChurnTable(top_k)
+        self.directories = _ChurnTable(top_k)
+
+    def add_commit(self, author: str, files: Iterable[tuple[str, int, int]]) -> None:
+        """Count one commit's numstat rows (path, lines added, lines deleted)."""
+        touched: dict[str, list[int]] = {}
+        for path, added, deleted in files:
+            self.files.add(path, author, added, deleted)
+            parts = path.split("/")[:-1][: self.dir_depth]
+            for depth in range(1, len(parts) + 1):
+                totals = touched.setdefault("/".join(parts[:depth]), [0, 0])
+                totals[0] += added
+                totals[1] += deleted
+        # A directory counts one change per commit, however many files it touched.
+        for directory, (added, deleted) in touched.items():
+            self.directories.add(directory, author, added, deleted)
+
+    def merge(self, other: "ChurnTracker") -> None:
+        self.files.merge(other.files)
+        self.directories.merge(other.directories)
+
+    def summary(self, limit: int = 20) -> dict:
+        """Hotspots (most changed files and directories first) with their ownership."""
+
+        def rows(table: _ChurnTable) -> list[dict]:
+            return [
+                {
+                    "path": path,
+                    "commits": entry.commits,
+                    "lines_added": entry.added,
+                    "lines_deleted": entry.deleted,
+                    "churn": entry.churn,
+                    "authors": len(entry.authors),
+                    **entry.ownership(),
+                    "approximate": entry.approximate,
+                }
+                for path, entry in table.ranked(limit)
+            ]
+
+        return {
+            "hotspots": rows(self.files),
+            "directories": rows(self.directories),
+            "truncated": self.files.sketch is not None or self.directories.sketch is not None,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "top_k": self.top_k,
+            "dir_depth": self.dir_depth,
+            "files": self.files.to_dict(),
+            "directories": self.directories.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChurnTracker":
+        tracker = cls(int(data.get("top_k") or CHURN_TOP_K), int(data.get("dir_depth") or CHURN_DIR_DEPTH))
+        tracker.files = _ChurnTable.from_dict(data.get("files") or {}, tracker.top_k)
+        tracker.directories = _ChurnTable.from_dict(data.get("directories") or {}, tracker.top_k)
+        return tracker
+
+
+__all__ = ["ChurnTracker", "CountMinSketch", "PathChurn", "numstat_path"]
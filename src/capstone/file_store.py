@@ -3,12 +3,17 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import os
 import shutil
 import sqlite3
+import struct
+import tempfile
 import uuid
+import zipfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import BinaryIO, Tuple
+from typing import BinaryIO, Iterator, Tuple
 
 from .logging_utils import get_logger
 from .storage import BASE_DIR  # <-- IMPORTANT
@@ -19,6 +24,22 @@ logger = get_logger(__name__)
 DEFAULT_FILES_ROOT = BASE_DIR / "data" / "files"
 DEFAULT_FILES_ROOT.mkdir(parents=True, exist_ok=True)
 
+# Pack mode stores each distinct zip member once instead of whole archives.
+# Off by default; enable per call with ensure_file(pack=True) or globally via env.
+PACK_MODE = os.getenv("CAPSTONE_FILE_PACK_MODE", "").strip().lower() in {"1", "true", "yes", "on"}
+MEMBERS_DIRNAME = "members"
+# Reconstructed archives stay in memory up to this size, then spill to disk.
+RECONSTRUCT_SPOOL_BYTES = 32 * 1024 * 1024
+
+_CHUNK_SIZE = 64 * 1024
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_MAX_ENTRIES = 0xFFFF
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+
 
 def hash_file_stream(path: Path | str, *, chunk_size: int = 64 * 1024) -> Tuple[str, int]:
     hasher = hashlib.sha256()
@@ -47,11 +68,27 @@ def ensure_file(
     source: str | None = None,
     files_root: Path | None = None,
     upload_id: str | None = None,
+    pack: bool | None = None,
+    precomputed: Tuple[str, int] | None = None,
+    move: bool = False,
 ) -> dict:
+    """Store *source_path* once per content hash and record an upload row.
+
+    ``precomputed`` is a ``(sha256, size)`` pair the caller already hashed
+    (e.g. incrementally while receiving chunks), skipping a second read.
+    With ``move`` the source is renamed into the store instead of copied.
+
+    With ``pack`` (defaults to ``PACK_MODE``) a new zip archive is split into
+    its members: each distinct member's compressed bytes are written once under
+    ``<files_root>/members`` and the upload is recorded as a manifest.  The
+    archive itself is not written; ``open_file`` rebuilds it on demand.
+    Archives that cannot be packed (encrypted, zip64, corrupt) fall back to
+    whole-blob storage.
+    """
     root = files_root or DEFAULT_FILES_ROOT
     root.mkdir(parents=True, exist_ok=True)
 
-    file_hash, size_bytes = hash_file_stream(source_path)
+    file_hash, size_bytes = precomputed or hash_file_stream(source_path)
     ext = Path(original_name or "").suffix.lower() if original_name else ""
     file_id = file_hash
     effective_upload_id = upload_id or str(uuid.uuid4())
@@ -69,15 +106,10 @@ def ensure_file(
             raise ValueError("Hash collision detected: stored size differs")
 
         dest_path = Path(path_str) if path_str else _storage_path(root, file_hash, ext)
+        packed = is_packed(conn, existing_id)
 
-        if not dest_path.exists():
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            tmp_path = dest_path.with_suffix(".tmp")
-
-            with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
-                shutil.copyfileobj(src, dst, length=64 * 1024)
-
-            os.replace(tmp_path, dest_path)
+        if not dest_path.exists() and not packed:
+            _place_blob(source_path, dest_path, move=move)
 
             conn.execute(
                 """
@@ -93,7 +125,7 @@ def ensure_file(
                 (existing_id,),
             )
 
-        _record_upload(
+        upload_row_id = _record_upload(
             conn,
             upload_id=effective_upload_id,
             original_name=original_name,
@@ -109,18 +141,19 @@ def ensure_file(
             "path": str(dest_path),
             "size_bytes": size_bytes,
             "dedup": True,
+            "packed": packed,
             "upload_id": effective_upload_id,
+            "upload_row_id": upload_row_id,
         }
 
     # Store new blob
     dest_path = _storage_path(root, file_hash, ext)
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = dest_path.with_suffix(".tmp")
+    manifest = None
+    if PACK_MODE if pack is None else pack:
+        manifest = _pack_archive(conn, source_path, root)
 
-    with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
-        shutil.copyfileobj(src, dst, length=64 * 1024)
-
-    os.replace(tmp_path, dest_path)
+    if manifest is None:
+        _place_blob(source_path, dest_path, move=move)
 
     conn.execute(
         """
@@ -130,7 +163,13 @@ def ensure_file(
         (file_id, file_hash, size_bytes, mime, str(dest_path)),
     )
 
-    _record_upload(
+    if manifest is not None:
+        conn.execute(
+            "INSERT INTO pack_manifests (file_id, manifest, member_count) VALUES (?, ?, ?)",
+            (file_id, json.dumps(manifest), len(manifest)),
+        )
+
+    upload_row_id = _record_upload(
         conn,
         upload_id=effective_upload_id,
         original_name=original_name,
@@ -146,10 +185,116 @@ def ensure_file(
         "path": str(dest_path),
         "size_bytes": size_bytes,
         "dedup": False,
+        "packed": manifest is not None,
         "upload_id": effective_upload_id,
+        "upload_row_id": upload_row_id,
+    }
+
+
+def _place_blob(source_path: Path | str, dest_path: Path, *, move: bool = False) -> None:
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    if move:
+        try:
+            os.replace(source_path, dest_path)
+            return
+        except OSError:
+            pass  # different filesystem; fall back to copying
+
+    tmp_path = dest_path.with_suffix(".tmp")
+    with open(source_path, "rb") as src, open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, length=64 * 1024)
+    os.replace(tmp_path, dest_path)
+
+
+def ensure_bytes(
+    conn: sqlite3.Connection,
+    data: bytes,
+    *,
+    mime: str | None = None,
+    ext: str = "",
+    files_root: Path | None = None,
+) -> dict:
+    """Store in-memory bytes (thumbnails, served media) once per content hash.
+
+    Unlike ``ensure_file`` no ``uploads`` row is written: uploads are project
+    archives, media blobs are referenced from their own tables by file_id.
+    """
+    root = files_root or DEFAULT_FILES_ROOT
+    file_hash = hashlib.sha256(data).hexdigest()
+    size_bytes = len(data)
+
+    existing = conn.execute(
+        "SELECT file_id, path, size_bytes, mime FROM files WHERE hash = ?",
+        (file_hash,),
+    ).fetchone()
+
+    if existing:
+        existing_id, path_str, stored_size, stored_mime = existing
+        if stored_size != size_bytes:
+            raise ValueError("Hash collision detected: stored size differs")
+        dest_path = Path(path_str)
+        if not dest_path.exists():
+            dest_path = _storage_path(root, file_hash, ext)
+            _write_bytes_atomic(dest_path, data)
+        conn.execute(
+            "UPDATE files SET path = ?, ref_count = ref_count + 1 WHERE file_id = ?",
+            (str(dest_path), existing_id),
+        )
+        return {
+            "file_id": existing_id,
+            "hash": file_hash,
+            "path": str(dest_path),
+            "size_bytes": size_bytes,
+            "mime": stored_mime or mime,
+            "dedup": True,
+        }
+
+    dest_path = _storage_path(root, file_hash, ext)
+    _write_bytes_atomic(dest_path, data)
+    conn.execute(
+        """
+        INSERT INTO files (file_id, hash, size_bytes, mime, path, ref_count)
+        VALUES (?, ?, ?, ?, ?, 1)
+        """,
+        (file_hash, file_hash, size_bytes, mime, str(dest_path)),
+    )
+    return {
+        "file_id": file_hash,
+        "hash": file_hash,
+        "path": str(dest_path),
+        "size_bytes": size_bytes,
+        "mime": mime,
+        "dedup": False,
     }
 
 
+def release_bytes(conn: sqlite3.Connection, file_id: str) -> Path | None:
+    """Drop one reference taken by ``ensure_bytes``.
+
+    Returns the blob path once the last reference is gone so the caller can
+    unlink it after committing; otherwise ``None``.
+    """
+    row = conn.execute(
+        "SELECT path, ref_count FROM files WHERE file_id = ?",
+        (file_id,),
+    ).fetchone()
+    if not row:
+        return None
+    path_str, ref_count = row
+    if (ref_count or 0) > 1:
+        conn.execute("UPDATE files SET ref_count = ref_count - 1 WHERE file_id = ?", (file_id,))
+        return None
+    conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+    return Path(path_str)
+
+
+def _write_bytes_atomic(dest_path: Path, data: bytes) -> None:
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_path.with_suffix(dest_path.suffix + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, dest_path)
+
+
 def _record_upload(
     conn: sqlite3.Connection,
     *,
@@ -159,14 +304,38 @@ def _record_upload(
     source: str | None,
     file_hash: str,
     file_id: str,
-) -> None:
-    conn.execute(
+) -> int:
+    cursor = conn.execute(
         """
         INSERT INTO uploads (upload_id, original_name, uploader, source, hash, file_id)
         VALUES (?, ?, ?, ?, ?, ?)
         """,
         (upload_id, original_name, uploader, source, file_hash, file_id),
     )
+    return cursor.lastrowid
+
+
+def discard_upload(conn: sqlite3.Connection, stored: dict) -> Path | None:
+    """Undo the upload row and file reference recorded by one ``ensure_file`` call.
+
+    Used when the work the upload was stored for is abandoned.  Returns the
+    blob path once the last reference is gone so the caller can unlink it
+    after committing; otherwise ``None``.
+    """
+    conn.execute("DELETE FROM uploads WHERE id = ?", (stored["upload_row_id"],))
+    row = conn.execute(
+        "SELECT path, ref_count FROM files WHERE file_id = ?",
+        (stored["file_id"],),
+    ).fetchone()
+    if not row:
+        return None
+    path_str, ref_count = row
+    if (ref_count or 0) > 1:
+        conn.execute("UPDATE files SET ref_count = ref_count - 1 WHERE file_id = ?", (stored["file_id"],))
+        return None
+    release_file(conn, stored["file_id"])
+    conn.execute("DELETE FROM files WHERE file_id = ?", (stored["file_id"],))
+    return Path(path_str)
 
 
 def open_file(conn: sqlite3.Connection, file_id: str, *, files_root: Path | None = None) -> BinaryIO:
@@ -181,6 +350,10 @@ def open_file(conn: sqlite3.Connection, file_id: str, *, files_root: Path | None
     path = Path(row[0])
     root = files_root or DEFAULT_FILES_ROOT
 
+    manifest = _fetch_manifest(conn, file_id)
+    if manifest is not None and not path.exists():
+        return _reconstruct_stream(conn, manifest)
+
     if not path.exists():
         # Recover from cross-machine paths (e.g. Windows absolute path synced into DB).
         candidates = list(root.glob(f"{file_id}*"))
@@ -191,3 +364,360 @@ def open_file(conn: sqlite3.Connection, file_id: str, *, files_root: Path | None
             raise FileNotFoundError(f"stored file path does not exist for file_id={file_id}: {row[0]}")
 
     return open(path, "rb")
+
+
+@contextmanager
+def materialize_file(
+    conn: sqlite3.Connection, file_id: str, *, files_root: Path | None = None
+) -> Iterator[Path]:
+    """Yield an on-disk path for *file_id* for the duration of the block.
+
+    For callers that need a real filesystem path (zip rewriting, path-based
+    tooling).  Whole blobs are yielded as stored; a packed archive is rebuilt
+    into a temporary ``.zip`` that is removed on exit, so its members are
+    never stored a second time.
+    """
+    row = conn.execute("SELECT path FROM files WHERE file_id = ?", (file_id,)).fetchone()
+    if not row:
+        raise FileNotFoundError(f"file_id not found: {file_id}")
+
+    path = Path(row[0])
+    manifest = None if path.exists() else _fetch_manifest(conn, file_id)
+    if manifest is None:
+        if not path.exists():
+            # Whole blob: let open_file apply its cross-machine path recovery.
+            with open_file(conn, file_id, files_root=files_root) as fh:
+                path = Path(fh.name)
+        yield path
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as out:
+        tmp_path = Path(out.name)
+        try:
+            _write_archive(conn, manifest, out)
+        except BaseException:
+            out.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    try:
+        yield tmp_path
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def is_packed(conn: sqlite3.Connection, file_id: str) -> bool:
+    return _fetch_manifest(conn, file_id) is not None
+
+
+def release_file(conn: sqlite3.Connection, file_id: str) -> None:
+    """Drop pack references held by *file_id* before its ``files`` row is deleted.
+
+    Members whose reference count reaches zero are removed from disk.  No-op
+    for archives stored as whole blobs.
+    """
+    manifest = _fetch_manifest(conn, file_id)
+    if manifest is None:
+        return
+
+    for entry in manifest:
+        if not entry.get("content_hash"):
+            continue
+        key = (entry["crc"], entry["file_size"], entry["content_hash"])
+        conn.execute(
+            """
+            UPDATE pack_members SET ref_count = ref_count - 1
+            WHERE crc32 = ? AND file_size = ? AND content_hash = ?
+            """,
+            key,
+        )
+        row = conn.execute(
+            """
+            SELECT path, ref_count FROM pack_members
+            WHERE crc32 = ? AND file_size = ? AND content_hash = ?
+            """,
+            key,
+        ).fetchone()
+        if row and row[1] <= 0:
+            conn.execute(
+                "DELETE FROM pack_members WHERE crc32 = ? AND file_size = ? AND content_hash = ?",
+                key,
+            )
+            Path(row[0]).unlink(missing_ok=True)
+
+    conn.execute("DELETE FROM pack_manifests WHERE file_id = ?", (file_id,))
+
+
+# Pack mode internals
+
+def _fetch_manifest(conn: sqlite3.Connection, file_id: str) -> list[dict] | None:
+    try:
+        row = conn.execute(
+            "SELECT manifest FROM pack_manifests WHERE file_id = ?",
+            (file_id,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Older databases without the pack tables only hold whole blobs.
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def _member_path(root: Path, content_hash: str) -> Path:
+    return root / MEMBERS_DIRNAME / content_hash[:2] / f"{content_hash}.bin"
+
+
+def _member_data_offset(fh: BinaryIO, info: zipfile.ZipInfo) -> int:
+    """Return the offset of *info*'s compressed bytes (just past its local header)."""
+    fh.seek(info.header_offset)
+    header = fh.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader:
+        raise zipfile.BadZipFile(f"Truncated local header for {info.filename}")
+    fields = struct.unpack(zipfile.structFileHeader, header)
+    if fields[0] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local header magic for {info.filename}")
+    return (
+        info.header_offset
+        + zipfile.sizeFileHeader
+        + fields[_FH_FILENAME_LENGTH]
+        + fields[_FH_EXTRA_FIELD_LENGTH]
+    )
+
+
+def _hash_range(fh: BinaryIO, offset: int, length: int) -> str:
+    hasher = hashlib.sha256()
+    fh.seek(offset)
+    remaining = length
+    while remaining > 0:
+        chunk = fh.read(min(_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile("Member data truncated")
+        hasher.update(chunk)
+        remaining -= len(chunk)
+    return hasher.hexdigest()
+
+
+def _copy_range(fh: BinaryIO, offset: int, length: int, out: BinaryIO) -> None:
+    fh.seek(offset)
+    remaining = length
+    while remaining > 0:
+        chunk = fh.read(min(_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile("Member data truncated")
+        out.write(chunk)
+        remaining -= len(chunk)
+
+
+def _is_packable(infos: list[zipfile.ZipInfo]) -> bool:
+    # The rebuilt archive is written without zip64 records, so keep to classic limits.
+    if len(infos) >= _ZIP32_MAX_ENTRIES:
+        return False
+    total = 0
+    for info in infos:
+        if info.flag_bits & _FLAG_ENCRYPTED:
+            return False
+        if info.file_size >= _ZIP32_LIMIT or info.compress_size >= _ZIP32_LIMIT:
+            return False
+        total += zipfile.sizeFileHeader + zipfile.sizeCentralDir + 2 * len(info.filename.encode("utf-8"))
+        total += info.compress_size
+    return total < _ZIP32_LIMIT
+
+
+def _pack_archive(conn: sqlite3.Connection, source_path: Path | str, root: Path) -> list[dict] | None:
+    """Store the members of a zip at *source_path*; return its manifest or None if unpackable."""
+    try:
+        with open(source_path, "rb") as fh, zipfile.ZipFile(fh) as zf:
+            infos = zf.infolist()
+            if not _is_packable(infos):
+                logger.info("Archive %s not packable; storing whole blob", source_path)
+                return None
+
+            # Hash every member first so a corrupt archive leaves no partial refs behind.
+            manifest: list[dict] = []
+            offsets: list[int] = []
+            for info in infos:
+                offset = _member_data_offset(fh, info)
+                content_hash = _hash_range(fh, offset, info.compress_size) if info.compress_size else None
+                offsets.append(offset)
+                manifest.append(
+                    {
+                        "filename": info.filename,
+                        "date_time": list(info.date_time),
+                        "compress_type": info.compress_type,
+                        "crc": info.CRC,
+                        "file_size": info.file_size,
+                        "compress_size": info.compress_size,
+                        "flag_bits": info.flag_bits & ~_FLAG_DATA_DESCRIPTOR,
+                        "create_system": info.create_system,
+                        "create_version": info.create_version,
+                        "extract_version": info.extract_version,
+                        "external_attr": info.external_attr,
+                        "content_hash": content_hash,
+                    }
+                )
+
+            for entry, offset in zip(manifest, offsets):
+                if entry["content_hash"]:
+                    _store_member(conn, fh, offset, entry, root)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, struct.error) as exc:
+        logger.info("Archive %s not packable (%s); storing whole blob", source_path, exc)
+        return None
+
+    return manifest
+
+
+def _store_member(conn: sqlite3.Connection, fh: BinaryIO, offset: int, entry: dict, root: Path) -> None:
+    key = (entry["crc"], entry["file_size"], entry["content_hash"])
+    row = conn.execute(
+        "SELECT path FROM pack_members WHERE crc32 = ? AND file_size = ? AND content_hash = ?",
+        key,
+    ).fetchone()
+    if row and Path(row[0]).exists():
+        conn.execute(
+            """
+            UPDATE pack_members SET ref_count = ref_count + 1
+            WHERE crc32 = ? AND file_size = ? AND content_hash = ?
+            """,
+            key,
+        )
+        return
+
+    dest_path = _member_path(root, entry["content_hash"])
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as out:
+        _copy_range(fh, offset, entry["compress_size"], out)
+    os.replace(tmp_path, dest_path)
+
+    if row:
+        # Row survived but its bytes went missing; re-point it and take a reference.
+        conn.execute(
+            """
+            UPDATE pack_members SET path = ?, ref_count = ref_count + 1
+            WHERE crc32 = ? AND file_size = ? AND content_hash = ?
+            """,
+            (str(dest_path), *key),
+        )
+    else:
+        conn.execute(
+            """
+            INSERT INTO pack_members (crc32, file_size, content_hash, compress_size, compress_type, path, ref_count)
+            VALUES (?, ?, ?, ?, ?, ?, 1)
+            """,
+            (*key, entry["compress_size"], entry["compress_type"], str(dest_path)),
+        )
+
+
+def _encode_member_name(filename: str, flag_bits: int) -> Tuple[bytes, int]:
+    if flag_bits & _FLAG_UTF8:
+        return filename.encode("utf-8"), flag_bits
+    try:
+        # zipfile decodes names without the UTF-8 flag as cp437; mirror that.
+        return filename.encode("cp437"), flag_bits
+    except UnicodeEncodeError:
+        return filename.encode("utf-8"), flag_bits | _FLAG_UTF8
+
+
+def _dos_datetime(date_time: list[int]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    dosdate = (max(year, 1980) - 1980) << 9 | month << 5 | day
+    dostime = hour << 11 | minute << 5 | (second // 2)
+    return dosdate, dostime
+
+
+def _write_archive(conn: sqlite3.Connection, manifest: list[dict], out: BinaryIO) -> None:
+    """Write a zip built from stored member bytes (no recompression) to *out*."""
+    central: list[Tuple[dict, bytes, int, int]] = []
+    base = out.tell()
+
+    for entry in manifest:
+        name, flag_bits = _encode_member_name(entry["filename"], entry["flag_bits"])
+        dosdate, dostime = _dos_datetime(entry["date_time"])
+        header_offset = out.tell() - base
+        out.write(
+            struct.pack(
+                zipfile.structFileHeader,
+                zipfile.stringFileHeader,
+                entry["extract_version"],
+                0,
+                flag_bits,
+                entry["compress_type"],
+                dostime,
+                dosdate,
+                entry["crc"],
+                entry["compress_size"],
+                entry["file_size"],
+                len(name),
+                0,
+            )
+        )
+        out.write(name)
+        if entry.get("content_hash"):
+            member_path = _member_row_path(conn, entry)
+            with open(member_path, "rb") as src:
+                shutil.copyfileobj(src, out, length=_CHUNK_SIZE)
+        central.append((entry, name, flag_bits, header_offset))
+
+    central_start = out.tell() - base
+    for entry, name, flag_bits, header_offset in central:
+        dosdate, dostime = _dos_datetime(entry["date_time"])
+        out.write(
+            struct.pack(
+                zipfile.structCentralDir,
+                zipfile.stringCentralDir,
+                entry["create_version"],
+                entry["create_system"],
+                entry["extract_version"],
+                0,
+                flag_bits,
+                entry["compress_type"],
+                dostime,
+                dosdate,
+                entry["crc"],
+                entry["compress_size"],
+                entry["file_size"],
+                len(name),
+                0,
+                0,
+                0,
+                0,
+                entry["external_attr"],
+                header_offset,
+            )
+        )
+        out.write(name)
+    central_size = out.tell() - base - central_start
+
+    out.write(
+        struct.pack(
+            zipfile.structEndArchive,
+            zipfile.stringEndArchive,
+            0,
+            0,
+            len(central),
+            len(central),
+            central_size,
+            central_start,
+            0,
+        )
+    )
+
+
+def _member_row_path(conn: sqlite3.Connection, entry: dict) -> Path:
+    row = conn.execute(
+        "SELECT path FROM pack_members WHERE crc32 = ? AND file_size = ? AND content_hash = ?",
+        (entry["crc"], entry["file_size"], entry["content_hash"]),
+    ).fetchone()
+    path = Path(row[0]) if row else None
+    if path is None or not path.exists():
+        raise FileNotFoundError(f"pack member missing for {entry['filename']}")
+    return path
+
+
+def _reconstruct_stream(conn: sqlite3.Connection, manifest: list[dict]) -> BinaryIO:
+    out = tempfile.SpooledTemporaryFile(max_size=RECONSTRUCT_SPOOL_BYTES)
+    try:
+        _write_archive(conn, manifest, out)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    return out
@@ -3,20 +3,46 @@
 from __future__ import annotations
 
 import json
-import subprocess
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable, Iterator, List
-
-from .collaboration_analysis import build_collaboration_analysis, to_compact_collaboration
+from typing import Callable, Iterable, Iterator, List, Sequence
+
+from . import cancellation
+from .collaboration_analysis import (
+    CommitColumns,
+    aggregate_commit_columns,
+    build_collaboration_analysis,
+    to_compact_collaboration,
+    weekly_histogram,
+)
 from .external_artifacts import discover_repository, fetch_repository_artifacts
+from .file_churn import ChurnTracker, numstat_path
 from .logging_utils import get_logger
-from .storage import open_db, store_analysis_snapshot
+from .storage import fetch_git_history_state, open_db, store_analysis_snapshot, store_git_history_state
 from .project_role import infer_project_role_from_snapshot
 
 logger = get_logger(__name__)
 
 GIT_LOG_FORMAT = "commit:%H|%an|%ae|%ct|%s"
+# Lines parsed between cancellation checks.
+CANCEL_CHECK_LINES = 1024
+
+
+def _timeout_from_env() -> float | None:
+    raw = os.getenv("CAPSTONE_GIT_LOG_TIMEOUT_S")
+    try:
+        value = float(raw) if raw else 600.0
+    except ValueError:
+        value = 600.0
+    return value if value > 0 else None
+
+
+# git log is killed after this many seconds (0 disables the limit).
+GIT_LOG_TIMEOUT_S = _timeout_from_env()
+# Bumped when the stored GitHistory layout changes; older states are rebuilt.
+GIT_HISTORY_STATE_VERSION = 3
 
 
 @dataclass
@@ -31,6 +57,8 @@ class GitEntry:
     files_changed: int
     is_review: bool
     is_shared_account: bool
+    # (path, lines added, lines deleted) per numstat row.
+    files: list[tuple[str, int, int]] = field(default_factory=list)
 
 
 _SHARED_TOKENS = {"shared", "team", "pair"}
@@ -46,8 +74,12 @@ def _parse_git_log_lines(lines: Iterable[str]) -> Iterator[GitEntry]:
     lines_added = 0
     lines_deleted = 0
     files_changed = 0
+    files: list[tuple[str, int, int]] = []
+    cancel = cancellation.current_token()
 
-    for raw_line in lines:
+    for count, raw_line in enumerate(lines):
+        if cancel is not None and not count % CANCEL_CHECK_LINES:
+            cancel.raise_if_cancelled()
         line = raw_line.rstrip("\n")
         if line.startswith("commit:"):
             if current_metadata is not None:
@@ -62,12 +94,14 @@ def _parse_git_log_lines(lines: Iterable[str]) -> Iterator[GitEntry]:
                     files_changed=files_changed,
                     is_review="review" in current_metadata[4].lower(),
                     is_shared_account=_is_shared_account(current_metadata[1], current_metadata[2]),
+                    files=files,
                 )
             payload = line.split(":", 1)[1]
             current_metadata = payload.split("|")
             lines_added = 0
             lines_deleted = 0
             files_changed = 0
+            files = []
             continue
 
         if line.strip() == "" or current_metadata is None:
@@ -75,7 +109,7 @@ def _parse_git_log_lines(lines: Iterable[str]) -> Iterator[GitEntry]:
 
         parts = line.split("\t")
         if len(parts) >= 3:
-            add_str, del_str, _ = parts[:3]
+            add_str, del_str, path = parts[:3]
             try:
                 add = int(add_str) if add_str != "-" else 0
                 delete = int(del_str) if del_str != "-" else 0
@@ -84,6 +118,7 @@ def _parse_git_log_lines(lines: Iterable[str]) -> Iterator[GitEntry]:
             lines_added += add
             lines_deleted += delete
             files_changed += 1
+            files.append((numstat_path(path), add, delete))
 
     if current_metadata is not None:
         yield GitEntry(
@@ -97,6 +132,7 @@ def _parse_git_log_lines(lines: Iterable[str]) -> Iterator[GitEntry]:
             files_changed=files_changed,
             is_review="review" in current_metadata[4].lower(),
             is_shared_account=_is_shared_account(current_metadata[1], current_metadata[2]),
+            files=files,
         )
 
 
@@ -118,8 +154,257 @@ def parse_git_log_stream(stream: str) -> List[dict]:
     return entries
 
 
-def run_git_log(repo_path: Path) -> str:
-    """Execute git log --numstat with the expected format and return its output."""
+@dataclass
+class AuthorAggregate:
+    """Running totals for one (author, email, shared, review) group of commits."""
+
+    author: str
+    email: str
+    shared: bool
+    review: bool
+    commits: int = 0
+    lines: int = 0
+    first_ts: int = 0
+    last_ts: int = 0
+    # UTC day number (epoch seconds // 86400) -> commits that day.
+    days: dict[int, int] = field(default_factory=dict)
+
+    def add(self, record: GitEntry) -> None:
+        self.commits += 1
+        self.lines += record.lines_added + record.lines_deleted
+        ts = record.timestamp
+        if ts > 0:
+            self.first_ts = ts if not self.first_ts else min(self.first_ts, ts)
+            self.last_ts = max(self.last_ts, ts)
+            day = ts // 86400
+            self.days[day] = self.days.get(day, 0) + 1
+
+    def merge(self, other: "AuthorAggregate") -> None:
+        self.commits += other.commits
+        self.lines += other.lines
+        if other.first_ts:
+            self.first_ts = other.first_ts if not self.first_ts else min(self.first_ts, other.first_ts)
+        self.last_ts = max(self.last_ts, other.last_ts)
+        for day, count in other.days.items():
+            self.days[day] = self.days.get(day, 0) + count
+
+    def to_entry(self) -> dict:
+        """The group as one entry in ``parse_git_log_stream`` form."""
+        return {
+            "author": self.author,
+            "email": self.email,
+            "commits": self.commits,
+            "lines": self.lines,
+            "reviews": self.commits if self.review else 0,
+            "kind": "review" if self.review else "commit",
+            "shared": self.shared,
+        }
+
+
+@dataclass
+class GitHistory:
+    """Aggregates of a newest-first git log, resumable from its head commit.
+
+    Groups keep the order in which they first appear in the log, so
+    ``entries()`` feeds ``build_collaboration_analysis`` the same totals in
+    the same order as the per-commit entries of a full parse would.
+    """
+
+    head_sha: str | None = None
+    commit_count: int = 0
+    groups: dict[tuple, AuthorAggregate] = field(default_factory=dict)
+    # Commits parsed to produce this history (all of them on a full rebuild).
+    parsed_commits: int = 0
+    churn: ChurnTracker = field(default_factory=ChurnTracker)
+
+    def add(self, record: GitEntry) -> None:
+        if self.head_sha is None:
+            self.head_sha = record.sha
+        key = (record.author, record.email, record.is_shared_account, record.is_review)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = AuthorAggregate(*key)
+        group.add(record)
+        self.churn.add_commit(record.author, record.files)
+        self.commit_count += 1
+        self.parsed_commits += 1
+
+    def extend_with_older(self, older: "GitHistory") -> None:
+        """Fold in the aggregates of the history this one's commits were added on top of."""
+        for key, group in older.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(group)
+            else:
+                self.groups[key] = group
+        self.churn.merge(older.churn)
+        if self.head_sha is None:
+            self.head_sha = older.head_sha
+        self.commit_count += older.commit_count
+
+    def entries(self) -> list[dict]:
+        return [group.to_entry() for group in self.groups.values()]
+
+    def timestamp_range(self) -> tuple[int, int] | None:
+        firsts = [g.first_ts for g in self.groups.values() if g.first_ts]
+        if not firsts:
+            return None
+        return min(firsts), max(g.last_ts for g in self.groups.values())
+
+    def author_activity(self) -> dict[str, dict]:
+        """Per author: commits, lines, active days, first/last commit dates and commits per week.
+
+        ``weekly_commits`` maps the Monday (``YYYY-MM-DD``, UTC) starting each
+        active week to the commits made that week.
+        """
+        merged: dict[str, AuthorAggregate] = {}
+        for group in self.groups.values():
+            total = merged.get(group.author)
+            if total is None:
+                total = merged[group.author] = AuthorAggregate(group.author, group.email, group.shared, False)
+            total.merge(group)
+        return {
+            author: {
+                "commits": total.commits,
+                "lines": total.lines,
+                "active_days": len(total.days),
+                "first_commit_date": _iso_utc(total.first_ts),
+                "last_commit_date": _iso_utc(total.last_ts),
+                "weekly_commits": {
+                    _iso_day(monday): count for monday, count in weekly_histogram(total.days).items()
+                },
+            }
+            for author, total in merged.items()
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": GIT_HISTORY_STATE_VERSION,
+            "head_sha": self.head_sha,
+            "commit_count": self.commit_count,
+            "groups": [
+                [
+                    g.author, g.email, g.shared, g.review, g.commits, g.lines, g.first_ts, g.last_ts,
+                    sorted(g.days.items()),
+                ]
+                for g in self.groups.values()
+            ],
+            "churn": self.churn.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GitHistory":
+        history = cls(
+            head_sha=data.get("head_sha"),
+            commit_count=int(data.get("commit_count") or 0),
+            churn=ChurnTracker.from_dict(data.get("churn") or {}),
+        )
+        for author, email, shared, review, commits, lines, first_ts, last_ts, days in data.get("groups") or []:
+            history.groups[(author, email, shared, review)] = AuthorAggregate(
+                author, email, shared, review, commits, lines, first_ts, last_ts, {d: c for d, c in days}
+            )
+        return history
+
+
+def _iso_utc(ts: int) -> str | None:
+    return datetime.utcfromtimestamp(ts).strftime("%Y-%m-%dT%H:%M:%SZ") if ts else None
+
+
+def _iso_day(day: int) -> str:
+    return datetime.utcfromtimestamp(day * 86400).strftime("%Y-%m-%d")
+
+
+def fold_git_log(
+    lines: Iterable[str],
+    previous: GitHistory | None = None,
+    *,
+    reopen: Callable[[], Iterable[str]] | None = None,
+) -> GitHistory:
+    """Aggregate a newest-first ``git log --numstat`` (``GIT_LOG_FORMAT``).
+
+    *lines* is read once, as a stream.  When the log contains *previous*'s
+    head commit, only the commits above it are parsed and folded into
+    *previous*'s totals.  The log below the head must hold exactly the
+    commits *previous* counted; otherwise (rewritten history, or older
+    commits merged in from a branch) everything is rebuilt from a second
+    read, ``reopen()``.  Without *reopen*, *lines* must be a sequence.
+    """
+    if reopen is None and not isinstance(lines, Sequence):
+        lines = list(lines)
+    if previous is None or not previous.head_sha:
+        return _aggregate_git_log(lines)
+
+    marker = f"commit:{previous.head_sha}|"
+    stream = iter(lines)
+    found_head = False
+
+    def above_head() -> Iterator[str]:
+        nonlocal found_head
+        for line in stream:
+            if line.startswith(marker):
+                found_head = True
+                return
+            yield line
+
+    history = _aggregate_git_log(above_head())
+    if not found_head:
+        # The whole log was parsed while looking for the head.
+        logger.info("Git history does not extend %s; rebuilt", previous.head_sha[:12])
+        return history
+    older = 1 + sum(1 for line in stream if line.startswith("commit:"))
+    if older == previous.commit_count:
+        history.extend_with_older(previous)
+        logger.info("Git history resumed from %s: %d new commits", previous.head_sha[:12], history.parsed_commits)
+        return history
+    logger.info("Git history does not extend %s; rebuilding", previous.head_sha[:12])
+    return _aggregate_git_log(reopen() if reopen is not None else lines)
+
+
+def _aggregate_git_log(lines: Iterable[str]) -> GitHistory:
+    # Commits are collected as columns keyed by group, then reduced in one
+    # pass (vectorised when NumPy is available).  File churn is counted as
+    # the commits stream past.
+    history = GitHistory()
+    columns = CommitColumns()
+    for record in _parse_git_log_lines(lines):
+        if history.head_sha is None:
+            history.head_sha = record.sha
+        key = (record.author, record.email, record.is_shared_account, record.is_review)
+        columns.append(key, record.timestamp, record.lines_added, record.lines_deleted)
+        history.churn.add_commit(record.author, record.files)
+    for key, totals in zip(columns.authors, aggregate_commit_columns(columns)):
+        history.groups[key] = AuthorAggregate(
+            *key,
+            commits=totals.commits,
+            lines=totals.added + totals.deleted,
+            first_ts=totals.first_ts,
+            last_ts=totals.last_ts,
+            days=totals.day_counts,
+        )
+    history.commit_count = history.parsed_commits = len(columns)
+    return history
+
+
+def load_git_history(conn, project_id: str) -> GitHistory | None:
+    """The aggregates stored by the last analysis of *project_id*, if any."""
+    state = fetch_git_history_state(conn, project_id)
+    if not state or state.get("version") != GIT_HISTORY_STATE_VERSION:
+        return None
+    return GitHistory.from_dict(state)
+
+
+def save_git_history(conn, project_id: str, history: GitHistory) -> None:
+    if history.head_sha:
+        store_git_history_state(conn, project_id, history.to_dict())
+
+
+def run_git_log(repo_path: Path, *, timeout: float | None = GIT_LOG_TIMEOUT_S) -> Iterator[str]:
+    """Stream git log --numstat in the expected format, one line at a time.
+
+    Only a pipe's worth of output is buffered, so git waits for the parser.
+    The git process is killed if the current request is cancelled or
+    *timeout* passes; a failing git raises ``CalledProcessError`` with the
+    tail of its stderr.
+    """
 
     command = [
         "git",
@@ -128,8 +413,7 @@ def run_git_log(repo_path: Path) -> str:
         "--numstat",
     ]
     logger.info("Running git log in %s", repo_path)
-    result = subprocess.run(command, cwd=str(repo_path), capture_output=True, text=True, check=True)
-    return result.stdout
+    yield from cancellation.stream_subprocess_lines(command, cwd=str(repo_path), timeout=timeout, check=True)
 
 
 def analyze_repository(
@@ -143,14 +427,20 @@ def analyze_repository(
 ) -> dict:
     """Analyze a repository, persist the snapshot, and return the summary."""
 
-    stream = run_git_log(repo_path)
-    entries = parse_git_log_stream(stream)
+    conn = open_db(db_dir)
+    history = fold_git_log(
+        run_git_log(repo_path),
+        load_git_history(conn, project_id),
+        reopen=lambda: run_git_log(repo_path),
+    )
+    entries = history.entries()
     analysis = build_collaboration_analysis(
         entries,
         include_bots=include_bots,
         main_user=main_user,
     )
     collaboration = to_compact_collaboration(analysis)
+    collaboration["file_churn"] = history.churn.summary()
     snapshot = {
         "project_id": project_id,
         "classification": analysis.classification,
@@ -171,7 +461,6 @@ def analyze_repository(
             if external_artifacts:
                 snapshot["external_artifacts"] = external_artifacts
 
-    conn = open_db(db_dir)
     store_analysis_snapshot(
         conn,
         project_id=project_id,
@@ -179,6 +468,7 @@ def analyze_repository(
         primary_contributor=analysis.primary_contributor,
         snapshot=snapshot,
     )
+    save_git_history(conn, project_id, history)
     logger.info("Stored collaboration snapshot for %s", project_id)
     return snapshot
 
@@ -191,6 +481,10 @@ def summarize_to_json(snapshot: dict) -> str:
 
 __all__ = [
     "parse_git_log_stream",
+    "fold_git_log",
+    "GitHistory",
+    "load_git_history",
+    "save_git_history",
     "run_git_log",
     "analyze_repository",
     "summarize_to_json",
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import hashlib
 import json
-import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -11,6 +10,7 @@ from datetime import UTC, datetime
 from pathlib import Path
 from typing import Callable, Iterable, Optional
 
+from . import cancellation, telemetry
 from .logging_utils import get_logger
 from .storage import (
     fetch_latest_contributor_stats,
@@ -116,6 +116,7 @@ class GitHubClient:
         self._token = token
 
     def _request_graphql(self, payload: dict) -> dict:
+        cancellation.check()
         url = "https://api.github.com/graphql"
         body = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(url, data=body, method="POST")
@@ -125,9 +126,11 @@ class GitHubClient:
             req.add_header("Authorization", f"Bearer {self._token}")
         try:
             with urllib.request.urlopen(req) as response:
+                telemetry.record_github_status(response.status)
                 data = response.read().decode("utf-8")
                 return json.loads(data)
         except urllib.error.HTTPError as exc:
+            telemetry.record_github_status(exc.code)
             body = exc.read().decode("utf-8") if exc.fp else ""
             logger.warning("GitHub GraphQL error %s: %s", exc.code, body)
             try:
@@ -136,6 +139,7 @@ class GitHubClient:
                 return {"errors": [{"message": body or str(exc)}]}
 
     def _request_json(self, path: str, params: dict | None = None) -> tuple[object, int]:
+        cancellation.check()
         base_url = "https://api.github.com"
         query = urllib.parse.urlencode(params or {})
         url = f"{base_url}{path}"
@@ -148,9 +152,11 @@ class GitHubClient:
             req.add_header("Authorization", f"Bearer {self._token}")
         try:
             with urllib.request.urlopen(req) as response:
+                telemetry.record_github_status(response.status)
                 payload = response.read().decode("utf-8")
                 return json.loads(payload), response.status
         except urllib.error.HTTPError as exc:
+            telemetry.record_github_status(exc.code)
             body = exc.read().decode("utf-8") if exc.fp else ""
             logger.warning("GitHub API error %s for %s: %s", exc.code, url, body)
             try:
@@ -167,7 +173,7 @@ class GitHubClient:
             data, status = self._request_json(f"/repos/{owner}/{repo}/stats/contributors")
             if status != 202:
                 return data if isinstance(data, list) else []
-            time.sleep(delay)
+            cancellation.sleep(delay)
             logger.info("GitHub stats not ready, retrying (%s/%s)", attempt + 1, retries)
         return []
 
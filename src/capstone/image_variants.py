@@ -0,0 +1,164 @@
+"""Pre-generated fixed-width variants of thumbnails and portfolio images.
+
+Grids display images a couple of hundred pixels wide, so when an image is
+stored we resize it once to each of ``VARIANT_WIDTHS`` and keep the results in
+the content-addressed file store.  Callers ask for a width and get the
+smallest variant at least that wide, or the original when none fits.
+
+Pillow is optional: without it no variants are generated and every request
+falls back to the original bytes.
+"""
+
+from __future__ import annotations
+
+import io
+import sqlite3
+from pathlib import Path
+
+from . import file_store
+from .logging_utils import get_logger
+
+try:
+    from PIL import Image, ImageOps, features as _pil_features
+except ImportError:
+    Image = None
+    ImageOps = None
+    _pil_features = None
+
+logger = get_logger(__name__)
+
+VARIANT_WIDTHS = (128, 256, 512)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def is_available() -> bool:
+    return Image is not None
+
+
+def _output_format() -> tuple[str, str, str]:
+    """Return (Pillow format, mime type, extension), preferring WebP."""
+    if _pil_features is not None and _pil_features.check("webp"):
+        return "WEBP", "image/webp", ".webp"
+    return "JPEG", "image/jpeg", ".jpg"
+
+
+def render_variants(data: bytes, widths: tuple[int, ...] = VARIANT_WIDTHS) -> list[dict]:
+    """Resize *data* to each width narrower than the original.
+
+    Returns ``[{"width", "height", "mime", "ext", "data"}]``; empty when Pillow
+    is missing or the bytes are not a decodable image.
+    """
+    if Image is None:
+        return []
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+            original_width, original_height = source.size
+            fmt, mime, ext = _output_format()
+            has_alpha = source.mode in ("RGBA", "LA") or "transparency" in source.info
+            if fmt == "JPEG" or not has_alpha:
+                source = source.convert("RGB")
+            else:
+                source = source.convert("RGBA")
+
+            variants = []
+            for width in sorted(set(widths)):
+                if width >= original_width:
+                    continue
+                height = max(1, round(original_height * width / original_width))
+                resized = source.resize((width, height), Image.LANCZOS)
+                out = io.BytesIO()
+                if fmt == "WEBP":
+                    resized.save(out, fmt, quality=WEBP_QUALITY, method=4)
+                else:
+                    resized.save(out, fmt, quality=JPEG_QUALITY, optimize=True, progressive=True)
+                variants.append(
+                    {"width": width, "height": height, "mime": mime, "ext": ext, "data": out.getvalue()}
+                )
+            return variants
+    except Exception as exc:
+        logger.debug("Skipping image variants: %s", exc)
+        return []
+
+
+def portfolio_source_key(image_id: str) -> str:
+    return f"portfolio:{image_id}"
+
+
+def store_variants(conn: sqlite3.Connection, source_key: str, data: bytes) -> list[dict]:
+    """Generate and store variants for *source_key* once; later calls are no-ops.
+
+    *source_key* is the original's file_id for thumbnails, or
+    :func:`portfolio_source_key` for portfolio images stored outside the file
+    store.
+    """
+    existing = list_variants(conn, source_key)
+    if existing:
+        return existing
+
+    for variant in render_variants(data):
+        stored = file_store.ensure_bytes(conn, variant["data"], mime=variant["mime"], ext=variant["ext"])
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO image_variants
+                (source_key, width, height, file_id, mime, size_bytes)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                source_key,
+                variant["width"],
+                variant["height"],
+                stored["file_id"],
+                variant["mime"],
+                stored["size_bytes"],
+            ),
+        )
+    conn.commit()
+    return list_variants(conn, source_key)
+
+
+def list_variants(conn: sqlite3.Connection, source_key: str) -> list[dict]:
+    rows = conn.execute(
+        """
+        SELECT width, height, file_id, mime, size_bytes
+        FROM image_variants
+        WHERE source_key = ?
+        ORDER BY width
+        """,
+        (source_key,),
+    ).fetchall()
+    return [
+        {"width": w, "height": h, "file_id": fid, "mime": mime, "size_bytes": size}
+        for w, h, fid, mime, size in rows
+    ]
+
+
+def pick_variant(conn: sqlite3.Connection, source_key: str, width: int | None) -> dict | None:
+    """Smallest stored variant at least *width* wide, or None to serve the original."""
+    if not width or width <= 0:
+        return None
+    for variant in list_variants(conn, source_key):
+        if variant["width"] >= width:
+            return variant
+    return None
+
+
+def variant_path(conn: sqlite3.Connection, variant: dict) -> Path | None:
+    row = conn.execute("SELECT path FROM files WHERE file_id = ?", (variant["file_id"],)).fetchone()
+    if not row:
+        return None
+    path = Path(row[0])
+    return path if path.exists() else None
+
+
+def release_variants(conn: sqlite3.Connection, source_key: str) -> list[Path]:
+    """Drop the variants of *source_key*; returns blob paths to unlink after commit."""
+    orphaned = []
+    for variant in list_variants(conn, source_key):
+        released = file_store.release_bytes(conn, variant["file_id"])
+        if released is not None:
+            orphaned.append(released)
+    conn.execute("DELETE FROM image_variants WHERE source_key = ?", (source_key,))
+    return orphaned
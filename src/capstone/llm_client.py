@@ -1,10 +1,20 @@
+import functools
 import os
 from typing import Optional
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
+
+@functools.lru_cache(maxsize=None)
+def load_openai():
+    """The ``openai.OpenAI`` class, or ``None`` if the package is not installed.
+
+    ``openai`` takes most of a second to import, so it is loaded the first
+    time a client is actually built rather than when this module is imported.
+    """
+    try:
+        from openai import OpenAI
+    except ImportError:
+        return None
+    return OpenAI
 
 
 class LLMClient:
@@ -15,6 +25,7 @@ class LLMClient:
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
+        OpenAI = load_openai()
         if OpenAI is None:
             raise RuntimeError("openai package is not installed")
 
@@ -56,7 +67,8 @@ class OpenAILlmClient:
     def __init__(self, model: str = "gpt-4o-mini", api_key: Optional[str] = None) -> None:
         self.model = model
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self._client = OpenAI(api_key=self.api_key) if self.api_key and OpenAI is not None else None
+        OpenAI = load_openai() if self.api_key else None
+        self._client = OpenAI(api_key=self.api_key) if OpenAI is not None else None
 
     def generate_summary(self, prompt: str) -> str:
         if not self._client:
@@ -80,7 +92,7 @@ def build_default_llm() -> Optional[OpenAILlmClient]:
     """Return a configured OpenAI client, or None when unavailable."""
     if not os.getenv("OPENAI_API_KEY"):
         return None
-    if OpenAI is None:
+    if load_openai() is None:
         return None
     return OpenAILlmClient()
 
@@ -90,4 +102,5 @@ __all__ = [
     "LLMClient",
     "OpenAILlmClient",
     "build_default_llm",
+    "load_openai",
 ]
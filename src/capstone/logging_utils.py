@@ -1,13 +1,61 @@
-"""Shared logging configuration for the capstone analyzer."""
+"""Shared logging configuration for the capstone analyzer.
+
+Loggers never touch the disk themselves.  Every logger returned by
+:func:`get_logger` carries the same :class:`DroppingQueueHandler`, which puts
+records on a bounded in-memory queue without blocking; a single
+``QueueListener`` thread drains it into the two shared files in the log
+directory:
+
+``capstone.log``
+    One JSON object per line (``ts``, ``level``, ``logger``, ``msg`` and,
+    inside a request, ``request_id``).
+``analysis-errors.log``
+    ``ERROR`` and above in the plain text format, for people reading it.
+
+When the queue is full (the disk cannot keep up) records are dropped and
+counted rather than stalling the caller; see :func:`dropped_records`.  The
+log directory is resolved, and the files opened, when the first record is
+emitted rather than at import time.
+
+Environment:
+
+``CAPSTONE_LOG_DIR``           preferred log directory
+``CAPSTONE_LOG_LEVEL``         level for capstone loggers (default ``INFO``)
+``CAPSTONE_LOG_QUEUE_SIZE``    queue bound (default 10000)
+``CAPSTONE_LOG_DEBUG_BURST``   ``DEBUG`` records kept per call site per
+                               ``CAPSTONE_LOG_DEBUG_WINDOW_S`` seconds (default 20 / 10)
+"""
 
 from __future__ import annotations
 
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 import tempfile
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+LOG_LEVEL = logging.getLevelName(os.getenv("CAPSTONE_LOG_LEVEL", "INFO").upper())
+if not isinstance(LOG_LEVEL, int):
+    LOG_LEVEL = logging.INFO
+QUEUE_SIZE = int(os.getenv("CAPSTONE_LOG_QUEUE_SIZE", "10000"))
+DEBUG_BURST = int(os.getenv("CAPSTONE_LOG_DEBUG_BURST", "20"))
+DEBUG_WINDOW_S = float(os.getenv("CAPSTONE_LOG_DEBUG_WINDOW_S", "10"))
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+# Set by RequestIdMiddleware for the duration of a request.
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("capstone_request_id", default=None)
+
 
 def _resolve_default_base_dir() -> Path:
     if sys.platform == "win32":
@@ -45,31 +93,177 @@ def get_base_log_dir() -> Path:
     raise RuntimeError("Unable to find a writable log directory")
 
 
-LOG_DIR = get_base_log_dir()
+_log_dir: Path | None = None
+_log_dir_lock = threading.Lock()
 
 
-def get_logger(name: str) -> logging.Logger:
-    """Return a module-level logger writing to the shared log directory."""
-    logger = logging.getLogger(name)
+def get_log_dir() -> Path:
+    """The log directory, probed once on first use."""
+    global _log_dir
+    if _log_dir is None:
+        with _log_dir_lock:
+            if _log_dir is None:
+                _log_dir = get_base_log_dir()
+    return _log_dir
 
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
 
-        log_path = LOG_DIR / "capstone.log"
-        error_path = LOG_DIR / "analysis-errors.log"
+def __getattr__(name: str):
+    # ``LOG_DIR`` used to be computed at import; keep it readable, lazily.
+    if name == "LOG_DIR":
+        return get_log_dir()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep at most *burst* ``DEBUG`` records per call site per *window_s* seconds.
+
+    Anything at ``INFO`` or above always passes.  Suppressed records are
+    counted in :attr:`suppressed`.
+    """
+
+    def __init__(self, burst: int = DEBUG_BURST, window_s: float = DEBUG_WINDOW_S) -> None:
+        super().__init__()
+        self.burst = burst
+        self.window_s = window_s
+        self.suppressed = 0
+        self._sites: dict[tuple[str, int], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window_s:
+                site = [now, 0]
+                self._sites[key] = site
+            site[1] += 1
+            if site[1] <= self.burst:
+                return True
+            self.suppressed += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` that never blocks: a full queue drops the record."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._listener_started = False
 
-        fmt = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-        )
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render args and tracebacks here, on the caller's thread, but keep the
+        # traceback apart from the message so each file can lay it out.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return record
 
-        handler = logging.FileHandler(log_path, encoding="utf-8")
-        handler.setFormatter(fmt)
-        handler.setLevel(logging.INFO)
-        logger.addHandler(handler)
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if not self._listener_started:
+            _start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-        error_handler = logging.FileHandler(error_path, encoding="utf-8")
-        error_handler.setFormatter(fmt)
-        error_handler.setLevel(logging.ERROR)
-        logger.addHandler(error_handler)
+
+_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+_handler = DroppingQueueHandler(_queue)
+_sampler = DebugSampler()
+_handler.addFilter(_sampler)
+_listener: logging.handlers.QueueListener | None = None
+_listener_lock = threading.Lock()
+
+
+def _file_handlers(log_dir: Path) -> list[logging.Handler]:
+    handler = logging.FileHandler(log_dir / "capstone.log", encoding="utf-8", delay=True)
+    handler.setFormatter(JsonFormatter())
+    handler.setLevel(logging.DEBUG)
+
+    error_handler = logging.FileHandler(log_dir / "analysis-errors.log", encoding="utf-8", delay=True)
+    error_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    error_handler.setLevel(logging.ERROR)
+    return [handler, error_handler]
+
+
+def _start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(
+                _queue, *_file_handlers(get_log_dir()), respect_handler_level=True
+            )
+            _listener.start()
+        _handler._listener_started = True
+
+
+def stop_listener() -> None:
+    """Flush queued records and stop the writer thread (restarts on next record)."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+        _handler._listener_started = False
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def flush() -> None:
+    """Block until every record queued so far has been written."""
+    stop_listener()
+    _start_listener()
+
+
+def dropped_records() -> int:
+    """Records discarded because the queue was full."""
+    return _handler.dropped
+
+
+def sampled_out_records() -> int:
+    """``DEBUG`` records suppressed by per-call-site sampling."""
+    return _sampler.suppressed
+
+
+atexit.register(stop_listener)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a module-level logger writing to the shared log directory."""
+    logger = logging.getLogger(name)
+
+    if not logger.handlers:
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(_handler)
 
     return logger
@@ -6,6 +6,8 @@ import tempfile
 from pathlib import Path
 from typing import Any, List
 
+from . import cancellation
+
 def _latex_header() -> str:
     # Minimal resume-like styling
     return "\n".join(
@@ -296,7 +298,7 @@ def build_portfolio_pdf_with_pandoc(
         engine = _pick_pdf_engine()
 
         try:
-            subprocess.run(
+            cancellation.run_subprocess(
                 [
                     "pandoc",
                     str(md_path),
@@ -313,7 +315,6 @@ def build_portfolio_pdf_with_pandoc(
                     str(tmpdir_path),
                 ],
                 check=True,
-                capture_output=True,
                 text=True,
             )
         except FileNotFoundError as exc:
@@ -0,0 +1,221 @@
+"""Opt-in profiling of individual live requests.
+
+Profiling is off unless ``CAPSTONE_PROFILE_TOKEN`` is set.  A request that
+sends ``X-Profile-Token: <token>`` (plus ``X-Profile: 1``) is profiled on
+demand; with ``CAPSTONE_PROFILE_SAMPLE_RATE`` > 0 that fraction of all
+requests is profiled as well.
+
+A profiled request produces two files in ``CAPSTONE_PROFILE_DIR`` (by
+default ``profiles/`` in the log directory):
+
+``<id>.collapsed``
+    Stacks sampled every ``CAPSTONE_PROFILE_INTERVAL_MS`` from every thread
+    (the event loop and the worker pools), one ``frame;frame;frame count``
+    line per distinct stack, ready for flamegraph tools.  Work for other
+    requests running at the same time is included and labelled by thread.
+``<id>.alloc.txt``
+    The largest ``tracemalloc`` allocation growths between the start and
+    end of the request, by source line.
+
+Only one request is profiled at a time, and the directory is pruned to the
+newest ``CAPSTONE_PROFILE_MAX_FILES`` files after every write.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .logging_utils import get_log_dir, get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_TOKEN = os.getenv("CAPSTONE_PROFILE_TOKEN", "")
+# ``None``: ``<log dir>/profiles``, resolved on first use.
+PROFILE_DIR: Path | None = Path(os.environ["CAPSTONE_PROFILE_DIR"]) if os.getenv("CAPSTONE_PROFILE_DIR") else None
+SAMPLE_RATE = float(os.getenv("CAPSTONE_PROFILE_SAMPLE_RATE", "0") or 0)
+INTERVAL_S = float(os.getenv("CAPSTONE_PROFILE_INTERVAL_MS", "5")) / 1000.0
+MAX_FILES = int(os.getenv("CAPSTONE_PROFILE_MAX_FILES", "40"))
+TOP_ALLOCATIONS = 50
+TRACEMALLOC_FRAMES = 10
+
+_ACTIVE = threading.Lock()
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def is_enabled() -> bool:
+    return bool(PROFILE_TOKEN)
+
+
+def token_matches(token: str | None) -> bool:
+    if not PROFILE_TOKEN or not token:
+        return False
+    # Constant time, so response timing does not reveal how much of a guess matched.
+    return hmac.compare_digest(token.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+def profile_dir() -> Path:
+    return PROFILE_DIR if PROFILE_DIR is not None else get_log_dir() / "profiles"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """Background thread that counts the stacks of every other thread."""
+
+    def __init__(self, interval_s: float = INTERVAL_S) -> None:
+        self.interval_s = max(0.001, interval_s)
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="capstone-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Profile one request; use :func:`begin` so only one runs at a time."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.started = time.time()
+        self.profile_id = _profile_id(label, self.started)
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._before = tracemalloc.take_snapshot()
+        self._sampler = StackSampler().start()
+
+    def finish(self, status: int) -> str | None:
+        """Stop profiling, write the files and return the profile id (``None`` on failure)."""
+        try:
+            self._sampler.stop()
+            after = tracemalloc.take_snapshot()
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+            duration = time.time() - self.started
+            profile_id = self.profile_id
+            directory = profile_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"{profile_id}.collapsed").write_text(self._sampler.collapsed(), encoding="utf-8")
+            (directory / f"{profile_id}.alloc.txt").write_text(
+                _allocation_report(self._before, after, self.label, status, duration, self._sampler.samples),
+                encoding="utf-8",
+            )
+            prune()
+            return profile_id
+        except OSError:
+            logger.warning("Failed to write request profile for %s", self.label, exc_info=True)
+            return None
+        finally:
+            _ACTIVE.release()
+
+
+def begin(label: str) -> RequestProfile | None:
+    """Start profiling unless another request is already being profiled."""
+    if not _ACTIVE.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfile(label)
+    except Exception:
+        _ACTIVE.release()
+        raise
+
+
+def _profile_id(label: str, started: float) -> str:
+    stamp = datetime.fromtimestamp(started, tz=timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:60] or "request"
+    return f"{stamp}-{slug}"
+
+
+def _allocation_report(before, after, label: str, status: int, duration: float, samples: int) -> str:
+    lines = [
+        f"# {label}",
+        f"# status={status} duration_s={duration:.3f} stack_samples={samples}",
+        "# size_diff_bytes count_diff location",
+    ]
+    for stat in after.compare_to(before, "lineno")[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size_diff:+d} {stat.count_diff:+d} {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+def prune(max_files: int | None = None) -> int:
+    """Delete the oldest files beyond *max_files*; returns how many were removed."""
+    limit = MAX_FILES if max_files is None else max_files
+    directory = profile_dir()
+    if not directory.exists():
+        return 0
+    files = sorted(
+        (p for p in directory.iterdir() if p.is_file()),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    removed = 0
+    for path in files[limit:]:
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def list_profiles() -> list[dict]:
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    entries = []
+    for path in sorted(directory.iterdir(), key=lambda p: p.name, reverse=True):
+        if path.is_file():
+            stat = path.stat()
+            entries.append(
+                {
+                    "name": path.name,
+                    "size_bytes": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                }
+            )
+    return entries
+
+
+def profile_path(name: str) -> Path | None:
+    if not _NAME_RE.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
@@ -0,0 +1,264 @@
+"""Admission control for the expensive API endpoints.
+
+Requests are sorted into a few endpoint classes (uploads, GitHub imports,
+AI calls, PDF builds); everything else is never limited.  Each class has
+
+* a token bucket per user (per client address for guests): ``burst``
+  requests at once, refilled at ``per_minute``; and
+* a cap on how many requests of the class run at once across all users.
+
+A request over either limit is rejected with the number of seconds after
+which a retry can succeed, which the middleware sends as ``429`` with
+``Retry-After``.
+
+Buckets live in process.  With several server workers, set
+``CAPSTONE_RATE_LIMIT_DB`` to a SQLite file shared by all of them so a user
+has one bucket rather than one per worker; the concurrency caps stay per
+worker.  Limits per class can be changed with
+``CAPSTONE_RATE_LIMIT_<CLASS>=<per_minute>,<burst>,<max_concurrent>`` and
+``CAPSTONE_RATE_LIMIT=0`` turns admission control off.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+ENABLED = os.getenv("CAPSTONE_RATE_LIMIT", "1") not in {"0", "false", "no", "off"}
+BUSY_RETRY_AFTER_S = 2
+# Longest wait for the shared bucket database before admitting unmetered.
+STORE_TIMEOUT_S = 1.0
+MAX_MEMORY_BUCKETS = 10000
+
+
+@dataclass(frozen=True)
+class EndpointClass:
+    name: str
+    per_minute: float
+    burst: int
+    max_concurrent: int
+    routes: tuple[tuple[str, re.Pattern], ...]
+    # Only limit when the query string matches (e.g. ``format=pdf`` exports).
+    query: re.Pattern | None = None
+
+    def matches(self, method: str, path: str, query: str) -> bool:
+        if self.query is not None and not self.query.search(query):
+            return False
+        return any(method == m and pattern.match(path) for m, pattern in self.routes)
+
+
+def _routes(*entries: tuple[str, str]) -> tuple[tuple[str, re.Pattern], ...]:
+    return tuple((method, re.compile(pattern)) for method, pattern in entries)
+
+
+DEFAULT_CLASSES: tuple[EndpointClass, ...] = (
+    EndpointClass(
+        "upload",
+        per_minute=30,
+        burst=20,
+        max_concurrent=4,
+        routes=_routes(
+            ("POST", r"^/projects/upload(-bundle|-batch)?$"),
+            ("POST", r"^/projects/upload-sessions/[^/]+/finalize$"),
+        ),
+    ),
+    EndpointClass(
+        "github",
+        per_minute=6,
+        burst=3,
+        max_concurrent=2,
+        routes=_routes(("POST", r"^/github/(import|pull)$")),
+    ),
+    EndpointClass(
+        "ai",
+        per_minute=20,
+        burst=5,
+        max_concurrent=4,
+        routes=_routes(("POST", r"^/errors/analyze$"), ("POST", r"^/sienna/(chat|voice)$")),
+    ),
+    EndpointClass(
+        "pdf",
+        per_minute=10,
+        burst=5,
+        max_concurrent=2,
+        routes=_routes(("POST", r"^/resumes/render-pdf$")),
+    ),
+    EndpointClass(
+        "pdf_export",
+        per_minute=10,
+        burst=5,
+        max_concurrent=2,
+        routes=_routes(("GET", r"^/(resumes|portfolio)/[^/]+/export$")),
+        query=re.compile(r"(^|&)format=pdf(&|$)", re.IGNORECASE),
+    ),
+)
+
+
+def _from_env(cls: EndpointClass) -> EndpointClass:
+    raw = os.getenv(f"CAPSTONE_RATE_LIMIT_{cls.name.upper()}")
+    if not raw:
+        return cls
+    try:
+        per_minute, burst, max_concurrent = (float(part) for part in raw.split(","))
+    except ValueError:
+        logger.warning("Ignoring malformed CAPSTONE_RATE_LIMIT_%s=%r", cls.name.upper(), raw)
+        return cls
+    return replace(cls, per_minute=per_minute, burst=int(burst), max_concurrent=int(max_concurrent))
+
+
+def _take(tokens: float, updated: float, now: float, rate_per_s: float, burst: int) -> tuple[float, float]:
+    """Refill and take one token; returns ``(tokens left, retry after seconds)``."""
+    tokens = min(float(burst), tokens + max(0.0, now - updated) * rate_per_s)
+    if tokens >= 1.0:
+        return tokens - 1.0, 0.0
+    if rate_per_s <= 0:
+        return tokens, math.inf
+    return tokens, (1.0 - tokens) / rate_per_s
+
+
+class MemoryBuckets:
+    """Token buckets for one process."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate_per_s: float, burst: int, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens, retry_after = _take(tokens, updated, now, rate_per_s, burst)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > MAX_MEMORY_BUCKETS:
+                self._evict(now)
+        return retry_after
+
+    def _evict(self, now: float) -> None:
+        # Drop the buckets idle longest; a new bucket starts full, which is
+        # what an idle one would have refilled to anyway.
+        oldest = sorted(self._buckets.items(), key=lambda item: item[1][1])
+        for key, _ in oldest[: len(oldest) // 2]:
+            del self._buckets[key]
+
+
+class SqliteBuckets:
+    """Token buckets shared by every process using the same database file."""
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=STORE_TIMEOUT_S, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key     TEXT PRIMARY KEY,
+                tokens  REAL NOT NULL,
+                updated REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate_per_s: float, burst: int, now: float | None = None) -> float:
+        # Wall-clock time: the monotonic clock is not comparable across processes.
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row is not None else (float(burst), now)
+                tokens, retry_after = _take(tokens, updated, now, rate_per_s, burst)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return retry_after
+
+
+@dataclass(frozen=True)
+class Rejection:
+    endpoint_class: str
+    reason: str  # "rate" or "busy"
+    retry_after_s: int
+
+
+class Admission:
+    """A granted request; call :meth:`release` (or use ``with``) when it finishes."""
+
+    def __init__(self, limiter: "RateLimiter", endpoint_class: str) -> None:
+        self._limiter = limiter
+        self.endpoint_class = endpoint_class
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._limiter._release(self.endpoint_class)
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class RateLimiter:
+    def __init__(self, classes: tuple[EndpointClass, ...] | None = None, buckets=None) -> None:
+        self.classes = tuple(_from_env(c) for c in (DEFAULT_CLASSES if classes is None else classes))
+        if buckets is None:
+            db_path = os.getenv("CAPSTONE_RATE_LIMIT_DB")
+            buckets = SqliteBuckets(db_path) if db_path else MemoryBuckets()
+        self.buckets = buckets
+        self._running: dict[str, int] = {c.name: 0 for c in self.classes}
+        self._lock = threading.Lock()
+
+    def classify(self, method: str, path: str, query: str = "") -> EndpointClass | None:
+        for cls in self.classes:
+            if cls.matches(method, path, query):
+                return cls
+        return None
+
+    def admit(self, cls: EndpointClass, client_key: str) -> Admission | Rejection:
+        """Take a token and a concurrency slot for *client_key*, or say why not."""
+        with self._lock:
+            if self._running[cls.name] >= cls.max_concurrent:
+                return Rejection(cls.name, "busy", BUSY_RETRY_AFTER_S)
+            self._running[cls.name] += 1
+        try:
+            retry_after = self.buckets.take(f"{cls.name}:{client_key}", cls.per_minute / 60.0, cls.burst)
+        except sqlite3.Error:
+            # A shared bucket store that is unavailable must not take the API down.
+            logger.warning("Rate limit store unavailable; admitting request", exc_info=True)
+            retry_after = 0.0
+        if retry_after > 0:
+            self._release(cls.name)
+            seconds = 3600 if math.isinf(retry_after) else max(1, math.ceil(retry_after))
+            return Rejection(cls.name, "rate", seconds)
+        return Admission(self, cls.name)
+
+    def running(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._running)
+
+    def _release(self, name: str) -> None:
+        with self._lock:
+            self._running[name] -= 1
@@ -4,11 +4,12 @@ from __future__ import annotations
 
 import re
 import shutil
-import subprocess
 import tempfile
 from pathlib import Path
 from typing import Any, Dict, Iterable
 
+from . import cancellation
+
 
 def _latex_escape(text: str) -> str:
     mapping = {
@@ -514,10 +515,10 @@ def build_pdf_with_latex(
         else:
             cmd = [engine, "-interaction=nonstopmode", "-halt-on-error", tex_path.name]
 
-        proc = subprocess.run(
+        # Killed if the request is cancelled; the temp dir goes with it.
+        proc = cancellation.run_subprocess(
             cmd,
             cwd=tmp,
-            capture_output=True,
             text=True,
             encoding="utf-8",
             errors="replace",
@@ -0,0 +1,235 @@
+"""Sign-in sessions for the API, shared by every server process.
+
+Sessions live in a small SQLite database in WAL mode so several uvicorn
+workers can create, validate and revoke them concurrently.  Tokens are
+stored as SHA-256 digests, looked up through the primary key, and expire
+``CAPSTONE_SESSION_TTL_DAYS`` (default 30) days after sign-in; expired rows
+are purged every ``PURGE_INTERVAL_S`` seconds by a daemon thread that each
+process starts on first use, so lookups never wait on that write.
+
+Validating a token is the hot path (every authenticated request), so
+successful lookups are cached in process for ``CAPSTONE_SESSION_CACHE_TTL_S``
+seconds (default 5).  A session revoked by another worker therefore stays
+usable there for at most that long; the worker that revokes it drops it
+from its own cache immediately.
+
+The store behaves like the dict it replaces (``store[token] = {"user": ...}``,
+``store.get(token)``, ``store.pop(token, None)``), apart from iteration.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from capstone.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+SESSION_TTL_S = float(os.getenv("CAPSTONE_SESSION_TTL_DAYS", "30")) * 86400
+CACHE_TTL_S = float(os.getenv("CAPSTONE_SESSION_CACHE_TTL_S", "5"))
+PURGE_INTERVAL_S = 600.0
+DB_FILENAME = "auth_sessions.db"
+
+_MISSING = object()
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionStore:
+    """SQLite-backed token -> session mapping with a short-lived read cache."""
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        *,
+        ttl_s: float = SESSION_TTL_S,
+        cache_ttl_s: float = CACHE_TTL_S,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.cache_ttl_s = cache_ttl_s
+        self._path: Path | None = Path(db_path) if db_path is not None else None
+        self._conn: sqlite3.Connection | None = None
+        self._conn_path: Path | None = None
+        self._lock = threading.Lock()
+        # token digest -> (valid until, session JSON)
+        self._cache: dict[str, tuple[float, str]] = {}
+        self._purge_stop: threading.Event | None = None
+
+    # ----- connection -----
+    @property
+    def db_path(self) -> Path:
+        if self._path is not None:
+            return self._path
+        from capstone import storage
+
+        return Path(os.getenv("CAPSTONE_SESSION_DB") or storage.BASE_DIR / DB_FILENAME)
+
+    def open(self, db_path: str | Path | None) -> None:
+        """Point the store at *db_path* (``None``: the default location)."""
+        self.close()
+        with self._lock:
+            self._path = Path(db_path) if db_path is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._purge_stop is not None:
+                self._purge_stop.set()
+                self._purge_stop = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held.  The default location follows
+        # ``storage.BASE_DIR``, so reopen if that moved.
+        path = self.db_path
+        if self._conn is not None and path != self._conn_path:
+            self._conn.close()
+            self._conn = None
+            self._cache.clear()
+        if self._conn is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout = 5000")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    token_hash TEXT PRIMARY KEY,
+                    username   TEXT,
+                    data       TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+                """
+            )
+            self._conn = conn
+            self._conn_path = path
+            self._start_purger()
+        return self._conn
+
+    # ----- sessions -----
+    def get(self, token: str | None, default=None):
+        if not token:
+            return default
+        key = _digest(token)
+        now = time.time()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            return json.loads(cached[1])
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data, expires_at FROM sessions WHERE token_hash = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            self._cache.pop(key, None)
+            return default
+        data, expires_at = row
+        self._cache[key] = (min(now + self.cache_ttl_s, expires_at), data)
+        return json.loads(data)
+
+    def __getitem__(self, token: str) -> dict:
+        session = self.get(token, _MISSING)
+        if session is _MISSING:
+            raise KeyError(token)
+        return session
+
+    def __contains__(self, token: object) -> bool:
+        return isinstance(token, str) and self.get(token) is not None
+
+    def __setitem__(self, token: str, session: dict) -> None:
+        """Create the session, or replace its data keeping the original expiry."""
+        key = _digest(token)
+        data = json.dumps(session)
+        username = ((session.get("user") or {}).get("username")) if isinstance(session, dict) else None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT INTO sessions (token_hash, username, data, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(token_hash) DO UPDATE SET username = excluded.username, data = excluded.data
+                """,
+                (key, username, data, now, now + self.ttl_s),
+            )
+            conn.commit()
+            self._cache.pop(key, None)
+
+    def __delitem__(self, token: str) -> None:
+        if self.pop(token, _MISSING) is _MISSING:
+            raise KeyError(token)
+
+    def pop(self, token: str | None, default=None):
+        """Revoke *token*; returns its session, or *default* if there was none."""
+        session = self.get(token, _MISSING)
+        if session is _MISSING:
+            return default
+        key = _digest(token)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM sessions WHERE token_hash = ?", (key,))
+            conn.commit()
+            self._cache.pop(key, None)
+        return session
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM sessions")
+            conn.commit()
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    # ----- expiry -----
+    def purge_expired(self) -> int:
+        """Delete expired sessions; returns how many were removed."""
+        with self._lock:
+            return self._purge(time.time())
+
+    def _start_purger(self) -> None:
+        # Called with the lock held.
+        if self._purge_stop is not None:
+            return
+        stop = self._purge_stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(PURGE_INTERVAL_S):
+                with self._lock:
+                    if stop.is_set():
+                        return
+                    self._purge(time.time())
+
+        threading.Thread(target=run, name="capstone-session-purge", daemon=True).start()
+
+    def _purge(self, now: float) -> int:
+        # Called with the lock held.
+        conn = self._connect()
+        try:
+            removed = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            conn.commit()
+        except sqlite3.OperationalError:
+            # Another worker holds the write lock; it or a later call will purge.
+            logger.debug("Skipped session purge: database busy", exc_info=True)
+            return 0
+        self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        if removed:
+            logger.info("Purged %d expired session(s)", removed)
+        return removed
@@ -19,8 +19,10 @@ import json
 import sqlite3
 import uuid
 from pathlib import Path
+from time import perf_counter
 from typing import Iterable, Optional
 from datetime import datetime
+from . import telemetry
 from .config import CONFIG_SECRET
 from .logging_utils import get_logger
 import os
@@ -81,8 +83,9 @@ BASE_DIR = get_base_data_dir()
 _DB_HANDLE: Optional[sqlite3.Connection] = None
 _DB_PATH: Optional[Path] = None
 CURRENT_USER = None
-_REQUEST_STORAGE_USER: contextvars.ContextVar[str | None] = contextvars.ContextVar(
-    "storage_current_user", default=None
+_UNBOUND = object()  # no request user bound in this context
+_REQUEST_STORAGE_USER: contextvars.ContextVar[object] = contextvars.ContextVar(
+    "storage_current_user", default=_UNBOUND
 )
 _SCHEMA_READY: set[str] = set()
 
@@ -208,6 +211,22 @@ def _initialize_schema(conn: sqlite3.Connection) -> None:
         )
     """)
 
+    # Pack mode (file_store): distinct zip members stored once, keyed by
+    # (crc32, file_size, sha256 of the compressed bytes).
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pack_members (
+            crc32 INTEGER NOT NULL,
+            file_size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            compress_size INTEGER NOT NULL,
+            compress_type INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (crc32, file_size, content_hash)
+        )
+    """)
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS privacy_consent (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -242,6 +261,16 @@ def _initialize_schema(conn: sqlite3.Connection) -> None:
         )
     """)
 
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pack_manifests (
+            file_id TEXT PRIMARY KEY,
+            manifest JSON NOT NULL,
+            member_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (file_id) REFERENCES files(file_id) ON DELETE CASCADE
+        )
+    """)
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS project_analysis (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -286,12 +315,53 @@ def _initialize_schema(conn: sqlite3.Connection) -> None:
             project_id TEXT NOT NULL,
             filename TEXT,
             content_type TEXT,
-            image_b64 TEXT NOT NULL,
+            file_id TEXT NOT NULL,
+            size_bytes INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (project_id) REFERENCES projects(project_id) ON DELETE CASCADE
         )
     """)
 
+    # Head commit and running per-author totals of the last analysed git log,
+    # so a later upload extending that history only parses the new commits.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS git_history_state (
+            project_id TEXT PRIMARY KEY,
+            head_sha TEXT NOT NULL,
+            commit_count INTEGER NOT NULL,
+            aggregates TEXT NOT NULL,
+            updated_at TEXT DEFAULT (datetime('now')),
+            FOREIGN KEY (project_id) REFERENCES projects(project_id) ON DELETE CASCADE
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            session_id TEXT PRIMARY KEY,
+            project_id TEXT,
+            filename TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            received_bytes INTEGER NOT NULL DEFAULT 0,
+            expected_sha256 TEXT,
+            part_path TEXT NOT NULL,
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS image_variants (
+            source_key TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER,
+            file_id TEXT NOT NULL,
+            mime TEXT,
+            size_bytes INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_key, width)
+        )
+    """)
+
     conn.execute("""
         CREATE TABLE IF NOT EXISTS project_evidence (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -392,7 +462,17 @@ def _initialize_schema(conn: sqlite3.Connection) -> None:
         )
     """)
 
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL
+        )
+    """)
+
     conn.execute("CREATE INDEX IF NOT EXISTS idx_project_images_project ON project_images (project_id, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_upload_sessions_updated ON upload_sessions (updated_at)")
     conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_contributors_identity ON contributors (github_username, COALESCE(email, ''))")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_project_contributors_project ON project_contributors (project_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_project_contributors_contributor ON project_contributors (contributor_id)")
@@ -402,6 +482,13 @@ def _initialize_schema(conn: sqlite3.Connection) -> None:
     conn.execute("CREATE INDEX IF NOT EXISTS idx_project_evidence_project ON project_evidence (project_id, created_at)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_files_hash ON files (hash)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_file ON uploads (file_id)")
+    # Keyset pagination sort keys (see capstone.api.pagination).
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_upload ON uploads (upload_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_created ON uploads (created_at, upload_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_project_analysis_created ON project_analysis (created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contributors_username ON contributors (LOWER(github_username), id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_log_created ON activity_log (created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_log_level ON activity_log (level, created_at, id)")
 
     conn.execute("PRAGMA foreign_keys = ON")
     conn.commit()
@@ -475,8 +562,55 @@ def _nuclear_reset(conn: sqlite3.Connection) -> None:
     _initialize_schema(conn)
 
 
+def _migrate_project_images(conn: sqlite3.Connection) -> None:
+    """Move thumbnails stored inline as project_images.image_b64 into the file store."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info('project_images')")}
+    if "image_b64" not in columns:
+        return
+
+    from . import file_store  # local import: file_store imports this module
+
+    if "file_id" not in columns:
+        conn.execute("ALTER TABLE project_images ADD COLUMN file_id TEXT")
+    if "size_bytes" not in columns:
+        conn.execute("ALTER TABLE project_images ADD COLUMN size_bytes INTEGER")
+
+    rows = conn.execute(
+        "SELECT id, filename, content_type, image_b64 FROM project_images WHERE file_id IS NULL"
+    ).fetchall()
+    moved = 0
+    for image_id, filename, content_type, image_b64 in rows:
+        try:
+            image_bytes = base64.b64decode(image_b64 or "", validate=True)
+        except ValueError:
+            image_bytes = b""
+        if not image_bytes:
+            logger.warning("Dropping project image %s: stored thumbnail is not valid base64", image_id)
+            conn.execute("DELETE FROM project_images WHERE id = ?", (image_id,))
+            continue
+        ext = Path(filename).suffix.lower() if filename else ""
+        stored = file_store.ensure_bytes(conn, image_bytes, mime=content_type, ext=ext)
+        conn.execute(
+            "UPDATE project_images SET file_id = ?, size_bytes = ? WHERE id = ?",
+            (stored["file_id"], stored["size_bytes"], image_id),
+        )
+        moved += 1
+
+    conn.execute("ALTER TABLE project_images DROP COLUMN image_b64")
+    conn.commit()
+    logger.info("Moved %d project thumbnails into the file store", moved)
+
+
 def _run_migrations(conn: sqlite3.Connection) -> None:
-    """Check schema currency; nuclear-reset when stale."""
+    """Bring an existing database up to date in place; nuclear-reset only as a last resort.
+
+    Tables and indexes added since the database was created are filled in by
+    _initialize_schema (CREATE ... IF NOT EXISTS), so a new table never costs
+    the user their data; columns that changed shape are moved over by the
+    _migrate_* steps. Only a schema that still differs afterwards is reset.
+    """
+    _migrate_project_images(conn)
+    _initialize_schema(conn)
     if not _schema_matches_expected(conn):
         _nuclear_reset(conn)
 
@@ -515,23 +649,105 @@ def fetch_error_results(conn):
     return results
 
 
+def insert_activity_events(conn: sqlite3.Connection, events: list[tuple[str, str, str]]) -> None:
+    """Append ``(created_at, level, message)`` rows to the activity log."""
+    conn.executemany(
+        "INSERT INTO activity_log (created_at, level, message) VALUES (?, ?, ?)",
+        events,
+    )
+
+
+def prune_activity_events(conn: sqlite3.Connection, *, max_rows: int, older_than: str | None = None) -> int:
+    """Keep the newest *max_rows* events and drop those created before *older_than*."""
+    removed = conn.execute(
+        "DELETE FROM activity_log WHERE id <= (SELECT MAX(id) FROM activity_log) - ?",
+        (int(max_rows),),
+    ).rowcount
+    if older_than is not None:
+        removed += conn.execute("DELETE FROM activity_log WHERE created_at < ?", (older_than,)).rowcount
+    return removed
+
+
+def _activity_filters(level: str | None, since: str | None, until: str | None) -> tuple[list[str], list]:
+    clauses: list[str] = []
+    params: list = []
+    if level is not None:
+        clauses.append("level = ?")
+        params.append(level)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    return clauses, params
+
+
+def fetch_activity_events(
+    conn: sqlite3.Connection,
+    *,
+    level: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> list[dict]:
+    """Activity events newest first by (created_at, id), optionally filtered.
+
+    *since* / *until* bound ``created_at`` (inclusive / exclusive); *after* is
+    the key of the last event on the previous page.
+    """
+    clauses, params = _activity_filters(level, since, until)
+    if after is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT ?"
+        params.append(int(limit))
+    rows = conn.execute(
+        f"""
+        SELECT id, created_at, level, message
+        FROM activity_log
+        {where}
+        ORDER BY created_at DESC, id DESC
+        {limit_sql}
+        """,
+        params,
+    ).fetchall()
+    return [{"id": r[0], "timestamp": r[1], "level": r[2], "message": r[3]} for r in rows]
+
+
+def count_activity_events(
+    conn: sqlite3.Connection,
+    *,
+    level: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> int:
+    """Number of activity events matching the filters of :func:`fetch_activity_events`."""
+    clauses, params = _activity_filters(level, since, until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return conn.execute(f"SELECT COUNT(*) FROM activity_log {where}", params).fetchone()[0]
+
+
 def set_current_user(user_id: str | None):
+    """Set the process-wide storage user (CLI and scripts).
+
+    Request handling never uses this: the server binds each request's user
+    with :func:`bind_request_user`, which takes precedence over this value.
+    """
     global CURRENT_USER
-    resolved = resolve_storage_user_key(user_id)
-    CURRENT_USER = resolved
-    _REQUEST_STORAGE_USER.set(resolved)
+    CURRENT_USER = resolve_storage_user_key(user_id)
 
 
 def bind_request_user(user_id: str | None) -> contextvars.Token:
     """
-    Bind request-local storage user context and mirror it globally for legacy code.
+    Bind the storage user for the current request (``None`` = guest).
     Returns a context token so middleware can reset after the request completes.
     """
-    resolved = resolve_storage_user_key(user_id)
-    token = _REQUEST_STORAGE_USER.set(resolved)
-    global CURRENT_USER
-    CURRENT_USER = resolved
-    return token
+    return _REQUEST_STORAGE_USER.set(resolve_storage_user_key(user_id))
 
 
 def reset_request_user(token: contextvars.Token) -> None:
@@ -544,7 +760,8 @@ def reset_request_user(token: contextvars.Token) -> None:
 
 def get_current_user() -> str | None:
     scoped_user = _REQUEST_STORAGE_USER.get()
-    if scoped_user is not None:
+    if scoped_user is not _UNBOUND:
+        # A bound guest stays a guest; it never falls back to the process user.
         return resolve_storage_user_key(scoped_user)
     return resolve_storage_user_key(CURRENT_USER)
 
@@ -580,15 +797,46 @@ def get_database_path(user=_UNSET) -> Path:
 # -----------------------------
 # DB lifecycle
 # -----------------------------
+class _TimedConnection(sqlite3.Connection):
+    """Connection that reports statement counts and times to ``telemetry``."""
+
+    def execute(self, sql, *args):
+        start = perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            telemetry.record_sqlite(_sql_operation(sql), perf_counter() - start)
+
+    def executemany(self, sql, *args):
+        start = perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            telemetry.record_sqlite(_sql_operation(sql), perf_counter() - start)
+
+    def executescript(self, script):
+        start = perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            telemetry.record_sqlite("script", perf_counter() - start)
+
+
+def _sql_operation(sql: str) -> str:
+    head = sql.lstrip().split(None, 1)
+    verb = head[0].lower() if head else ""
+    return verb if verb in {"select", "insert", "update", "delete", "with", "pragma", "create"} else "other"
+
+
 def open_db(base_dir: Path | None = None, *, user=_UNSET) -> sqlite3.Connection:
     target_dir = base_dir or BASE_DIR
     target_dir.mkdir(parents=True, exist_ok=True)
     db_path = get_database_path(user=user)
     db_key = str(db_path.resolve())
 
-    logger.info("Opening database at %s", db_path)
+    logger.debug("Opening database at %s", db_path)
 
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path, check_same_thread=False, factory=_TimedConnection)
     conn.row_factory = sqlite3.Row
 
     try:
@@ -695,6 +943,34 @@ def store_analysis_snapshot(
     conn.commit()
 
 
+def store_git_history_state(conn: sqlite3.Connection, project_id: str, state: dict) -> None:
+    """Replace the stored git history aggregates (``GitHistory.to_dict()``) of a project."""
+    conn.execute(
+        """
+        INSERT INTO git_history_state (project_id, head_sha, commit_count, aggregates, updated_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT(project_id) DO UPDATE SET
+            head_sha = excluded.head_sha,
+            commit_count = excluded.commit_count,
+            aggregates = excluded.aggregates,
+            updated_at = excluded.updated_at
+        """,
+        (project_id, state["head_sha"], state["commit_count"], json.dumps(state)),
+    )
+    conn.commit()
+
+
+def fetch_git_history_state(conn: sqlite3.Connection, project_id: str) -> dict | None:
+    """Return the git history aggregates stored for *project_id*, if any."""
+    if not project_id:
+        return None
+    row = conn.execute(
+        "SELECT aggregates FROM git_history_state WHERE project_id = ?",
+        (project_id,),
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
 def fetch_latest_snapshot(conn: sqlite3.Connection, project_id: str) -> dict | None:
     """Return the most recent snapshot for the given project, if any."""
     if not project_id:
@@ -1325,37 +1601,49 @@ def upsert_project_thumbnail(
     image_bytes: bytes,
     filename: str | None = None,
     content_type: str | None = None,
-) -> None:
+) -> dict:
     """
     Store an image for a project. Latest row becomes the project's thumbnail.
-    We keep history by inserting a new row.
+    We keep history by inserting a new row; the bytes live in the
+    content-addressed file store and the row only references them.
     """
     if not project_id:
         raise ValueError("project_id must be provided")
     if not image_bytes:
         raise ValueError("image_bytes must be provided")
 
-    image_b64 = base64.b64encode(image_bytes).decode("ascii")
+    from . import file_store  # local import: file_store imports this module
+
+    ext = Path(filename).suffix.lower() if filename else ""
+    stored = file_store.ensure_bytes(conn, image_bytes, mime=content_type, ext=ext)
     conn.execute(
         """
-        INSERT INTO project_images (project_id, filename, content_type, image_b64)
-        VALUES (?, ?, ?, ?)
+        INSERT INTO project_images (project_id, filename, content_type, file_id, size_bytes)
+        VALUES (?, ?, ?, ?, ?)
         """,
-        (project_id, filename, content_type, image_b64),
+        (project_id, filename, content_type, stored["file_id"], stored["size_bytes"]),
     )
     conn.commit()
+    return {
+        "project_id": project_id,
+        "filename": filename,
+        "content_type": content_type,
+        "file_id": stored["file_id"],
+        "size_bytes": stored["size_bytes"],
+    }
 
 
 def fetch_project_thumbnail_meta(conn: sqlite3.Connection, project_id: str) -> dict | None:
     """
-    Return metadata for the latest thumbnail: {project_id, filename, content_type, created_at}
+    Return metadata for the latest thumbnail:
+    {project_id, filename, content_type, file_id, size_bytes, created_at}
     """
     if not project_id:
         return None
 
     row = conn.execute(
         """
-        SELECT project_id, filename, content_type, created_at
+        SELECT project_id, filename, content_type, file_id, size_bytes, created_at
         FROM project_images
         WHERE project_id = ?
         ORDER BY datetime(created_at) DESC, id DESC
@@ -1367,11 +1655,13 @@ def fetch_project_thumbnail_meta(conn: sqlite3.Connection, project_id: str) -> d
     if not row:
         return None
 
-    pid, filename, content_type, created_at = row
+    pid, filename, content_type, file_id, size_bytes, created_at = row
     return {
         "project_id": pid,
         "filename": filename,
         "content_type": content_type,
+        "file_id": file_id,
+        "size_bytes": size_bytes,
         "created_at": created_at,
     }
 
@@ -1380,26 +1670,16 @@ def fetch_project_thumbnail_bytes(conn: sqlite3.Connection, project_id: str) ->
     """
     Return raw bytes for the latest thumbnail image for this project.
     """
-    if not project_id:
+    meta = fetch_project_thumbnail_meta(conn, project_id)
+    if not meta:
         return None
 
-    row = conn.execute(
-        """
-        SELECT image_b64
-        FROM project_images
-        WHERE project_id = ?
-        ORDER BY datetime(created_at) DESC, id DESC
-        LIMIT 1
-        """,
-        (project_id,),
-    ).fetchone()
-
-    if not row:
-        return None
+    from . import file_store
 
     try:
-        return base64.b64decode(row[0].encode("ascii"))
-    except Exception:
+        with file_store.open_file(conn, meta["file_id"]) as fh:
+            return fh.read()
+    except FileNotFoundError:
         return None
 
 
@@ -2024,21 +2304,39 @@ def _section_row_to_dict(row: tuple, items: list[dict] | None = None) -> dict:
     return d
 
 
-def fetch_resumes(conn: sqlite3.Connection, user_id: int) -> list[dict]:
-    """List all resumes for a user (no sections/items, but includes section_count)."""
+def fetch_resumes(
+    conn: sqlite3.Connection,
+    user_id: int,
+    *,
+    limit: int | None = None,
+    after: tuple[str, str] | None = None,
+) -> list[dict]:
+    """List resumes for a user (no sections/items, but includes section_count).
+
+    Newest first by (updated_at, id); *after* is the key of the last resume on
+    the previous page and *limit* bounds the page.
+    """
+    params: list = [int(user_id)]
+    keyset = ""
+    if after is not None:
+        keyset = "AND (r.updated_at, r.id) < (?, ?)"
+        params.extend(after)
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT ?"
+        params.append(int(limit))
     rows = conn.execute(
-        """
+        f"""
         SELECT r.id, r.user_id, r.title, r.target_role, r.status,
                r.created_at, r.updated_at,
-               COUNT(s.id) AS section_count
+               (SELECT COUNT(*) FROM resume_sections s
+                WHERE s.resume_id = r.id AND s.is_enabled = 1) AS section_count
         FROM resumes r
-        LEFT JOIN resume_sections s
-               ON s.resume_id = r.id AND s.is_enabled = 1
-        WHERE r.user_id = ?
-        GROUP BY r.id
-        ORDER BY datetime(r.updated_at) DESC, r.id DESC
+        WHERE r.user_id = ? {keyset}
+        ORDER BY r.updated_at DESC, r.id DESC
+        {limit_sql}
         """,
-        (int(user_id),),
+        params,
     ).fetchall()
     return [
         {
@@ -2721,6 +3019,9 @@ __all__ = [
     "fetch_latest_snapshots",
     "fetch_latest_snapshots_for_projects",
     "fetch_project_snapshot_history",
+    # incremental git history
+    "store_git_history_state",
+    "fetch_git_history_state",
     # github sources
     "store_github_source",
     "fetch_github_source",
@@ -1,9 +1,8 @@
-import boto3
 import shutil
 import tempfile
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from botocore.exceptions import ClientError
 
 import capstone.storage as storage
 from capstone import file_store
@@ -17,12 +16,48 @@ SECRET_KEY = "fe1279fca06338da7b60eecac66f9489b871d89076f9a296a1c0176be4235807"
 
 BUCKET_NAME = "loom-storage"
 
-s3 = boto3.client(
-    "s3",
-    endpoint_url=f"https://{ACCOUNT_ID}.r2.cloudflarestorage.com",
-    aws_access_key_id=ACCESS_KEY,
-    aws_secret_access_key=SECRET_KEY,
-)
+# boto3 takes a noticeable share of API start-up to import and set up, so the
+# client is created by get_client() the first time cloud storage is used.
+s3_client = None
+_client_lock = threading.Lock()
+
+
+def validate_cloud_config() -> None:
+    missing = [
+        name
+        for name, value in (
+            ("CLOUDFLARE_R2_ACCOUNT_ID", ACCOUNT_ID),
+            ("CLOUDFLARE_R2_ACCESS_KEY", ACCESS_KEY),
+            ("CLOUDFLARE_R2_SECRET_KEY", SECRET_KEY),
+        )
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(f"Cloud storage is not configured: missing {', '.join(missing)}")
+
+
+def get_client():
+    global s3_client
+    if s3_client is None:
+        with _client_lock:
+            if s3_client is None:
+                validate_cloud_config()
+                import boto3
+
+                s3_client = boto3.client(
+                    "s3",
+                    endpoint_url=f"https://{ACCOUNT_ID}.r2.cloudflarestorage.com",
+                    aws_access_key_id=ACCESS_KEY,
+                    aws_secret_access_key=SECRET_KEY,
+                )
+    return s3_client
+
+
+def __getattr__(name: str):
+    # ``s3`` used to be created at import; keep it readable, lazily.
+    if name == "s3":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ------------------------------------------------
@@ -30,11 +65,11 @@ s3 = boto3.client(
 # ------------------------------------------------
 
 def test_connection():
-    return s3.list_objects_v2(Bucket=BUCKET_NAME)
+    return get_client().list_objects_v2(Bucket=BUCKET_NAME)
 
 
 def test_upload():
-    s3.put_object(
+    get_client().put_object(
         Bucket=BUCKET_NAME,
         Key="test/connection_test.txt",
         Body=b"Cloudflare R2 connection successful",
@@ -47,28 +82,30 @@ def test_upload():
 # ------------------------------------------------
 
 def delete_file(bucket: str, key: str):
-    s3.delete_object(Bucket=bucket, Key=key)
+    get_client().delete_object(Bucket=bucket, Key=key)
 
 
 def upload_file(bucket: str, key: str, local_path: Path):
-    s3.upload_file(str(local_path), bucket, key)
+    get_client().upload_file(str(local_path), bucket, key)
 
 
 def download_file(bucket: str, key: str, local_path: Path):
     local_path.parent.mkdir(parents=True, exist_ok=True)
-    s3.download_file(bucket, key, str(local_path))
+    get_client().download_file(bucket, key, str(local_path))
 
 
 def object_exists(bucket: str, key: str) -> bool:
+    from botocore.exceptions import ClientError
+
     try:
-        s3.head_object(Bucket=bucket, Key=key)
+        get_client().head_object(Bucket=bucket, Key=key)
         return True
     except ClientError:
         return False
 
 
 def list_objects(bucket: str, prefix: str):
-    return s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
+    return get_client().list_objects_v2(Bucket=bucket, Prefix=prefix)
 
 
 # ------------------------------------------------
@@ -93,6 +130,13 @@ def get_cloud_project_key(user_id: str, project_id: str, filename: str = "projec
     return f"users/{canonical_user}/projects/{project_id}/{filename}"
 
 
+def get_cloud_blob_key(user_id: str, file_id: str) -> str:
+    canonical_user = storage.resolve_storage_user_key(user_id)
+    if canonical_user is None:
+        raise ValueError("guest mode has no cloud blob key")
+    return f"users/{canonical_user}/files/{file_id}"
+
+
 def _log_sync_resolution(action: str, *, username: str | None, storage_user_key: str | None) -> None:
     local_db = storage.get_database_path()
     cloud_db = (
@@ -179,7 +223,7 @@ def download_database(user_id: str):
     if not object_exists(BUCKET_NAME, key):
         return {"status": "no_cloud_db"}
 
-    head = s3.head_object(Bucket=BUCKET_NAME, Key=key)
+    head = get_client().head_object(Bucket=BUCKET_NAME, Key=key)
     cloud_modified = head["LastModified"]
     if getattr(cloud_modified, "tzinfo", None) is None:
         cloud_modified = cloud_modified.replace(tzinfo=timezone.utc)
@@ -253,6 +297,66 @@ def download_project_zip(user_id: str, project_id: str, target_path: Path, filen
     }
 
 
+# ------------------------------------------------
+# FILE-STORE BLOB SYNC
+# ------------------------------------------------
+# Media blobs (thumbnails) are content-addressed, so they are keyed by file_id
+# rather than by project: the same bytes uploaded twice are stored once.
+
+def upload_blob(user_id: str, file_id: str, local_path: Path):
+    canonical_user = storage.resolve_storage_user_key(user_id)
+    if not canonical_user:
+        return {"status": "skipped_guest"}
+    local_path = Path(local_path)
+
+    if not local_path.exists():
+        return {"status": "no_local_blob"}
+
+    key = get_cloud_blob_key(canonical_user, file_id)
+    upload_file(BUCKET_NAME, key, local_path)
+
+    return {
+        "status": "uploaded",
+        "key": key,
+    }
+
+
+def download_blob(user_id: str, file_id: str, target_path: Path):
+    canonical_user = storage.resolve_storage_user_key(user_id)
+    if not canonical_user:
+        return {"status": "skipped_guest"}
+    target_path = Path(target_path)
+    key = get_cloud_blob_key(canonical_user, file_id)
+
+    if not object_exists(BUCKET_NAME, key):
+        return {"status": "no_cloud_blob"}
+
+    download_file(BUCKET_NAME, key, target_path)
+
+    return {
+        "status": "downloaded",
+        "key": key,
+        "target_path": str(target_path),
+    }
+
+
+def delete_blob(user_id: str, file_id: str):
+    canonical_user = storage.resolve_storage_user_key(user_id)
+    if not canonical_user:
+        return {"status": "skipped_guest"}
+    key = get_cloud_blob_key(canonical_user, file_id)
+
+    if not object_exists(BUCKET_NAME, key):
+        return {"status": "no_cloud_blob"}
+
+    delete_file(BUCKET_NAME, key)
+
+    return {
+        "status": "deleted",
+        "key": key,
+    }
+
+
 def download_all_project_zips(user_id: str):
     """
     Downloads all project blobs referenced by the user's local capstone.db
@@ -269,14 +373,10 @@ def download_all_project_zips(user_id: str):
         }
 
     _log_sync_resolution("download_all_project_zips", username=user_id, storage_user_key=canonical_user)
-    previous_user = storage.get_current_user()
-    try:
-        storage.set_current_user(canonical_user)
-        _assert_private_db_path(storage.get_database_path())
-        conn = storage.open_db()
-    except Exception:
-        storage.set_current_user(previous_user)
-        raise
+    # Open the user's database explicitly: switching the process-wide current
+    # user here would leak into every other request in flight.
+    _assert_private_db_path(storage.get_database_path(user=canonical_user))
+    conn = storage.open_db(user=canonical_user)
 
     try:
         return _download_all_project_zips_with_conn(canonical_user, conn)
@@ -285,7 +385,6 @@ def download_all_project_zips(user_id: str):
             conn.close()
         except Exception:
             pass
-        storage.set_current_user(previous_user)
 
 
 def _download_all_project_zips_with_conn(user_id: str, conn):
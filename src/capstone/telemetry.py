@@ -0,0 +1,270 @@
+"""In-process metrics registry rendered in the Prometheus text format.
+
+Everything lives in this process; nothing is pushed anywhere, so the
+registry works offline and ``GET /metrics`` is the only way to read it.
+Instrumented code records into the module-level metrics below; values that
+are cheaper to read on demand (cache statistics, queue depth) are
+registered as collector callbacks and sampled at render time.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Sequence
+
+from . import logging_utils
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond SQLite calls up to multi-minute analyses.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Sampled at render time from *collect*, which yields ``(labels, value)``."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Iterable[tuple[dict, float]]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        try:
+            samples = list(self._collect())
+        except Exception:
+            logger.debug("Metric collector %s failed", self.name, exc_info=True)
+            samples = []
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, self._key(labels))} {_format_value(value)}"
+            for labels, value in samples
+        ]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+    def gauge(
+        self, name: str, help: str, collect: Callable[[], Iterable[tuple[dict, float]]], labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, help, collect, labelnames))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "capstone_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "capstone_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+ANALYSIS_STAGE = REGISTRY.histogram(
+    "capstone_analysis_stage_duration_seconds", "ZipAnalyzer stage durations.", ("stage",)
+)
+SQLITE_QUERIES = REGISTRY.counter(
+    "capstone_sqlite_queries_total", "SQLite statements executed.", ("operation",)
+)
+SQLITE_QUERY_SECONDS = REGISTRY.counter(
+    "capstone_sqlite_query_seconds_total", "Time spent executing SQLite statements.", ("operation",)
+)
+GITHUB_CALLS = REGISTRY.counter(
+    "capstone_github_requests_total", "GitHub API calls by HTTP status (\"error\" if no response).", ("status",)
+)
+RATE_LIMITED = REGISTRY.counter(
+    "capstone_rate_limited_total",
+    "Requests rejected with 429 by endpoint class and reason (rate or busy).",
+    ("endpoint_class", "reason"),
+)
+CANCELLED = REGISTRY.counter(
+    "capstone_cancelled_requests_total",
+    "Requests whose work was stopped early, by reason (disconnected or deadline).",
+    ("reason",),
+)
+
+REGISTRY.gauge(
+    "capstone_log_records_dropped",
+    "Log records dropped because the logging queue was full.",
+    lambda: [({}, logging_utils.dropped_records())],
+)
+REGISTRY.gauge(
+    "capstone_log_debug_records_sampled_out",
+    "DEBUG log records suppressed by per-call-site sampling.",
+    lambda: [({}, logging_utils.sampled_out_records())],
+)
+
+
+def record_sqlite(operation: str, seconds: float) -> None:
+    SQLITE_QUERIES.inc(operation=operation)
+    SQLITE_QUERY_SECONDS.inc(seconds, operation=operation)
+
+
+def record_github_status(status: int | str) -> None:
+    GITHUB_CALLS.inc(status=str(status))
+
+
+def github_response_hook(response, *args, **kwargs):
+    """``requests`` response hook: ``requests.get(..., hooks=GITHUB_HOOKS)``."""
+    record_github_status(response.status_code)
+    return response
+
+
+GITHUB_HOOKS = {"response": [github_response_hook]}
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,228 @@
+"""Resumable chunked uploads for large project archives.
+
+A client creates a session with the final size, then sends the archive as
+ordered byte ranges.  Each acknowledged range is appended to a part file
+under ``UPLOADS_ROOT`` and recorded in the ``upload_sessions`` table, so a
+dropped connection (or a server restart) resumes from ``received_bytes``
+instead of starting over.  The SHA-256 is updated as ranges arrive; after a
+restart it is rebuilt once from the part file.  ``finalize_session`` hands
+the completed part file to ``file_store.ensure_file`` with the precomputed
+hash so the archive is not read again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .logging_utils import get_logger
+from .storage import BASE_DIR
+
+logger = get_logger(__name__)
+
+UPLOADS_ROOT = BASE_DIR / "data" / "upload_sessions"
+MAX_CHUNK_BYTES = int(os.getenv("CAPSTONE_UPLOAD_MAX_CHUNK_MB", "16")) * 1024 * 1024
+SESSION_TTL_HOURS = int(os.getenv("CAPSTONE_UPLOAD_SESSION_TTL_HOURS", "48"))
+
+# session_id -> (bytes hashed, running sha256); rebuilt from the part file on a miss.
+_HASHERS: dict[str, tuple[int, "hashlib._Hash"]] = {}
+_LOCKS: dict[str, threading.Lock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class OffsetMismatch(ValueError):
+    """A chunk does not start at (or overlap) the session's received offset."""
+
+    def __init__(self, expected: int) -> None:
+        super().__init__(f"Chunk must start at byte {expected}")
+        self.expected = expected
+
+
+def _session_lock(session_id: str) -> threading.Lock:
+    with _REGISTRY_LOCK:
+        return _LOCKS.setdefault(session_id, threading.Lock())
+
+
+def _forget(session_id: str) -> None:
+    with _REGISTRY_LOCK:
+        _HASHERS.pop(session_id, None)
+        _LOCKS.pop(session_id, None)
+
+
+def _row_to_dict(row) -> dict:
+    (session_id, project_id, filename, total_size, received, expected_sha256,
+     part_path, created_at, updated_at) = row
+    return {
+        "session_id": session_id,
+        "project_id": project_id,
+        "filename": filename,
+        "total_size": total_size,
+        "received_bytes": received,
+        "expected_sha256": expected_sha256,
+        "part_path": part_path,
+        "created_at": created_at,
+        "updated_at": updated_at,
+        "complete": received >= total_size,
+    }
+
+
+def get_session(conn: sqlite3.Connection, session_id: str) -> dict | None:
+    row = conn.execute(
+        """
+        SELECT session_id, project_id, filename, total_size, received_bytes,
+               expected_sha256, part_path, created_at, updated_at
+        FROM upload_sessions
+        WHERE session_id = ?
+        """,
+        (session_id,),
+    ).fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def create_session(
+    conn: sqlite3.Connection,
+    *,
+    filename: str,
+    total_size: int,
+    project_id: str | None = None,
+    expected_sha256: str | None = None,
+    uploads_root: Path | None = None,
+) -> dict:
+    if total_size <= 0:
+        raise ValueError("total_size must be positive")
+    purge_expired(conn)
+
+    root = uploads_root or UPLOADS_ROOT
+    root.mkdir(parents=True, exist_ok=True)
+    session_id = uuid.uuid4().hex
+    part_path = root / f"{session_id}.part"
+    part_path.touch()
+
+    conn.execute(
+        """
+        INSERT INTO upload_sessions
+            (session_id, project_id, filename, total_size, expected_sha256, part_path)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            session_id,
+            project_id or None,
+            filename,
+            total_size,
+            (expected_sha256 or "").lower() or None,
+            str(part_path),
+        ),
+    )
+    conn.commit()
+    _HASHERS[session_id] = (0, hashlib.sha256())
+    return get_session(conn, session_id)
+
+
+def _hasher_for(session_id: str, part_path: Path, received: int):
+    cached = _HASHERS.get(session_id)
+    if cached is not None and cached[0] == received:
+        return cached[1]
+    # Process restarted (or state diverged): rehash the acknowledged prefix once.
+    hasher = hashlib.sha256()
+    remaining = received
+    with open(part_path, "rb") as fh:
+        while remaining > 0:
+            block = fh.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(conn: sqlite3.Connection, session_id: str, start: int, data: bytes) -> dict:
+    """Write *data* at byte *start*; ranges already received are skipped.
+
+    Raises ``LookupError`` for an unknown session and ``OffsetMismatch`` when
+    the range would leave a gap.
+    """
+    if len(data) > MAX_CHUNK_BYTES:
+        raise ValueError(f"Chunk exceeds {MAX_CHUNK_BYTES} bytes")
+
+    with _session_lock(session_id):
+        session = get_session(conn, session_id)
+        if session is None:
+            raise LookupError(session_id)
+        received = session["received_bytes"]
+        total = session["total_size"]
+        if start > received:
+            raise OffsetMismatch(received)
+        if start + len(data) > total:
+            raise ValueError("Chunk extends past the declared total size")
+
+        fresh = data[received - start:]
+        if not fresh:
+            return session
+
+        part_path = Path(session["part_path"])
+        hasher = _hasher_for(session_id, part_path, received)
+        with open(part_path, "r+b") as fh:
+            # Drop any unacknowledged tail left by an interrupted write.
+            fh.truncate(received)
+            fh.seek(received)
+            fh.write(fresh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        hasher.update(fresh)
+        received += len(fresh)
+
+        conn.execute(
+            "UPDATE upload_sessions SET received_bytes = ?, updated_at = datetime('now') WHERE session_id = ?",
+            (received, session_id),
+        )
+        conn.commit()
+        _HASHERS[session_id] = (received, hasher)
+        return get_session(conn, session_id)
+
+
+def complete_session(conn: sqlite3.Connection, session_id: str) -> tuple[Path, str, int, dict]:
+    """Return ``(part_path, sha256, size, session)`` for a fully received session."""
+    with _session_lock(session_id):
+        session = get_session(conn, session_id)
+        if session is None:
+            raise LookupError(session_id)
+        received = session["received_bytes"]
+        if received < session["total_size"]:
+            raise OffsetMismatch(received)
+        part_path = Path(session["part_path"])
+        digest = _hasher_for(session_id, part_path, received).hexdigest()
+        expected = session["expected_sha256"]
+        if expected and expected != digest:
+            raise ValueError("Uploaded bytes do not match the declared sha256")
+        return part_path, digest, received, session
+
+
+def delete_session(conn: sqlite3.Connection, session_id: str) -> bool:
+    session = get_session(conn, session_id)
+    if session is None:
+        return False
+    conn.execute("DELETE FROM upload_sessions WHERE session_id = ?", (session_id,))
+    conn.commit()
+    Path(session["part_path"]).unlink(missing_ok=True)
+    _forget(session_id)
+    return True
+
+
+def purge_expired(conn: sqlite3.Connection, *, ttl_hours: int | None = None) -> int:
+    """Remove sessions idle for longer than the TTL along with their part files."""
+    hours = SESSION_TTL_HOURS if ttl_hours is None else ttl_hours
+    cutoff = (datetime.utcnow() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+    rows = conn.execute(
+        "SELECT session_id FROM upload_sessions WHERE updated_at < ?",
+        (cutoff,),
+    ).fetchall()
+    for (session_id,) in rows:
+        delete_session(conn, session_id)
+    if rows:
+        logger.info("Purged %d expired upload sessions", len(rows))
+    return len(rows)
@@ -9,12 +9,14 @@ from dataclasses import asdict, is_dataclass
 from datetime import datetime
 from pathlib import Path, PurePosixPath
 from time import perf_counter
-from typing import Iterable, List, Tuple, Dict
+from typing import List, Sequence, Tuple, Dict
 from zipfile import BadZipFile, ZipFile
 
+from . import cancellation
+from .cancellation import CancelToken
 from .collaboration import analyze_git_logs
 from .collaboration_analysis import build_collaboration_analysis, to_compact_collaboration
-from .git_analysis import parse_git_log_stream
+from .git_analysis import GitHistory, fold_git_log, load_git_history, save_git_history
 from .config import Preferences, update_preferences
 from .language_detection import (
     classify_activity,
@@ -26,14 +28,18 @@ from .logging_utils import get_logger
 from .metrics import FileMetric, MetricSummary, compute_metrics
 from .modes import ModeResolution
 from .skills import SkillObservation, build_skill_timeline, compute_skill_scores
+from .storage import _UNSET as _DB_UNSET
 from .storage import open_db, close_db, store_analysis_snapshot, upsert_contributor, link_contributor_to_project, store_contributor_stats
 import sqlite3
-from . import file_store
+from . import archive_pool, file_store, telemetry
 from .project_role import infer_project_role_from_snapshot
 
 
 logger = get_logger(__name__)
 
+# Archive members read between cancellation checks.
+CANCEL_CHECK_MEMBERS = 64
+
 
 class InvalidArchiveError(ValueError):
     """Raised when the provided file is not a valid zip archive."""
@@ -54,6 +60,22 @@ def _serialize_collaboration(collaboration) -> dict[str, object]:
         "primary_contributor": getattr(collaboration, "primary_contributor", None),
     }
 
+def discard_stored_upload(conn: sqlite3.Connection, stored: dict) -> None:
+    """Forget an upload stored for an abandoned analysis (blob too, if unshared)."""
+    orphan = file_store.discard_upload(conn, stored)
+    conn.commit()
+    if orphan is not None:
+        archive_pool.invalidate_file(stored["file_id"], orphan)
+        orphan.unlink(missing_ok=True)
+
+
+def _stage_done(stage: str, since: float) -> float:
+    """Record the duration of an analysis stage and return the new mark."""
+    now = perf_counter()
+    telemetry.ANALYSIS_STAGE.observe(now - since, stage=stage)
+    return now
+
+
 class ZipAnalyzer:
     """Analyse zip archives to produce JSONL metadata and summaries."""
 
@@ -119,7 +141,18 @@ class ZipAnalyzer:
         db_dir: Path | None = None,
         conn: sqlite3.Connection | None = None,
         skip_contributor_storage: bool = False,
+        user=_DB_UNSET,
+        cancel: CancelToken | None = None,
     ) -> dict[str, object]:
+        """Analyze *zip_path* and store the snapshot.
+
+        *user* selects the storage user's database (``None`` for the guest);
+        by default the user bound to the current request is used.
+
+        *cancel* (default: the current request's token) stops the analysis
+        with ``OperationCancelled``; nothing is written to the output files
+        or the snapshot tables once it has been cancelled.
+        """
         start = perf_counter()
         zip_path = zip_path.expanduser().resolve()
         if zip_path.suffix.lower() != ".zip":
@@ -128,7 +161,7 @@ class ZipAnalyzer:
             raise InvalidArchiveError(detail)
 
         if conn is None:
-            conn = open_db(db_dir)
+            conn = open_db(db_dir, user=user)
         try:
             stored = file_store.ensure_file(
                 conn,
@@ -147,7 +180,7 @@ class ZipAnalyzer:
                 close_db()
             except Exception:
                 pass
-            conn = open_db(db_dir)
+            conn = open_db(db_dir, user=user)
             stored = file_store.ensure_file(
                 conn,
                 zip_path,
@@ -155,10 +188,15 @@ class ZipAnalyzer:
                 source="zip_analyzer",
                 upload_id=project_id,
             )
+        _stage_done("store", start)
         canonical_zip_path = Path(stored["path"])
+        # Packed archives have no blob on disk; the upload itself is byte-identical.
+        archive_source = zip_path if stored.get("packed") and not canonical_zip_path.exists() else canonical_zip_path
 
+        if cancel is None:
+            cancel = cancellation.current_token()
         try:
-            with ZipFile(canonical_zip_path) as archive:
+            with ZipFile(archive_source) as archive, cancellation.use_token(cancel):
                 return self._analyze_archive(
                     archive,
                     canonical_zip_path,
@@ -172,11 +210,15 @@ class ZipAnalyzer:
                     conn,
                     stored,
                     skip_contributor_storage=skip_contributor_storage,
+                    user=user,
                 )
         except BadZipFile as exc:
             detail = f"Corrupted zip archive ({exc})"
             self._logger.error("Failed to read archive %s", zip_path, exc_info=True)
             raise InvalidArchiveError(detail)
+        except cancellation.OperationCancelled:
+            discard_stored_upload(conn, stored)
+            raise
 
     def _analyze_archive(
         self,
@@ -192,6 +234,7 @@ class ZipAnalyzer:
         conn,
         stored_file: dict,
         skip_contributor_storage: bool = False,
+        user=_DB_UNSET,
     ) -> dict[str, object]:
         metadata_records: List[dict[str, object]] = []
         metrics_inputs: List[FileMetric] = []
@@ -243,7 +286,11 @@ class ZipAnalyzer:
             ".csv",
         }
 
-        for info in archive.infolist():
+        mark = perf_counter()
+        cancel = cancellation.current_token()
+        for index, info in enumerate(archive.infolist()):
+            if cancel is not None and not index % CANCEL_CHECK_MEMBERS:
+                cancel.raise_if_cancelled()
             if info.is_dir():
                 continue
             seen_paths.add(info.filename.lower())
@@ -346,17 +393,16 @@ class ZipAnalyzer:
                 }
             )
 
-        metadata_path.parent.mkdir(parents=True, exist_ok=True)
-        with metadata_path.open("w", encoding="utf-8") as fh:
-            for record in metadata_records:
-                fh.write(json.dumps(record))
-                fh.write("\n")
-
+        mark = _stage_done("scan", mark)
         metric_summary = compute_metrics(metrics_inputs)
-        collaboration = self._summarize_collaboration(git_logs)
+        mark = _stage_done("metrics", mark)
+        collaboration, git_history = self._summarize_collaboration(
+            git_logs, conn=conn, project_id=project_id or zip_path.stem
+        )
         # Build author→email map from the raw git log lines while they are still available.
         # to_compact_collaboration drops email, so we capture it here for upsert_contributor below.
         author_email_map, noreply_only_authors = _build_author_email_map(git_logs)
+        mark = _stage_done("collaboration", mark)
         duration = perf_counter() - start
 
         skill_observations = [
@@ -421,6 +467,14 @@ class ZipAnalyzer:
                 "value": ", ".join(sorted(language_counter.keys())),
             })
 
+        mark = _stage_done("skills", mark)
+        # Last check: past this point the outputs and the snapshot are written.
+        cancellation.check(cancel)
+        metadata_path.parent.mkdir(parents=True, exist_ok=True)
+        with metadata_path.open("w", encoding="utf-8") as fh:
+            for record in metadata_records:
+                fh.write(json.dumps(record))
+                fh.write("\n")
         summary_path.parent.mkdir(parents=True, exist_ok=True)
         with summary_path.open("w", encoding="utf-8") as fh:
             json.dump(summary, fh, indent=2)
@@ -433,7 +487,7 @@ class ZipAnalyzer:
         project_id = project_id or zip_path.stem
         classification = collaboration.get("classification", "unknown")
         primary_contributor = collaboration.get("primary_contributor")
-        conn = open_db(db_dir)
+        conn = open_db(db_dir, user=user)
         store_analysis_snapshot(
             conn,
             project_id=project_id,
@@ -443,6 +497,8 @@ class ZipAnalyzer:
             zip_path=str(stored_file.get("path") or zip_path),
         )
         self._logger.info("Stored zip analysis snapshot for %s", project_id)
+        if git_history is not None:
+            save_git_history(conn, project_id, git_history)
 
         # store zip contributors in users and user_projects
         # (skipped for GitHub imports — sync_contributor_stats handles this via the API)
@@ -476,6 +532,8 @@ class ZipAnalyzer:
                     )
                 self._logger.info("Stored %d zip contributors for project %s", len(contrib_raw), project_id)
 
+        _stage_done("persist", mark)
+        _stage_done("total", start)
         return summary
 
     def _build_record(self, info, mode: ModeResolution) -> dict[str, object]:
@@ -515,37 +573,42 @@ class ZipAnalyzer:
             skills.append(("terraform", "tool"))
         return skills
 
-    def _summarize_collaboration(self, git_logs: Iterable[str]) -> dict[str, object]:
-        logs = list(git_logs)
-        if not logs:
-            return {"classification": "unknown", "contributors (commits, line changes, reviews)": {}, "primary_contributor": None}
+    def _summarize_collaboration(
+        self,
+        git_logs: Sequence[str],
+        *,
+        conn: sqlite3.Connection | None = None,
+        project_id: str | None = None,
+    ) -> tuple[dict[str, object], GitHistory | None]:
+        """Compact collaboration summary, plus the git history aggregates behind it.
+
+        With *conn* and *project_id*, a log that extends the history stored
+        for the project only has its new commits parsed.  *git_logs* is the
+        scan's own line list and is handed to ``fold_git_log`` as is, not copied.
+        """
+        if not git_logs:
+            return {"classification": "unknown", "contributors (commits, line changes, reviews)": {}, "primary_contributor": None}, None
 
         # Prefer rich analysis when git log contains numstat-style entries.
         try:
-            if any(line.startswith("commit:") for line in logs):
-                entries = parse_git_log_stream("\n".join(logs))
-                analysis = build_collaboration_analysis(entries)
+            if any(line.startswith("commit:") for line in git_logs):
+                previous = load_git_history(conn, project_id) if conn is not None and project_id else None
+                history = fold_git_log(git_logs, previous)
+                analysis = build_collaboration_analysis(history.entries())
                 result = to_compact_collaboration(analysis)
-                # Extract first/last commit dates directly from raw log lines (format: commit:SHA|author|email|TIMESTAMP|subject)
-                timestamps: list[int] = []
-                for line in logs:
-                    if line.startswith("commit:"):
-                        try:
-                            parts = line.split(":", 1)[1].split("|")
-                            if len(parts) >= 4:
-                                ts = int(parts[3])
-                                if ts > 0:
-                                    timestamps.append(ts)
-                        except (ValueError, IndexError):
-                            pass
-                if timestamps:
-                    result["first_commit_date"] = datetime.utcfromtimestamp(min(timestamps)).strftime("%Y-%m-%dT%H:%M:%SZ")
-                    result["last_commit_date"] = datetime.utcfromtimestamp(max(timestamps)).strftime("%Y-%m-%dT%H:%M:%SZ")
-                return result
+                span = history.timestamp_range()
+                if span:
+                    result["first_commit_date"] = datetime.utcfromtimestamp(span[0]).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    result["last_commit_date"] = datetime.utcfromtimestamp(span[1]).strftime("%Y-%m-%dT%H:%M:%SZ")
+                result["contributor_activity"] = history.author_activity()
+                result["file_churn"] = history.churn.summary()
+                return result, history
+        except cancellation.OperationCancelled:
+            raise
         except Exception as exc:  # pragma: no cover - defensive fallback
             self._logger.warning("Failed rich collaboration parse; falling back to basic: %s", exc)
 
-        basic = analyze_git_logs(logs)
+        basic = analyze_git_logs(git_logs)
         return {
             "classification": basic.classification,
             "contributors (commits, line changes, reviews)": {
@@ -553,7 +616,7 @@ class ZipAnalyzer:
             },
             "primary_contributor": basic.primary_contributor,
             "contribution_compute": "weightedScore = commits*1.0 + line_changes*0.0 + reviews*0.5",
-        }
+        }, None
 
 
 def _parse_contrib_data(value: object) -> tuple[int, int, int]:
@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+
+from capstone import activity_log, storage
+
+
+def _client(tmp_path):
+    from capstone.api.server import create_app
+
+    return TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+
+
+def test_events_persist_and_page_newest_first(tmp_path):
+    client = _client(tmp_path)
+    for i in range(5):
+        activity_log.log_event("ERROR" if i % 2 else "INFO", f"event {i}")
+
+    first = client.get("/activity", params={"limit": 2})
+    assert first.status_code == 200
+    body = first.json()
+    assert body["count"] >= 5
+    assert [log["message"] for log in body["logs"]] == ["event 4", "event 3"]
+
+    second = client.get("/activity", params={"limit": 2, "cursor": body["next_cursor"]}).json()
+    assert [log["message"] for log in second["logs"]] == ["event 2", "event 1"]
+
+    errors = client.get("/activity", params={"level": "error"}).json()
+    assert [log["message"] for log in errors["logs"]][:2] == ["event 3", "event 1"]
+    assert errors["count"] == 2
+
+    # Survives a restart: read straight from the database.
+    conn = storage.open_db(user=None)
+    try:
+        stored = storage.fetch_activity_events(conn, level="INFO")
+    finally:
+        storage.close_db(conn)
+    assert [e["message"] for e in stored][:3] == ["event 4", "event 2", "event 0"]
+
+
+def test_events_are_filtered_by_time_range(tmp_path):
+    client = _client(tmp_path)
+    conn = storage.open_db(user=None)
+    storage.insert_activity_events(
+        conn,
+        [
+            ("2025-01-01 00:00:00", "INFO", "old"),
+            ("2025-06-01 00:00:00", "INFO", "mid"),
+            ("2025-12-01 00:00:00", "INFO", "new"),
+        ],
+    )
+    conn.commit()
+    storage.close_db(conn)
+
+    body = client.get(
+        "/activity", params={"since": "2025-02-01 00:00:00", "until": "2025-12-01 00:00:00"}
+    ).json()
+    assert [log["message"] for log in body["logs"]] == ["mid"]
+    assert body["count"] == 1
+    assert client.get("/activity", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_retention_keeps_newest_rows(tmp_path, monkeypatch):
+    _client(tmp_path)
+    monkeypatch.setattr(activity_log, "MAX_ROWS", 3)
+    for i in range(6):
+        activity_log.log_event("INFO", f"event {i}")
+    activity_log.flush()
+
+    conn = storage.open_db(user=None)
+    try:
+        messages = [e["message"] for e in storage.fetch_activity_events(conn)]
+    finally:
+        storage.close_db(conn)
+    assert messages == ["event 5", "event 4", "event 3"]
@@ -0,0 +1,149 @@
+import io
+import uuid
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import file_store, storage
+
+
+def _zip_bytes(tag: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("README.md", f"# {tag}\n")
+        zf.writestr("main.py", "print('hello')\n")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    return TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+
+
+def test_batch_upload_analyzes_each_archive_and_reports_failures(client):
+    ids = [f"batch-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    files = [("files", (f"{pid}.zip", _zip_bytes(pid), "application/zip")) for pid in ids]
+    files.append(("files", ("notes.txt", b"nope", "text/plain")))
+
+    r = client.post("/projects/upload-batch", files=files, data={"project_ids": ids})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["count"] == 4
+    assert body["succeeded"] == 3
+    assert body["failed"] == 1
+    assert [p["project_id"] for p in body["projects"][:3]] == ids
+    assert body["projects"][3]["ok"] is False
+
+    conn = storage.open_db()
+    stored = {row[0] for row in conn.execute("SELECT project_id FROM projects")}
+    assert set(ids) <= stored
+
+
+def test_batch_reanalyzes_stored_file_ids(client):
+    pid = f"stored-{uuid.uuid4().hex[:8]}"
+    r = client.post(
+        f"/projects/upload?project_id={pid}",
+        files={"file": ("demo.zip", _zip_bytes(pid), "application/zip")},
+    )
+    file_id = r.json()["file_id"]
+
+    r = client.post("/projects/upload-batch", data={"file_ids": [file_id, "missing"]})
+    body = r.json()
+    assert body["succeeded"] == 1
+    assert body["projects"][0]["project_id"] == pid
+    assert body["projects"][1]["ok"] is False
+
+
+def test_batch_syncs_cloud_database_once(client, monkeypatch):
+    import capstone.api.routes.projects as projects_routes
+    from capstone.api.storage_context import StorageContext, get_storage_context
+
+    calls = {"db": 0, "zip": 0}
+    client.app.dependency_overrides[get_storage_context] = lambda: StorageContext(
+        username="alice", user="alice", db_path=storage.get_database_path(user="alice")
+    )
+    monkeypatch.setattr(projects_routes, "upload_database", lambda user: calls.__setitem__("db", calls["db"] + 1))
+    monkeypatch.setattr(
+        projects_routes, "upload_project_zip", lambda *a, **k: calls.__setitem__("zip", calls["zip"] + 1)
+    )
+
+    files = [
+        ("files", (f"p{i}.zip", _zip_bytes(uuid.uuid4().hex), "application/zip")) for i in range(3)
+    ]
+    r = client.post("/projects/upload-batch", files=files)
+    assert r.json()["succeeded"] == 3
+    assert calls == {"db": 1, "zip": 3}
+
+
+def test_pack_mode_uploads_are_analyzed_without_a_whole_blob(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_store, "PACK_MODE", True)
+    pid = f"packed-{uuid.uuid4().hex[:8]}"
+    r = client.post(
+        f"/projects/upload?project_id={pid}",
+        files={"file": ("demo.zip", _zip_bytes(pid), "application/zip")},
+    )
+    assert r.status_code == 200, r.text
+    conn = storage.open_db()
+    assert file_store.is_packed(conn, r.json()["file_id"])
+
+    files = [("files", ("again.zip", _zip_bytes(uuid.uuid4().hex), "application/zip"))]
+    r = client.post("/projects/upload-batch", files=files, data={"file_ids": [r.json()["file_id"]]})
+    assert r.json()["succeeded"] == 2, r.text
+
+    # Members are the only stored copy: no archive blobs, no leftover rebuilds.
+    assert not list((tmp_path / "files").glob("*.zip"))
+
+
+def test_batch_runs_as_background_work_and_yields_between_archives(client, monkeypatch):
+    from capstone.api import executor
+
+    yields = []
+    monkeypatch.setattr(executor, "yield_to_interactive", lambda *a, **k: yields.append(1) or 0.0)
+    files = [("files", (f"p{i}.zip", _zip_bytes(uuid.uuid4().hex), "application/zip")) for i in range(2)]
+    r = client.post("/projects/upload-batch", files=files)
+    assert r.json()["succeeded"] == 2
+    # Registration and contributor linking yield once per archive.
+    assert len(yields) >= 4
+
+
+def test_batch_keeps_at_most_analysis_workers_in_flight(client, monkeypatch):
+    import threading
+
+    import capstone.api.routes.projects as projects_routes
+    from capstone.api import executor
+
+    analyze = projects_routes._analyze_stored_archive
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def counting_analyze(*args, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            return analyze(*args, **kwargs)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    submitted = []
+    submit = executor.submit_analysis
+
+    def recording_submit(func, *args, **kwargs):
+        with lock:
+            submitted.append(state["running"])
+        return submit(func, *args, **kwargs)
+
+    monkeypatch.setattr(executor, "ANALYSIS_WORKERS", 1)
+    monkeypatch.setattr(executor, "submit_analysis", recording_submit)
+    monkeypatch.setattr(projects_routes, "_analyze_stored_archive", counting_analyze)
+    files = [("files", (f"p{i}.zip", _zip_bytes(uuid.uuid4().hex), "application/zip")) for i in range(3)]
+    r = client.post("/projects/upload-batch", files=files)
+    assert r.json()["succeeded"] == 3
+    # Each archive is submitted only after the previous one finished.
+    assert submitted == [0, 0, 0]
+    assert state["peak"] == 1
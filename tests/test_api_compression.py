@@ -0,0 +1,79 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+
+from capstone.api.middleware import compression
+from capstone.api.middleware.compression import CompressionMiddleware
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, min_size=256)
+    blob = tmp_path / "blob.json"
+    blob.write_text('{"k": "' + "v" * 4096 + '"}')
+
+    @app.get("/big")
+    def big():
+        return {"timeline": [{"skill": "python", "weight": i} for i in range(200)]}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/tagged")
+    def tagged():
+        return PlainTextResponse("x" * 1000, headers={"ETag": '"abc"'})
+
+    @app.get("/file")
+    def file():
+        return FileResponse(blob, media_type="application/json")
+
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped_with_weak_etag(client, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    r = client.get("/big", headers={"Accept-Encoding": "br, gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"].startswith('W/"')
+    assert len(r.json()["timeline"]) == 200
+
+    raw = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert raw.headers["etag"] == r.headers["etag"]
+
+
+def test_if_none_match_returns_304_without_body(client):
+    etag = client.get("/big").headers["etag"]
+    r = client.get("/big", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    # A strong tag set by the route is kept and compared weakly.
+    r = client.get("/tagged", headers={"If-None-Match": 'W/"abc"'})
+    assert r.status_code == 304
+
+
+def test_small_bodies_and_identity_clients_are_not_compressed(client):
+    r = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+    r = client.get("/big", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in r.headers
+
+
+def test_streaming_file_responses_pass_through(client):
+    r = client.get("/file", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+    assert r.json()["k"].startswith("v")
+
+
+def test_gzip_round_trip():
+    body = b"{}" * 1000
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from capstone.api import executor
+
+_request_user = contextvars.ContextVar("request_user", default=None)
+
+
+def test_offloaded_route_runs_on_blocking_pool_with_context():
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def bind_user(request, call_next):
+        token = _request_user.set("alice")
+        try:
+            return await call_next(request)
+        finally:
+            _request_user.reset(token)
+
+    @app.get("/work")
+    @executor.offload
+    def work(n: int = 1):
+        return {"n": n, "thread": threading.current_thread().name, "user": _request_user.get()}
+
+    body = TestClient(app).get("/work", params={"n": 3}).json()
+    assert body["n"] == 3
+    assert body["thread"].startswith("capstone-blocking")
+    assert body["user"] == "alice"
+
+
+def test_run_blocking_keeps_loop_responsive():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await executor.run_blocking(time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 5
+
+
+def test_loop_lag_monitor_reports_stalls():
+    async def scenario():
+        monitor = executor.LoopLagMonitor(threshold_ms=50, interval_s=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)  # deliberately block the loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.stalls >= 1
+    assert monitor.max_lag_ms >= 100
+
+
+def test_background_route_runs_on_background_pool():
+    app = FastAPI()
+
+    @app.post("/bulk")
+    @executor.offload(priority=executor.Priority.BACKGROUND)
+    def bulk():
+        return {"thread": threading.current_thread().name}
+
+    assert TestClient(app).post("/bulk").json()["thread"].startswith("capstone-background")
+
+
+def test_background_job_waits_for_interactive_work():
+    release = threading.Event()
+    started = threading.Event()
+    order = []
+
+    def interactive():
+        started.set()
+        release.wait(5)
+        order.append("interactive")
+
+    def background():
+        order.append("background")
+
+    first = executor.submit(interactive)
+    started.wait(5)
+    second = executor.submit(background, priority=executor.Priority.BACKGROUND)
+    time.sleep(0.1)
+    assert order == []
+    release.set()
+    first.result(5)
+    second.result(5)
+    assert order == ["interactive", "background"]
+
+
+def test_yield_to_interactive_is_bounded():
+    release = threading.Event()
+    started = threading.Event()
+
+    def interactive():
+        started.set()
+        release.wait(5)
+
+    future = executor.submit(interactive)
+    started.wait(5)
+    try:
+        waited = executor.yield_to_interactive(max_wait_s=0.1)
+        assert 0.05 <= waited < 2
+    finally:
+        release.set()
+        future.result(5)
+    assert executor.yield_to_interactive(max_wait_s=1) < 0.5
+
+
+def test_full_background_queue_returns_503(monkeypatch):
+    monkeypatch.setattr(executor, "BACKGROUND_WORKERS", 1)
+    monkeypatch.setattr(executor, "BACKGROUND_QUEUE", 0)
+    release = threading.Event()
+    blocker = executor.submit(release.wait, 5, priority=executor.Priority.BACKGROUND)
+
+    app = FastAPI()
+
+    @app.post("/bulk")
+    @executor.offload(priority=executor.Priority.BACKGROUND)
+    def bulk():
+        return {"ok": True}
+
+    @app.post("/awaits")
+    async def awaits():
+        return await executor.run_background(dict, ok=True)
+
+    try:
+        client = TestClient(app)
+        for path in ("/bulk", "/awaits"):
+            r = client.post(path)
+            assert r.status_code == 503
+            assert r.headers["Retry-After"] == str(executor.BUSY_RETRY_AFTER_S)
+    finally:
+        release.set()
+        blocker.result(5)
+    deadline = time.monotonic() + 2
+    while executor.pending_jobs()["background"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor.pending_jobs()["background"] == 0
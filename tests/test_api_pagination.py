@@ -0,0 +1,186 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import storage
+from capstone.api import pagination
+from capstone.api.portfolio_helpers import list_snapshots
+
+
+@pytest.fixture
+def app_dir(tmp_path):
+    return tmp_path
+
+
+@pytest.fixture
+def client(app_dir):
+    from capstone.api.server import create_app
+
+    return TestClient(create_app(db_dir=str(app_dir), auth_token=None))
+
+
+def _walk(client, url, key, **params):
+    seen, cursor = [], None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        r = client.get(url, params=query)
+        assert r.status_code == 200, r.text
+        seen.append(key(r.json()))
+        cursor = r.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            return seen
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    token = pagination.encode_cursor("2025-01-01 00:00:00", 7)
+    assert pagination.decode_cursor(token, 2) == ["2025-01-01 00:00:00", 7]
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(token, 3)
+    with pytest.raises(ValueError):
+        pagination.decode_cursor("not*base64", 2)
+    with pytest.raises(ValueError):
+        pagination.parse_fields("name,snapshot'--")
+
+
+def test_projects_keyset_pages_cover_every_upload_once(client):
+    conn = storage.open_db()
+    for i in range(5):
+        conn.execute(
+            "INSERT INTO files (file_id, hash, size_bytes, path) VALUES (?, ?, ?, ?)",
+            (f"f{i}", f"h{i}", 10 + i, f"/blobs/{i}"),
+        )
+        # Two uploads share a timestamp so the upload_id tiebreaker is exercised.
+        conn.execute(
+            "INSERT INTO uploads (upload_id, original_name, hash, file_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            (f"p{i}", f"p{i}.zip", f"h{i}", f"f{i}", f"2025-01-0{min(i, 3) + 1} 00:00:00"),
+        )
+    conn.commit()
+    storage.close_db(conn)
+
+    pages = _walk(
+        client,
+        "/projects",
+        lambda body: [p["project_id"] for p in body["projects"]],
+        limit=2,
+    )
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [pid for page in pages for pid in page] == ["p4", "p3", "p2", "p1", "p0"]
+
+    body = client.get("/projects", params={"fields": "project_id,size_bytes"}).json()
+    assert body["count"] == 5
+    assert set(body["projects"][0]) == {"project_id", "size_bytes"}
+    assert body["next_cursor"] is None
+
+
+def test_skills_timeline_pages_oldest_first_with_projected_snapshot(client):
+    conn = storage.open_db()
+    conn.execute("INSERT INTO projects (project_id, name) VALUES ('demo', 'demo')")
+    for day in range(1, 4):
+        snapshot = {
+            "skills": [{"skill": "python", "score": day}],
+            "file_summary": {"file_count": day, "active_days": 1},
+            "large_unused_blob": "x" * 1000,
+        }
+        conn.execute(
+            "INSERT INTO project_analysis (project_id, classification, snapshot, created_at) VALUES (?, ?, ?, ?)",
+            ("demo", "individual", json.dumps(snapshot), f"2025-02-0{day} 00:00:00"),
+        )
+    conn.commit()
+    storage.close_db(conn)
+
+    pages = _walk(
+        client,
+        "/skills/timeline",
+        lambda body: [node["project_metrics"]["file_count"] for node in body["timeline"]],
+        limit=2,
+    )
+    assert pages == [[1, 2], [3]]
+
+    node = client.get("/skills/timeline", params={"fields": "timestamp"}).json()["timeline"][0]
+    assert node == {"timestamp": "2025-02-01 00:00:00"}
+
+
+def test_resumes_paginate_by_updated_at(client, app_dir):
+    conn = storage.open_db(Path(app_dir))
+    ids = [storage.insert_resume(conn, 1, f"Resume {i}") for i in range(3)]
+    for i, resume_id in enumerate(ids):
+        conn.execute(
+            "UPDATE resumes SET updated_at = ? WHERE id = ?",
+            (f"2025-03-0{i + 1} 00:00:00", resume_id),
+        )
+    conn.commit()
+    storage.close_db(conn)
+
+    pages = _walk(client, "/resumes", lambda body: [r["title"] for r in body["data"]], limit=2, fields="title")
+    assert pages == [["Resume 2", "Resume 1"], ["Resume 0"]]
+
+
+def test_invalid_cursor_is_a_client_error(client):
+    assert client.get("/projects", params={"cursor": "garbage", "limit": 2}).status_code == 400
+    assert client.get("/skills/timeline", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_portfolio_snapshots_keyset_and_snapshot_fields(client, app_dir):
+    conn = storage.open_db(Path(app_dir))
+    conn.execute("INSERT INTO projects (project_id, name) VALUES ('demo', 'demo')")
+    for day in range(1, 4):
+        conn.execute(
+            "INSERT INTO project_analysis (project_id, classification, snapshot, created_at) VALUES (?, ?, ?, ?)",
+            ("demo", "individual", json.dumps({"n": day, "bulk": "x" * 100}), f"2025-04-0{day} 00:00:00"),
+        )
+    conn.commit()
+    storage.close_db(conn)
+
+    pages = _walk(
+        client,
+        "/showcase/portfolios",
+        lambda body: body["data"],
+        projectId="demo",
+        limit=2,
+        fields="n",
+    )
+    assert pages == [[{"n": 3}, {"n": 2}], [{"n": 1}]]
+
+
+def test_portfolio_snapshots_last_full_page_has_no_cursor(client, app_dir):
+    conn = storage.open_db(Path(app_dir))
+    conn.execute("INSERT INTO projects (project_id, name) VALUES ('demo', 'demo')")
+    for day in range(1, 5):
+        conn.execute(
+            "INSERT INTO project_analysis (project_id, classification, snapshot, created_at) VALUES (?, ?, ?, ?)",
+            ("demo", "individual", json.dumps({"n": day}), f"2025-04-0{day} 00:00:00"),
+        )
+    conn.commit()
+    storage.close_db(conn)
+
+    pages = _walk(client, "/showcase/portfolios", lambda body: body["data"], projectId="demo", limit=2)
+    assert pages == [[{"n": 4}, {"n": 3}], [{"n": 2}, {"n": 1}]]
+
+
+def test_snapshot_keyset_by_classification_includes_null_rows():
+    # Older databases allow a NULL classification; it pages as "".
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE project_analysis (id INTEGER PRIMARY KEY, project_id TEXT, classification TEXT,"
+        " primary_contributor TEXT, snapshot TEXT, created_at TEXT)"
+    )
+    for i in range(1, 6):
+        conn.execute(
+            "INSERT INTO project_analysis VALUES (?, 'demo', ?, NULL, '{}', '2025-01-01')",
+            (i, None if i % 2 == 0 else "team"),
+        )
+    seen, after = [], None
+    while True:
+        rows, _ = list_snapshots(
+            conn, "demo", page_size=2, sort_field="classification", sort_dir="asc", after=after, lookahead=True
+        )
+        seen.extend(row.id for row in rows[:2])
+        if len(rows) <= 2:
+            break
+        after = [rows[1].classification or "", rows[1].id]
+    assert seen == [2, 4, 1, 3, 5]
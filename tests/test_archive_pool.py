@@ -0,0 +1,96 @@
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from capstone import archive_pool, file_store, storage
+
+
+def _make_zip(path: Path, files: dict[str, str]) -> Path:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, text in files.items():
+            zf.writestr(name, text)
+    return path
+
+
+def test_path_archive_reuses_handle_and_caches_members(tmp_path):
+    pool = archive_pool.ArchivePool(max_handles=4)
+    zpath = _make_zip(tmp_path / "demo.zip", {"a.py": "print(1)\n", "b.md": "# hi\n"})
+
+    with archive_pool.open_path_archive(zpath, pool=pool) as zf:
+        assert zf.read("a.py") == b"print(1)\n"
+    with archive_pool.open_path_archive(zpath, pool=pool) as zf:
+        assert zf.read("a.py") == b"print(1)\n"
+        assert sorted(zf.namelist()) == ["a.py", "b.md"]
+
+    stats = pool.stats()
+    assert stats["opens"] == 1
+    assert stats["reuses"] == 1
+    assert stats["member_cache_hits"] == 1
+
+
+def test_rewritten_blob_is_reopened(tmp_path):
+    pool = archive_pool.ArchivePool(max_handles=4)
+    zpath = _make_zip(tmp_path / "demo.zip", {"a.py": "old\n"})
+    with archive_pool.open_path_archive(zpath, pool=pool) as zf:
+        assert zf.read("a.py") == b"old\n"
+
+    time.sleep(0.01)
+    _make_zip(tmp_path / "demo.zip", {"a.py": "new contents\n"})
+    with archive_pool.open_path_archive(zpath, pool=pool) as zf:
+        assert zf.read("a.py") == b"new contents\n"
+    assert pool.stats()["opens"] == 2
+
+
+def test_lru_bound_defers_close_until_lease_released(tmp_path):
+    pool = archive_pool.ArchivePool(max_handles=1)
+    first = _make_zip(tmp_path / "one.zip", {"x.txt": "1"})
+    second = _make_zip(tmp_path / "two.zip", {"y.txt": "2"})
+
+    with archive_pool.open_path_archive(first, pool=pool) as zf_one:
+        with archive_pool.open_path_archive(second, pool=pool) as zf_two:
+            assert zf_two.read("y.txt") == b"2"
+        # Evicted from the pool but still readable by its current holder.
+        assert zf_one.read("x.txt") == b"1"
+    assert pool.stats()["open_handles"] == 1
+
+
+def test_member_cache_is_byte_bounded():
+    cache = archive_pool._MemberCache(max_bytes=10, max_item_bytes=8)
+    cache.put(("k", 1), b"12345")
+    cache.put(("k", 2), b"67890")
+    cache.put(("k", 3), b"abc")
+    cache.put(("k", 4), b"way too large")
+    assert cache.get(("k", 1)) is None
+    assert cache.get(("k", 3)) == b"abc"
+    assert cache.get(("k", 4)) is None
+    assert cache.size_bytes <= 10
+
+
+def test_stored_archive_concurrent_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    conn = storage.open_db()
+    try:
+        files = {f"src/m{i}.py": f"value = {i}\n" * 200 for i in range(20)}
+        zpath = _make_zip(tmp_path / "proj.zip", files)
+        stored = file_store.ensure_file(conn, zpath, original_name="proj.zip")
+        pool = archive_pool.ArchivePool(max_handles=2)
+        errors: list[Exception] = []
+
+        def worker() -> None:
+            try:
+                with archive_pool.open_stored_archive(conn, stored["file_id"], pool=pool) as zf:
+                    for name, text in files.items():
+                        assert zf.read(name) == text.encode()
+            except Exception as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert pool.stats()["open_handles"] == 1
+    finally:
+        storage.close_db(conn)
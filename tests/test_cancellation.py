@@ -0,0 +1,184 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from zipfile import ZipFile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import cancellation, config, file_store, storage
+from capstone.api.middleware.cancellation import CancellationMiddleware
+from capstone.api.server import create_app
+from capstone.cancellation import CancelToken, OperationCancelled, run_subprocess, stream_subprocess_lines, use_token
+from capstone.config import Preferences
+from capstone.git_analysis import parse_git_log_stream
+from capstone.modes import ModeResolution
+from capstone.zip_analyzer import ZipAnalyzer
+
+SLEEP_30 = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def test_deadline_cancels_token():
+    token = CancelToken(deadline_s=0.05)
+    assert not token.cancelled
+    assert token.wait(5) is True
+    assert token.reason == "deadline"
+    with pytest.raises(OperationCancelled) as exc_info:
+        token.raise_if_cancelled()
+    assert exc_info.value.reason == "deadline"
+
+
+def test_check_is_a_no_op_without_a_token():
+    cancellation.check()
+    with use_token(CancelToken()) as token:
+        token.cancel("disconnected")
+        with pytest.raises(OperationCancelled):
+            cancellation.check()
+    cancellation.check()
+
+
+def test_run_subprocess_kills_child_on_cancel():
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel, args=("disconnected",)).start()
+    started = time.monotonic()
+    with pytest.raises(OperationCancelled):
+        run_subprocess(SLEEP_30, token=token)
+    assert time.monotonic() - started < 10
+
+
+def test_run_subprocess_timeout_and_output():
+    result = run_subprocess([sys.executable, "-c", "print('ok')"], text=True, check=True)
+    assert result.stdout.strip() == "ok"
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_subprocess(SLEEP_30, timeout=0.2)
+
+
+def test_stream_yields_lines_while_the_child_runs():
+    child = [sys.executable, "-u", "-c", "import time; print('first'); time.sleep(30)"]
+    started = time.monotonic()
+    lines = stream_subprocess_lines(child)
+    assert next(lines) == "first\n"
+    lines.close()  # stopping early kills the child
+    assert time.monotonic() - started < 10
+
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel, args=("disconnected",)).start()
+    with pytest.raises(OperationCancelled):
+        list(stream_subprocess_lines(child, token=token))
+    with pytest.raises(subprocess.TimeoutExpired):
+        list(stream_subprocess_lines(child, timeout=0.2))
+
+
+def test_stream_caps_long_lines_and_stderr(monkeypatch):
+    monkeypatch.setattr(cancellation, "MAX_LINE_CHARS", 16)
+    monkeypatch.setattr(cancellation, "STDERR_LIMIT_BYTES", 10)
+    script = "import sys; print('x' * 100); print('ok'); sys.stderr.write('e' * 1000 + 'TAIL'); sys.exit(3)"
+    lines = []
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        for line in stream_subprocess_lines([sys.executable, "-c", script], check=True):
+            lines.append(line)
+    assert lines == ["x" * 16, "ok\n"]
+    assert exc_info.value.returncode == 3
+    assert exc_info.value.stderr == "eeeeeeTAIL"
+
+
+def test_git_log_parsing_stops_when_cancelled():
+    stream = "\n".join(f"commit:{i:040x}|Alice|alice@example.com|1700000000|work" for i in range(10))
+    assert len(parse_git_log_stream(stream)) == 10
+    token = CancelToken()
+    token.cancel()
+    with use_token(token), pytest.raises(OperationCancelled):
+        parse_git_log_stream(stream)
+
+
+@pytest.fixture
+def isolated_storage(tmp_path, monkeypatch):
+    storage.close_db()
+    monkeypatch.setattr(storage, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(storage, "CURRENT_USER", None)
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    monkeypatch.setattr(config, "CONFIG_DIR", tmp_path / "config")
+    monkeypatch.setattr(config, "CONFIG_PATH", tmp_path / "config" / "user_config.json")
+    yield tmp_path
+    storage.close_db()
+
+
+def test_cancelled_analysis_leaves_no_rows_or_files(isolated_storage, monkeypatch):
+    tmp_path = isolated_storage
+    archive_path = tmp_path / "big.zip"
+    with ZipFile(archive_path, "w") as zf:
+        for i in range(200):
+            zf.writestr(f"src/module_{i}.py", f"value = {i}\n")
+
+    token = CancelToken()
+    build_record = ZipAnalyzer._build_record
+
+    def cancel_mid_scan(self, info, mode):
+        token.cancel("disconnected")
+        return build_record(self, info, mode)
+
+    monkeypatch.setattr(ZipAnalyzer, "_build_record", cancel_mid_scan)
+    metadata_path = tmp_path / "out" / "metadata.jsonl"
+    with pytest.raises(OperationCancelled):
+        ZipAnalyzer().analyze(
+            zip_path=archive_path,
+            metadata_path=metadata_path,
+            summary_path=tmp_path / "out" / "summary.json",
+            mode=ModeResolution(requested="local", resolved="local", reason="test"),
+            preferences=Preferences(),
+            project_id="big",
+            db_dir=tmp_path,
+            cancel=token,
+        )
+
+    conn = storage.open_db(tmp_path)
+    assert conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM project_analysis").fetchone()[0] == 0
+    assert not metadata_path.exists()
+    assert not [p for p in (tmp_path / "files").rglob("*") if p.is_file()]
+
+
+def test_middleware_cancels_token_when_client_disconnects():
+    seen = {}
+
+    async def app(scope, receive, send):
+        await receive()
+        token = cancellation.current_token()
+        while not token.cancelled:
+            await asyncio.sleep(0.01)
+        seen["reason"] = token.reason
+        seen["after"] = await receive()
+
+    async def run():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        gone = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        asyncio.get_running_loop().call_later(0.05, gone.set)
+        await asyncio.wait_for(CancellationMiddleware(app)({"type": "http"}, receive, send), 5)
+
+    asyncio.run(run())
+    assert seen == {"reason": "disconnected", "after": {"type": "http.disconnect"}}
+
+
+def test_server_maps_deadline_to_504(tmp_path):
+    app = create_app(db_dir=str(tmp_path), auth_token=None)
+
+    def slow():
+        raise OperationCancelled("deadline")
+
+    app.add_api_route("/slow", slow)
+    response = TestClient(app).get("/slow")
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
@@ -244,3 +244,39 @@ def test_delete_project_zip_deletes(monkeypatch, mock_s3):
 
     assert result["status"] == "deleted"
     assert mock_s3.deleted == [("loom-storage", "users/testuser/projects/project1/project.zip")]
+
+
+def test_get_cloud_blob_key():
+    assert cloud_storage.get_cloud_blob_key("testuser", "abc123") == "users/testuser/files/abc123"
+
+
+def test_blob_sync_round_trip(monkeypatch, mock_s3, tmp_path):
+    blob = tmp_path / "abc123.png"
+    blob.write_text("png", encoding="utf-8")
+    monkeypatch.setattr(cloud_storage, "object_exists", lambda bucket, key: True)
+    monkeypatch.setattr(cloud_storage, "BUCKET_NAME", "loom-storage")
+
+    assert cloud_storage.upload_blob("testuser", "abc123", blob)["key"] == "users/testuser/files/abc123"
+    target = tmp_path / "restored.png"
+    assert cloud_storage.download_blob("testuser", "abc123", target)["status"] == "downloaded"
+    assert target.exists()
+    assert cloud_storage.delete_blob("testuser", "abc123")["status"] == "deleted"
+    assert mock_s3.deleted == [("loom-storage", "users/testuser/files/abc123")]
+
+def test_download_all_project_zips_does_not_switch_the_process_user(monkeypatch):
+    from capstone import storage
+
+    seen = {}
+
+    def fake_download(user_id, conn):
+        seen["db"] = conn.execute("PRAGMA database_list").fetchone()[2]
+        seen["current_user"] = storage.get_current_user()
+        return {"status": "ok"}
+
+    monkeypatch.setattr(storage, "CURRENT_USER", None)
+    monkeypatch.setattr(cloud_storage, "_download_all_project_zips_with_conn", fake_download)
+
+    assert cloud_storage.download_all_project_zips("testuser") == {"status": "ok"}
+    assert Path(seen["db"]) == storage.get_database_path(user="testuser")
+    assert seen["current_user"] is None
+    assert storage.CURRENT_USER is None
@@ -90,6 +90,25 @@ class ConfigModuleTestCase(unittest.TestCase):
         with self.assertRaises(ValueError):
             config.validate_config_shape(bad_payload)
 
+    def test_load_config_is_cached_until_the_file_changes(self) -> None:
+        config.update_preferences(theme="dark")
+        with patch.object(config, "_read_config", wraps=config._read_config) as reader:
+            first = config.load_config()
+            first.preferences.theme = "mutated"
+            self.assertEqual(config.load_config().preferences.theme, "dark")
+            reader.assert_not_called()
+
+            # Another process rewrites the file: the new signature forces a re-read.
+            other = config.load_config()
+            other.preferences.theme = "solarized"
+            payload = self._load_raw_payload()
+            payload["preferences"] = config._encrypt(other.preferences.__dict__)  # type: ignore[attr-defined]
+            tmp = config.CONFIG_PATH.with_suffix(".other")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            tmp.replace(config.CONFIG_PATH)
+            self.assertEqual(config.load_config().preferences.theme, "solarized")
+            self.assertEqual(reader.call_count, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
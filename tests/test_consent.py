@@ -163,6 +163,18 @@ class ConsentFlowTestCase(unittest.TestCase):
         state = consent_module.get_consent()
         self.assertFalse(state["external_consent"])
     
+    def test_consent_checks_reuse_the_cached_row_until_a_write(self) -> None:
+        consent_module.set_external_consent(True)
+        with patch.object(consent_module, "open_db", wraps=consent_module.open_db) as opener:
+            ensure_external_permission("demo.service")
+            consent_module.get_consent()
+            opener.assert_not_called()
+
+            consent_module.set_external_consent(False)
+            with self.assertRaises(ExternalPermissionDenied):
+                ensure_external_permission("demo.service")
+            self.assertEqual(opener.call_count, 1)
+
     # tests previously saved consent (no prompt)
     def test_ensure_or_prompt_consent_granted_existing(self) -> None:
         grant_consent()
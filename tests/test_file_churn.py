@@ -0,0 +1,89 @@
+import json
+
+from capstone.file_churn import ChurnTracker, CountMinSketch, numstat_path
+from capstone.git_analysis import GitHistory, fold_git_log
+
+LOG = """commit:c3|Bob|bob@example.com|1700200000|Tweak app
+4	1	src/app.py
+commit:c2|Alice|alice@example.com|1700100000|Rename helper
+2	2	src/{util.py => helpers.py}
+10	0	src/app.py
+commit:c1|Alice|alice@example.com|1700000000|Initial commit
+30	0	src/app.py
+5	0	README.md
+-	-	assets/logo.png
+"""
+
+
+def test_numstat_path_follows_renames():
+    assert numstat_path("src/app.py") == "src/app.py"
+    assert numstat_path("old.py => new.py") == "new.py"
+    assert numstat_path("src/{util.py => helpers.py}") == "src/helpers.py"
+    assert numstat_path("src/{ => core}/app.py") == "src/core/app.py"
+
+
+def test_hotspots_and_ownership_come_from_the_log_parse():
+    summary = fold_git_log(LOG.splitlines()).churn.summary()
+
+    app = summary["hotspots"][0]
+    assert app["path"] == "src/app.py"
+    assert (app["commits"], app["churn"], app["authors"]) == (3, 45, 2)
+    assert (app["top_author"], app["top_author_share"], app["bus_factor"]) == ("Alice", 0.889, 1)
+    assert {row["path"] for row in summary["hotspots"]} == {
+        "src/app.py", "src/helpers.py", "README.md", "assets/logo.png"
+    }
+
+    src = summary["directories"][0]
+    # One change per commit, however many of its files were touched.
+    assert (src["path"], src["commits"], src["lines_added"], src["lines_deleted"]) == ("src", 3, 46, 3)
+    assert summary["truncated"] is False
+
+
+def test_memory_stays_bounded_on_large_histories():
+    tracker = ChurnTracker(top_k=5)
+    for i in range(500):
+        tracker.add_commit("Alice", [("hot/core.py", 2, 1), (f"cold/file_{i}.py", 1, 0)])
+
+    assert len(tracker.files.paths) <= 10
+    summary = tracker.summary(limit=3)
+    hot = summary["hotspots"][0]
+    assert (hot["path"], hot["commits"], hot["churn"], hot["approximate"]) == ("hot/core.py", 500, 1500, False)
+    assert summary["truncated"] is True
+
+    # A pruned path that changes again re-enters with its estimated history.
+    assert "cold/file_250.py" not in tracker.files.paths
+    tracker.add_commit("Bob", [("cold/file_250.py", 1, 0)])
+    entry = tracker.files.paths["cold/file_250.py"]
+    assert entry.approximate and entry.commits >= 2
+
+
+def test_sketch_never_undercounts():
+    sketch = CountMinSketch(width=16, depth=3)
+    for i in range(100):
+        sketch.add(f"path_{i}", i + 1, 2 * (i + 1))
+    for i in range(100):
+        commits, lines = sketch.estimate(f"path_{i}")
+        assert commits >= i + 1 and lines >= 2 * (i + 1)
+
+
+def test_resumed_history_keeps_churn():
+    previous_log = LOG.split("\n", 2)[2]  # without commit c3
+    previous = GitHistory.from_dict(json.loads(json.dumps(fold_git_log(previous_log.splitlines()).to_dict())))
+
+    resumed = fold_git_log(LOG.splitlines(), previous)
+    assert resumed.parsed_commits == 1
+    assert resumed.churn.summary() == fold_git_log(LOG.splitlines()).churn.summary()
+
+
+def test_stored_sketch_is_compact():
+    tracker = ChurnTracker(top_k=5)
+    for i in range(50):
+        tracker.add_commit("Alice", [(f"src/file_{i}.py", 3, 1)])
+    assert tracker.files.sketch is not None
+
+    stored = json.dumps(tracker.to_dict())
+    assert len(stored) < 10_000
+    restored = ChurnTracker.from_dict(json.loads(stored))
+    assert restored.files.sketch.changes == tracker.files.sketch.changes
+    assert restored.files.sketch.lines == tracker.files.sketch.lines
+    assert restored.summary() == tracker.summary()
@@ -128,6 +128,96 @@ class FileStoreUnitTests(unittest.TestCase):
         self.assertTrue(stats["deleted_files"] >= 0)  # may already be gone
         self.assertFalse(path.exists())
 
+    def _make_versioned_zip(self, name: str, version: str) -> Path:
+        tmp_zip = Path(self.tmpdir.name) / name
+        with zipfile.ZipFile(tmp_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(zipfile.ZipInfo("src/", date_time=(2024, 1, 1, 0, 0, 0)), b"")
+            zf.writestr(zipfile.ZipInfo("src/app.py", date_time=(2024, 1, 1, 0, 0, 0)), "print('hi')\n" * 50)
+            zf.writestr(zipfile.ZipInfo("README.md", date_time=(2024, 1, 1, 0, 0, 0)), "# Demo\n")
+            zf.writestr(zipfile.ZipInfo("VERSION", date_time=(2024, 1, 1, 0, 0, 0)), version)
+        return tmp_zip
+
+    def test_pack_mode_stores_shared_members_once(self) -> None:
+        first_zip = self._make_versioned_zip("v1.zip", "1")
+        second_zip = self._make_versioned_zip("v2.zip", "2")
+
+        first = file_store.ensure_file(self.conn, first_zip, original_name="v1.zip", pack=True)
+        second = file_store.ensure_file(self.conn, second_zip, original_name="v2.zip", pack=True)
+
+        self.assertTrue(first["packed"])
+        self.assertTrue(second["packed"])
+        self.assertNotEqual(first["file_id"], second["file_id"])
+        self.assertFalse(Path(first["path"]).exists())
+
+        # app.py, README.md, VERSION 1, VERSION 2 -> four distinct members
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM pack_members").fetchone()[0], 4)
+        shared = self.conn.execute(
+            "SELECT ref_count FROM pack_members WHERE file_size = ?",
+            (len("print('hi')\n" * 50),),
+        ).fetchone()[0]
+        self.assertEqual(shared, 2)
+
+        with file_store.open_file(self.conn, second["file_id"]) as fh, zipfile.ZipFile(fh) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.namelist(), ["src/", "src/app.py", "README.md", "VERSION"])
+            self.assertEqual(zf.read("VERSION"), b"2")
+            self.assertEqual(zf.read("src/app.py"), b"print('hi')\n" * 50)
+
+    def test_pack_mode_materialize_and_release(self) -> None:
+        zip_path = self._make_versioned_zip("v1.zip", "1")
+        meta = file_store.ensure_file(self.conn, zip_path, original_name="v1.zip", pack=True)
+
+        with file_store.materialize_file(self.conn, meta["file_id"]) as materialized:
+            with zipfile.ZipFile(materialized) as zf:
+                self.assertEqual(zf.read("README.md"), b"# Demo\n")
+        # The rebuilt archive is temporary: the members stay the only copy.
+        self.assertFalse(materialized.exists())
+        self.assertFalse(Path(meta["path"]).exists())
+
+        member_paths = [Path(row[0]) for row in self.conn.execute("SELECT path FROM pack_members")]
+        file_store.release_file(self.conn, meta["file_id"])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM pack_members").fetchone()[0], 0)
+        self.assertFalse(file_store.is_packed(self.conn, meta["file_id"]))
+        self.assertFalse(any(path.exists() for path in member_paths))
+
+    def test_pack_mode_falls_back_for_non_zip(self) -> None:
+        blob = Path(self.tmpdir.name) / "notes.zip"
+        blob.write_bytes(b"not really a zip")
+        meta = file_store.ensure_file(self.conn, blob, original_name="notes.zip", pack=True)
+        self.assertFalse(meta["packed"])
+        self.assertTrue(Path(meta["path"]).exists())
+
+    def test_ensure_bytes_dedups_and_releases(self) -> None:
+        first = file_store.ensure_bytes(self.conn, b"\x89PNG-bytes", mime="image/png", ext=".png")
+        second = file_store.ensure_bytes(self.conn, b"\x89PNG-bytes", mime="image/png", ext=".png")
+        self.assertFalse(first["dedup"])
+        self.assertTrue(second["dedup"])
+        self.assertEqual(first["file_id"], second["file_id"])
+        self.assertTrue(first["path"].endswith(".png"))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0], 0)
+
+        self.assertIsNone(file_store.release_bytes(self.conn, first["file_id"]))
+        orphan = file_store.release_bytes(self.conn, first["file_id"])
+        self.assertEqual(orphan, Path(first["path"]))
+        self.assertIsNone(
+            self.conn.execute("SELECT 1 FROM files WHERE file_id = ?", (first["file_id"],)).fetchone()
+        )
+
+    def test_project_thumbnail_lives_in_file_store(self) -> None:
+        self.conn.execute("INSERT INTO projects (project_id, name) VALUES (?, ?)", ("thumb-demo", "Thumb"))
+        meta = storage.upsert_project_thumbnail(
+            self.conn,
+            "thumb-demo",
+            image_bytes=b"fake-image",
+            filename="cover.png",
+            content_type="image/png",
+        )
+        self.assertEqual(meta["size_bytes"], len(b"fake-image"))
+        self.assertTrue(Path(file_store.DEFAULT_FILES_ROOT, f"{meta['file_id']}.png").exists())
+
+        latest = storage.fetch_project_thumbnail_meta(self.conn, "thumb-demo")
+        self.assertEqual(latest["file_id"], meta["file_id"])
+        self.assertEqual(storage.fetch_project_thumbnail_bytes(self.conn, "thumb-demo"), b"fake-image")
 
 
 if __name__ == "__main__":
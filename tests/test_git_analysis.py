@@ -13,7 +13,22 @@ if str(SRC) not in sys.path:
 
 from capstone import storage  # noqa: E402
 from capstone.external_artifacts import RepositoryDescriptor  # noqa: E402
-from capstone.git_analysis import analyze_repository, parse_git_log_stream, summarize_to_json  # noqa: E402
+from capstone.collaboration_analysis import (  # noqa: E402
+    CommitColumns,
+    aggregate_commit_columns,
+    build_collaboration_analysis,
+    load_numpy,
+    to_compact_collaboration,
+    weekly_histogram,
+)
+from capstone.git_analysis import (  # noqa: E402
+    GitHistory,
+    analyze_repository,
+    fold_git_log,
+    load_git_history,
+    parse_git_log_stream,
+    summarize_to_json,
+)
 
 
 _SAMPLE_GIT_LOG = """commit:abcd1234|Alice Example|alice@example.com|1700000000|Initial commit
@@ -26,6 +41,11 @@ commit:abcd9abc|Bob Collaborator|bob@example.com|1700000200|Review: adjust style
 """
 
 
+def _streamed(log: str):
+    """A ``run_git_log`` stand-in yielding *log* line by line on every call."""
+    return lambda *args, **kwargs: iter(log.splitlines(keepends=True))
+
+
 class GitLogParsingTests(unittest.TestCase):
     def test_parse_git_log_stream(self) -> None:
         entries = parse_git_log_stream(_SAMPLE_GIT_LOG)
@@ -36,6 +56,120 @@ class GitLogParsingTests(unittest.TestCase):
         self.assertEqual(entries[1]["kind"], "commit")
 
 
+_NEWER_COMMITS = """commit:abcdef01|Alice Example|alice@example.com|1700090000|Add tests
+7	2	tests/test_app.py
+commit:abcdef00|Carol New|carol@example.com|1700080000|First patch
+3	0	src/util.py
+"""
+
+
+class GitHistoryFoldTests(unittest.TestCase):
+    def test_fold_matches_per_commit_analysis(self) -> None:
+        log = _NEWER_COMMITS + _SAMPLE_GIT_LOG
+        per_commit = to_compact_collaboration(build_collaboration_analysis(parse_git_log_stream(log)))
+        folded = to_compact_collaboration(build_collaboration_analysis(fold_git_log(log.splitlines()).entries()))
+        self.assertEqual(folded, per_commit)
+
+    def test_extended_history_parses_only_new_commits(self) -> None:
+        previous = GitHistory.from_dict(json.loads(json.dumps(fold_git_log(_SAMPLE_GIT_LOG.splitlines()).to_dict())))
+        history = fold_git_log((_NEWER_COMMITS + _SAMPLE_GIT_LOG).splitlines(), previous)
+
+        self.assertEqual(history.parsed_commits, 2)
+        self.assertEqual(history.commit_count, 5)
+        self.assertEqual(history.head_sha, "abcdef01")
+        full = fold_git_log((_NEWER_COMMITS + _SAMPLE_GIT_LOG).splitlines())
+        self.assertEqual(history.entries(), full.entries())
+        activity = history.author_activity()["Alice Example"]
+        self.assertEqual(activity["commits"], 2)
+        self.assertEqual(activity["active_days"], 2)
+        self.assertEqual(activity["lines"], 25)
+
+    def test_rewritten_history_is_rebuilt(self) -> None:
+        previous = fold_git_log(_SAMPLE_GIT_LOG.splitlines())
+        rewritten = _SAMPLE_GIT_LOG.replace("abcd1234", "ffff1234").replace("abcd9abc", "ffff9abc")
+        history = fold_git_log(rewritten.splitlines(), previous)
+        self.assertEqual(history.parsed_commits, 3)
+        self.assertEqual(history.commit_count, 3)
+
+        # Commits merged in below the known head (older dates) also force a rebuild.
+        merged = _SAMPLE_GIT_LOG + "commit:0ld0ld00|Dan Branch|dan@example.com|1600000000|Old work\n1\t1\tx.py\n"
+        history = fold_git_log(merged.splitlines(), previous)
+        self.assertEqual(history.parsed_commits, 4)
+        self.assertEqual(history.commit_count, 4)
+
+
+    def test_streamed_log_is_reread_only_to_rebuild(self) -> None:
+        previous = fold_git_log(_SAMPLE_GIT_LOG.splitlines())
+        reads = []
+
+        def fold(log: str) -> GitHistory:
+            stream = _streamed(log)
+            return fold_git_log(stream(), previous, reopen=lambda: reads.append(log) or stream())
+
+        history = fold(_NEWER_COMMITS + _SAMPLE_GIT_LOG)
+        self.assertEqual((history.parsed_commits, history.commit_count, len(reads)), (2, 5, 0))
+
+        # Without the head the first read already parsed everything.
+        history = fold(_NEWER_COMMITS + _SAMPLE_GIT_LOG.replace("abcd1234", "ffff1234"))
+        self.assertEqual((history.parsed_commits, len(reads)), (5, 0))
+
+        merged = _NEWER_COMMITS + _SAMPLE_GIT_LOG + "commit:0ld0ld00|Dan Branch|dan@example.com|1600000000|Old\n"
+        history = fold(merged)
+        self.assertEqual((history.parsed_commits, history.commit_count, len(reads)), (6, 6, 1))
+        self.assertEqual(history.entries(), fold_git_log(merged.splitlines()).entries())
+
+
+class CommitColumnAggregationTests(unittest.TestCase):
+    def _columns(self) -> CommitColumns:
+        columns = CommitColumns()
+        # 1700000000 is Tuesday 2023-11-14; 1700600000 falls in the following week.
+        for author, ts, added, deleted in [
+            ("alice", 1700000000, 10, 2),
+            ("bob", 0, 4, 4),
+            ("alice", 1700090000, 1, 0),
+            ("alice", 1700600000, 3, 3),
+            ("bob", 1700000100, 5, 0),
+            ("alice", 1700000500, 0, 1),
+        ]:
+            columns.append(author, ts, added, deleted)
+        return columns
+
+    def test_python_totals(self) -> None:
+        columns = self._columns()
+        alice, bob = aggregate_commit_columns(columns, use_numpy=False)
+        self.assertEqual(columns.authors, ["alice", "bob"])
+        self.assertEqual((alice.commits, alice.added, alice.deleted), (4, 14, 6))
+        self.assertEqual((alice.first_ts, alice.last_ts), (1700000000, 1700600000))
+        self.assertEqual(alice.day_counts, {19675: 2, 19676: 1, 19682: 1})
+        self.assertEqual(alice.active_days, 3)
+        # Commits without a timestamp count towards totals but not dates.
+        self.assertEqual((bob.commits, bob.first_ts, bob.active_days), (2, 1700000100, 1))
+        self.assertEqual(weekly_histogram(alice.day_counts), {19674: 3, 19681: 1})
+
+    def test_numpy_matches_python(self) -> None:
+        if load_numpy() is None:
+            self.skipTest("numpy is not installed")
+        columns = self._columns()
+        self.assertEqual(
+            aggregate_commit_columns(columns, use_numpy=True),
+            aggregate_commit_columns(columns, use_numpy=False),
+        )
+
+    def test_history_reports_weekly_commits(self) -> None:
+        history = fold_git_log((_NEWER_COMMITS + _SAMPLE_GIT_LOG).splitlines())
+        activity = history.author_activity()
+        self.assertEqual(activity["Alice Example"]["weekly_commits"], {"2023-11-13": 2})
+        self.assertEqual(activity["Carol New"]["first_commit_date"], "2023-11-15T20:26:40Z")
+
+    def test_state_from_older_layout_is_ignored(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        state = fold_git_log(_SAMPLE_GIT_LOG.splitlines()).to_dict()
+        for stored, expected in ((state, "abcd1234"), (dict(state, version=1), None)):
+            with patch("capstone.git_analysis.fetch_git_history_state", return_value=stored):
+                loaded = load_git_history(conn, "sample")
+            self.assertEqual(loaded.head_sha if loaded else None, expected)
+
+
 class RepositoryAnalysisTests(unittest.TestCase):
     def setUp(self) -> None:
         self._tmpdir = tempfile.TemporaryDirectory()
@@ -55,7 +189,7 @@ class RepositoryAnalysisTests(unittest.TestCase):
 
     def test_analyze_repository_persists_snapshot(self) -> None:
         db_dir = Path(self._tmpdir.name) / "db"
-        with patch("capstone.git_analysis.run_git_log", return_value=_SAMPLE_GIT_LOG), patch(
+        with patch("capstone.git_analysis.run_git_log", side_effect=_streamed(_SAMPLE_GIT_LOG)), patch(
             "capstone.git_analysis.discover_repository", return_value=None
         ):
             snapshot = analyze_repository(
@@ -80,13 +214,27 @@ class RepositoryAnalysisTests(unittest.TestCase):
         self.assertEqual(latest["project_id"], "sample")
         self.assertIn("collaboration", latest)
 
+    def test_analyze_repository_resumes_from_stored_head(self) -> None:
+        db_dir = Path(self._tmpdir.name) / "db"
+        with patch("capstone.git_analysis.discover_repository", return_value=None):
+            with patch("capstone.git_analysis.run_git_log", side_effect=_streamed(_SAMPLE_GIT_LOG)):
+                analyze_repository(self.repo_dir, project_id="sample", db_dir=db_dir)
+            with patch("capstone.git_analysis.run_git_log", side_effect=_streamed(_NEWER_COMMITS + _SAMPLE_GIT_LOG)):
+                snapshot = analyze_repository(self.repo_dir, project_id="sample", db_dir=db_dir)
+
+        contributors = snapshot["collaboration"]["contributors (commits, line changes, reviews)"]
+        self.assertEqual(contributors["Alice Example"], "[2, 25, 0]")
+        self.assertIn("Carol New", contributors)
+        state = storage.fetch_git_history_state(storage.open_db(db_dir), "sample")
+        self.assertEqual((state["head_sha"], state["commit_count"]), ("abcdef01", 5))
+
     def test_analyze_repository_adds_external_artifacts(self) -> None:
         descriptor = RepositoryDescriptor(provider="github", owner="acme", name="demo", url="https://github.com/acme/demo")
         external = {
             "pull_requests": [{"number": 2, "title": "Add feature", "url": "https://example/pr/2", "state": "merged"}],
             "issues": [],
         }
-        with patch("capstone.git_analysis.run_git_log", return_value=_SAMPLE_GIT_LOG), patch(
+        with patch("capstone.git_analysis.run_git_log", side_effect=_streamed(_SAMPLE_GIT_LOG)), patch(
             "capstone.git_analysis.discover_repository", return_value=descriptor
         ), patch("capstone.git_analysis.fetch_repository_artifacts", return_value=external):
             snapshot = analyze_repository(
@@ -0,0 +1,103 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from capstone.api import http_caching
+
+PAYLOAD = bytes(range(100))
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/blob")
+    def blob(request: Request, v: str | None = None):
+        return http_caching.content_response(
+            request,
+            etag_hash="abc123",
+            media_type="image/png",
+            data=PAYLOAD,
+            immutable=v == "abc123",
+        )
+
+    return TestClient(app)
+
+
+def test_full_response_carries_validators():
+    r = _client().get("/blob")
+    assert r.status_code == 200
+    assert r.content == PAYLOAD
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["etag"] == '"abc123"'
+    assert r.headers["accept-ranges"] == "bytes"
+    assert "immutable" not in r.headers["cache-control"]
+
+
+def test_pinned_version_is_immutable():
+    r = _client().get("/blob", params={"v": "abc123"})
+    assert "immutable" in r.headers["cache-control"]
+
+
+def test_if_none_match_returns_304():
+    r = _client().get("/blob", headers={"If-None-Match": '"other", "abc123"'})
+    assert r.status_code == 304
+    assert r.content == b""
+
+
+def test_range_requests():
+    client = _client()
+    r = client.get("/blob", headers={"Range": "bytes=10-19"})
+    assert r.status_code == 206
+    assert r.content == PAYLOAD[10:20]
+    assert r.headers["content-range"] == "bytes 10-19/100"
+
+    r = client.get("/blob", headers={"Range": "bytes=-5"})
+    assert r.content == PAYLOAD[-5:]
+
+    r = client.get("/blob", headers={"Range": "bytes=500-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */100"
+
+    r = client.get("/blob", headers={"Range": "bytes=0-1,5-6"})
+    assert r.status_code == 200
+    assert r.content == PAYLOAD
+
+
+def test_content_disposition_survives_non_latin1_and_quotes():
+    app = FastAPI()
+
+    @app.get("/named")
+    def named(request: Request):
+        return http_caching.content_response(
+            request,
+            etag_hash="abc123",
+            media_type="image/png",
+            data=PAYLOAD,
+            filename='résumé "final";草稿.png',
+        )
+
+    r = TestClient(app).get("/named")
+    assert r.status_code == 200
+    assert r.headers["content-disposition"] == (
+        'inline; filename="r_sum_ _final____.png"; '
+        "filename*=UTF-8''r%C3%A9sum%C3%A9%20%22final%22%3B%E8%8D%89%E7%A8%BF.png"
+    )
+
+
+def test_attachment_disposition_and_nosniff():
+    app = FastAPI()
+
+    @app.get("/page")
+    def page(request: Request):
+        return http_caching.content_response(
+            request,
+            etag_hash="abc123",
+            media_type="application/octet-stream",
+            data=b"<script>alert(1)</script>",
+            filename="index.html",
+            disposition="attachment",
+        )
+
+    r = TestClient(app).get("/page")
+    assert r.headers["content-disposition"].startswith('attachment; filename="index.html"')
+    assert r.headers["content-type"] == "application/octet-stream"
+    assert r.headers["x-content-type-options"] == "nosniff"
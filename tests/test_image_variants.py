@@ -0,0 +1,144 @@
+import io
+
+import pytest
+
+from capstone import file_store, image_variants, storage
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    connection = storage.open_db()
+    yield connection
+    storage.close_db(connection)
+
+
+def test_variants_are_generated_below_original_width(conn):
+    variants = image_variants.store_variants(conn, "src-1", _png(300, 150))
+    assert [v["width"] for v in variants] == [128, 256]
+    assert variants[0]["height"] == 64
+
+    path = image_variants.variant_path(conn, variants[1])
+    with Image.open(path) as img:
+        assert img.size == (256, 128)
+
+    # A second store for the same source does not add references.
+    image_variants.store_variants(conn, "src-1", _png(300, 150))
+    ref = conn.execute("SELECT ref_count FROM files WHERE file_id = ?", (variants[0]["file_id"],)).fetchone()[0]
+    assert ref == 1
+
+
+def test_pick_variant_prefers_smallest_fit(conn):
+    image_variants.store_variants(conn, "src-2", _png(1000, 500))
+    assert image_variants.pick_variant(conn, "src-2", 200)["width"] == 256
+    assert image_variants.pick_variant(conn, "src-2", 128)["width"] == 128
+    assert image_variants.pick_variant(conn, "src-2", 800) is None
+    assert image_variants.pick_variant(conn, "src-2", None) is None
+
+
+def test_release_variants_returns_orphaned_blobs(conn):
+    variants = image_variants.store_variants(conn, "src-3", _png(600, 600))
+    paths = sorted(image_variants.variant_path(conn, v) for v in variants)
+    orphaned = image_variants.release_variants(conn, "src-3")
+    assert sorted(orphaned) == paths
+    assert image_variants.list_variants(conn, "src-3") == []
+
+
+def test_undecodable_bytes_produce_no_variants(conn):
+    assert image_variants.store_variants(conn, "src-4", b"not an image") == []
+
+
+def test_thumbnail_upload_resizes_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    from fastapi.testclient import TestClient
+
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    threads = []
+    store_variants = image_variants.store_variants
+
+    def recording_store(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return store_variants(*args, **kwargs)
+
+    monkeypatch.setattr(image_variants, "store_variants", recording_store)
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    conn = storage.open_db()
+    conn.execute("INSERT INTO projects (project_id, name, source) VALUES ('p1', 'p1', 'github')")
+    conn.commit()
+    r = client.post("/projects/p1/thumbnail", files={"file": ("t.png", _png(300, 150), "image/png")})
+    assert r.status_code == 200, r.text
+    assert r.json()["data"]["variant_widths"] == [128, 256]
+    assert threads and threads[0].startswith("capstone-blocking")
+
+
+def test_project_delete_removes_cloud_thumbnails(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from capstone.api.routes import auth, projects
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    uploaded, deleted = [], []
+    monkeypatch.setattr(projects, "upload_blob", lambda user, file_id, path: uploaded.append(file_id))
+    monkeypatch.setattr(projects, "upload_database", lambda user: None)
+    monkeypatch.setattr(projects, "delete_project_zip", lambda user, pid, name: None)
+    monkeypatch.setattr(projects, "delete_blob", lambda user, file_id: deleted.append(file_id))
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    monkeypatch.setitem(auth._SESSIONS, "tok", {"user": {"username": "alice"}})
+    headers = {"Authorization": "Bearer tok"}
+
+    conn = storage.open_db(user=storage.resolve_storage_user_key("alice"))
+    conn.execute("INSERT INTO projects (project_id, name, source) VALUES ('p1', 'p1', 'github')")
+    conn.commit()
+    storage.close_db(conn)
+    r = client.post("/projects/p1/thumbnail", files={"file": ("t.png", _png(300, 150), "image/png")}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert uploaded == [r.json()["data"]["file_id"]]
+
+    assert client.delete("/projects/p1", headers=headers).status_code == 200
+    assert deleted == uploaded
+
+
+def test_portfolio_variants_are_cached_and_released_with_the_project(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from capstone.api import http_caching
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    conn = storage.open_db()
+    conn.execute("INSERT INTO projects (project_id, name, source) VALUES ('p1', 'p1', 'github')")
+    conn.execute(
+        "INSERT INTO project_analysis (project_id, classification, snapshot) VALUES ('p1', 'individual', '{\"n\": 1}')"
+    )
+    conn.commit()
+
+    r = client.post("/portfolio/p1/images", files={"file": ("a.png", _png(600, 300), "image/png")})
+    assert r.status_code == 200, r.text
+    image_id = r.json()["data"]["id"]
+    variants = image_variants.list_variants(conn, image_variants.portfolio_source_key(image_id))
+    paths = [image_variants.variant_path(conn, v) for v in variants]
+    assert paths and all(p.exists() for p in paths)
+
+    r = client.get(f"/portfolio/p1/images/{image_id}/file", params={"w": 256})
+    assert r.headers["cache-control"] == http_caching.IMMUTABLE_CACHE_CONTROL
+    etag = r.headers["etag"]
+    r = client.get(f"/portfolio/p1/images/{image_id}/file", params={"w": 256}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    assert client.delete("/projects/p1").status_code == 200
+    assert not any(p.exists() for p in paths)
+    assert image_variants.list_variants(conn, image_variants.portfolio_source_key(image_id)) == []
+    storage.close_db(conn)
@@ -0,0 +1,54 @@
+"""Start-up budget for ``capstone.api.server``.
+
+Workers are started on demand, so importing the API must stay cheap: heavy
+clients (``openai``, ``boto3``/``botocore``) and ``psutil`` are loaded on first use, never at import.
+The time budget is deliberately generous; ``CAPSTONE_IMPORT_BUDGET_MS``
+overrides it on slow machines.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import capstone
+
+DEFERRED_MODULES = {"openai", "boto3", "botocore", "psutil"}
+BUDGET_MS = float(os.getenv("CAPSTONE_IMPORT_BUDGET_MS", "2500"))
+SRC_DIR = Path(capstone.__file__).resolve().parents[1]
+
+
+def _import_server() -> dict[str, int]:
+    """Import the API in a fresh interpreter; cumulative microseconds per module."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import capstone.api.server"],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            timings[name.strip()] = int(cumulative)
+        except ValueError:  # header row
+            continue
+    return timings
+
+
+def test_server_import_defers_heavy_clients():
+    timings = _import_server()
+    assert "capstone.api.server" in timings
+    assert DEFERRED_MODULES.isdisjoint(timings)
+
+
+def test_server_import_within_budget():
+    # Best of two, so the first run's bytecode compilation does not count.
+    elapsed_ms = min(_import_server()["capstone.api.server"] for _ in range(2)) / 1000
+    assert elapsed_ms < BUDGET_MS, f"importing capstone.api.server took {elapsed_ms:.0f} ms"
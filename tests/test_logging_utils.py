@@ -0,0 +1,80 @@
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from capstone import logging_utils, telemetry
+
+
+def _records(log_dir):
+    logging_utils.flush()
+    path = log_dir / "capstone.log"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_records_are_json_lines_with_request_id(tmp_path, monkeypatch):
+    logging_utils.stop_listener()
+    monkeypatch.setattr(logging_utils, "_log_dir", tmp_path)
+    logger = logging_utils.get_logger("capstone.test_logging_json")
+
+    token = logging_utils.request_id_var.set("req-123")
+    try:
+        logger.info("hello %s", "world")
+    finally:
+        logging_utils.request_id_var.reset(token)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("failed")
+
+    entries = [e for e in _records(tmp_path) if e["logger"] == "capstone.test_logging_json"]
+    assert entries[0]["msg"] == "hello world"
+    assert entries[0]["request_id"] == "req-123"
+    assert entries[1]["level"] == "ERROR"
+    assert "request_id" not in entries[1]
+    assert "RuntimeError: boom" in entries[1]["exc"]
+    errors = (tmp_path / "analysis-errors.log").read_text(encoding="utf-8")
+    assert "failed" in errors and "RuntimeError: boom" in errors and "hello world" not in errors
+    logging_utils.stop_listener()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = logging_utils.DroppingQueueHandler(queue.Queue(maxsize=2))
+    handler._listener_started = True
+    logger = logging.getLogger("capstone.test_logging_drop")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("record %d", i)
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_debug_sampler_limits_each_call_site():
+    sampler = logging_utils.DebugSampler(burst=3, window_s=60)
+
+    def record(level, lineno):
+        return logging.LogRecord("capstone.x", level, __file__, lineno, "m", None, None)
+
+    kept = [sampler.filter(record(logging.DEBUG, 10)) for _ in range(10)]
+    assert kept.count(True) == 3
+    assert sampler.filter(record(logging.DEBUG, 11))
+    assert all(sampler.filter(record(logging.INFO, 10)) for _ in range(10))
+    assert sampler.suppressed == 7
+
+
+def test_request_id_header_is_echoed_and_drop_counter_exported(tmp_path):
+    from capstone.api.server import create_app
+
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    r = client.get("/health", headers={"X-Request-ID": "abc-1"})
+    assert r.headers["x-request-id"] == "abc-1"
+    assert client.get("/health").headers["x-request-id"]
+
+    assert "capstone_log_records_dropped " in telemetry.render()
@@ -8,7 +8,6 @@ from capstone.api.routes import portfolio as portfolio_route
 @pytest.fixture(autouse=True)
 def no_auth(monkeypatch):
     monkeypatch.setattr(portfolio_route, "_check_auth", lambda request: None)
-    monkeypatch.setattr(portfolio_route, "_bind_current_user_from_session", lambda request: None)
 
 
 @pytest.fixture()
@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import profiling
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path / "profiles")
+    return TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+
+
+ADMIN = {"X-Profile-Token": "s3cret"}
+
+
+def test_profiled_request_writes_stacks_and_allocations(client):
+    r = client.get("/projects", headers={"X-Profile": "1", **ADMIN})
+    assert r.status_code == 200
+    profile_id = r.headers["x-profile-id"]
+
+    listing = client.get("/profiles", headers=ADMIN).json()
+    names = {p["name"] for p in listing["profiles"]}
+    assert {f"{profile_id}.collapsed", f"{profile_id}.alloc.txt"} <= names
+
+    report = client.get(f"/profiles/{profile_id}.alloc.txt", headers=ADMIN).text
+    assert report.startswith("# GET /projects")
+
+
+def test_profiling_requires_the_admin_token(client):
+    r = client.get("/projects", headers={"X-Profile": "1", "X-Profile-Token": "wrong"})
+    assert r.status_code == 200
+    assert "x-profile-id" not in r.headers
+    assert client.get("/profiles").status_code == 403
+    assert client.get("/profiles/../secrets", headers=ADMIN).status_code == 404
+
+
+def test_token_check(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+    assert profiling.token_matches("s3cret")
+    assert not profiling.token_matches("s3cre")
+    assert not profiling.token_matches("s3cret\u00e9")
+    assert not profiling.token_matches(None)
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling.token_matches("")
+
+
+def test_profiles_disabled_without_token(tmp_path, monkeypatch):
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    assert client.get("/profiles", headers={"X-Profile-Token": ""}).status_code == 404
+
+
+def test_directory_is_pruned_to_the_newest_files(tmp_path, monkeypatch):
+    import os
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    for i in range(5):
+        path = tmp_path / f"p{i}.collapsed"
+        path.write_text("x")
+        os.utime(path, (i, i))
+    assert profiling.prune(max_files=2) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["p3.collapsed", "p4.collapsed"]
+
+
+def test_sampler_collapses_stacks_by_thread():
+    import time
+
+    sampler = profiling.StackSampler(interval_s=0.001).start()
+    time.sleep(0.05)
+    sampler.stop()
+    assert sampler.samples > 0
+    assert any(line.startswith("MainThread;") for line in sampler.collapsed().splitlines())
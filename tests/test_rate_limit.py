@@ -0,0 +1,123 @@
+import asyncio
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from capstone.api.middleware.rate_limit import RateLimitMiddleware
+from capstone.api.routes import auth
+from capstone.api.server import create_app
+from capstone.rate_limit import EndpointClass, MemoryBuckets, RateLimiter, Rejection, SqliteBuckets
+
+
+def _limited(per_minute=60, burst=2, max_concurrent=10):
+    return EndpointClass(
+        "heavy",
+        per_minute=per_minute,
+        burst=burst,
+        max_concurrent=max_concurrent,
+        routes=((("POST", re.compile(r"^/heavy$"))),),
+    )
+
+
+def test_bucket_allows_burst_then_refills():
+    buckets = MemoryBuckets()
+    assert buckets.take("k", 1.0, 2, now=0.0) == 0.0
+    assert buckets.take("k", 1.0, 2, now=0.0) == 0.0
+    assert buckets.take("k", 1.0, 2, now=0.0) == 1.0
+    assert buckets.take("k", 1.0, 2, now=0.5) == 0.5
+    assert buckets.take("k", 1.0, 2, now=1.5) == 0.0
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    worker_a = SqliteBuckets(tmp_path / "limits.db")
+    worker_b = SqliteBuckets(tmp_path / "limits.db")
+    assert worker_a.take("k", 1.0, 1, now=100.0) == 0.0
+    assert worker_b.take("k", 1.0, 1, now=100.0) == 1.0
+
+
+def test_classify_matches_expensive_routes_only():
+    limiter = RateLimiter()
+    assert limiter.classify("POST", "/projects/upload").name == "upload"
+    assert limiter.classify("POST", "/projects/upload-sessions/abc/finalize").name == "upload"
+    assert limiter.classify("PUT", "/projects/upload-sessions/abc") is None
+    assert limiter.classify("POST", "/github/import").name == "github"
+    assert limiter.classify("POST", "/sienna/chat").name == "ai"
+    assert limiter.classify("GET", "/resumes/r1/export", "format=pdf").name == "pdf_export"
+    assert limiter.classify("GET", "/resumes/r1/export", "format=json") is None
+    assert limiter.classify("GET", "/projects") is None
+
+
+def test_concurrency_cap_is_global_and_released():
+    limiter = RateLimiter(classes=(_limited(burst=10, max_concurrent=1),), buckets=MemoryBuckets())
+    cls = limiter.classes[0]
+
+    first = limiter.admit(cls, "user:alice")
+    busy = limiter.admit(cls, "user:bob")
+    assert isinstance(busy, Rejection) and busy.reason == "busy"
+
+    first.release()
+    first.release()
+    assert limiter.running() == {"heavy": 0}
+    assert not isinstance(limiter.admit(cls, "user:bob"), Rejection)
+
+
+def test_env_overrides_class_limits(monkeypatch):
+    monkeypatch.setenv("CAPSTONE_RATE_LIMIT_HEAVY", "6,1,3")
+    cls = RateLimiter(classes=(_limited(),), buckets=MemoryBuckets()).classes[0]
+    assert (cls.per_minute, cls.burst, cls.max_concurrent) == (6.0, 1, 3)
+
+
+def test_middleware_returns_429_with_retry_after_per_user(monkeypatch):
+    monkeypatch.setitem(auth._SESSIONS, "tok-a", {"user": {"username": "alice"}})
+    app = FastAPI()
+
+    @app.post("/heavy")
+    def heavy():
+        return {"ok": True}
+
+    limiter = RateLimiter(classes=(_limited(per_minute=1, burst=1),), buckets=MemoryBuckets())
+    client = TestClient(RateLimitMiddleware(app, limiter=limiter))
+
+    assert client.post("/heavy").status_code == 200
+    rejected = client.post("/heavy")
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "60"
+    assert rejected.json()["retry_after"] == 60
+
+    # A signed-in user has their own bucket.
+    assert client.post("/heavy", headers={"Authorization": "Bearer tok-a"}).status_code == 200
+    assert limiter.running() == {"heavy": 0}
+
+
+def test_middleware_admits_off_the_event_loop():
+    app = FastAPI()
+
+    @app.post("/heavy")
+    def heavy():
+        return {"ok": True}
+
+    class RecordingBuckets(MemoryBuckets):
+        def take(self, key, rate_per_s, burst, now=None):
+            try:
+                asyncio.get_running_loop()
+                threads.append("event loop")
+            except RuntimeError:
+                threads.append("worker thread")
+            return super().take(key, rate_per_s, burst, now)
+
+    threads = []
+    limiter = RateLimiter(classes=(_limited(),), buckets=RecordingBuckets())
+    assert TestClient(RateLimitMiddleware(app, limiter=limiter)).post("/heavy").status_code == 200
+    assert threads == ["worker thread"]
+
+
+def test_server_limits_sienna_chat(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAPSTONE_RATE_LIMIT_AI", "1,1,4")
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+
+    client.post("/sienna/chat", json={"message": "hi"})
+    rejected = client.post("/sienna/chat", json={"message": "hi"}, headers={"Origin": "http://localhost"})
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert rejected.headers["access-control-allow-origin"]
@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+
+import pytest
+
+from capstone import session_store
+from capstone.session_store import SessionStore
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "sessions.db"
+
+
+def test_session_round_trip_and_revoke(db_path):
+    store = SessionStore(db_path)
+    store["tok"] = {"user": {"username": "alice"}}
+
+    assert "tok" in store
+    assert store["tok"] == {"user": {"username": "alice"}}
+    assert store.pop("tok") == {"user": {"username": "alice"}}
+    assert store.get("tok") is None
+    assert store.pop("tok", None) is None
+    with pytest.raises(KeyError):
+        store["tok"]
+
+
+def test_sessions_are_shared_between_processes(db_path):
+    # Two stores on one file stand in for two uvicorn workers.
+    worker_a = SessionStore(db_path, cache_ttl_s=0)
+    worker_b = SessionStore(db_path, cache_ttl_s=0)
+
+    worker_a["tok"] = {"user": {"username": "alice"}}
+    assert worker_b.get("tok") == {"user": {"username": "alice"}}
+
+    worker_b.pop("tok")
+    assert worker_a.get("tok") is None
+
+
+def test_tokens_are_not_stored_in_clear(db_path):
+    store = SessionStore(db_path)
+    store["secret-token"] = {"user": {"username": "alice"}}
+
+    with sqlite3.connect(db_path) as conn:
+        hashes = [row[0] for row in conn.execute("SELECT token_hash FROM sessions")]
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert hashes and "secret-token" not in hashes
+    assert mode == "wal"
+
+
+def test_update_keeps_original_expiry(db_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    store = SessionStore(db_path, ttl_s=60, cache_ttl_s=0)
+
+    store["tok"] = {"user": {"username": "alice"}}
+    clock[0] = 1050.0
+    store["tok"] = {"user": {"username": "alice", "city": "Kelowna"}}
+    assert store["tok"]["user"]["city"] == "Kelowna"
+
+    clock[0] = 1061.0
+    assert store.get("tok") is None
+
+
+def test_purge_removes_only_expired_sessions(db_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    store = SessionStore(db_path, ttl_s=60, cache_ttl_s=0)
+    store["old"] = {"user": {"username": "alice"}}
+    clock[0] = 1030.0
+    store["new"] = {"user": {"username": "bob"}}
+
+    clock[0] = 1070.0
+    assert store.purge_expired() == 1
+    assert len(store) == 1
+    assert store.get("new") is not None
+
+
+def test_expired_sessions_are_purged_in_the_background(db_path, monkeypatch):
+    monkeypatch.setattr(session_store, "PURGE_INTERVAL_S", 0.05)
+    store = SessionStore(db_path, ttl_s=-1, cache_ttl_s=0)
+    purged = threading.Event()
+    purge = store._purge
+
+    def record(now):
+        removed = purge(now)
+        if removed:
+            purged.set()
+        return removed
+
+    monkeypatch.setattr(store, "_purge", record)
+    store["old"] = {"user": {"username": "alice"}}
+    # Lookups only read; the purge thread does the delete.
+    assert store.get("old") is None
+    assert purged.wait(5)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+    store.close()
+
+
+def test_cache_serves_repeat_lookups_within_ttl(db_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    store = SessionStore(db_path, cache_ttl_s=5)
+    other_worker = SessionStore(db_path, cache_ttl_s=5)
+    store["tok"] = {"user": {"username": "alice"}}
+    assert store.get("tok") is not None
+
+    other_worker.pop("tok")
+    clock[0] = 1004.0
+    assert store.get("tok") is not None
+    clock[0] = 1006.0
+    assert store.get("tok") is None
+
+
+def test_cached_sessions_cannot_be_mutated_by_callers(db_path):
+    store = SessionStore(db_path)
+    store["tok"] = {"user": {"username": "alice"}}
+    store.get("tok")["user"]["username"] = "mallory"
+    assert store["tok"]["user"]["username"] == "alice"
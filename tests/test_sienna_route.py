@@ -77,17 +77,14 @@ class SiennaRouteTests(unittest.TestCase):
             debug=False,
         )
 
-        orig_restore = sienna._restore_user_from_request
         orig_tts = sienna._synthesize_openai_voice
         try:
-            sienna._restore_user_from_request = lambda _request: None
             sienna._synthesize_openai_voice = lambda _text: None
             out = sienna.ask_sienna(payload, _DummyRequest())
             self.assertEqual(out["context_mode"], "restricted")
             self.assertEqual(out["reply"], "I can only help with your Loom projects or Loom features.")
             self.assertIsNone(out["audio"])
         finally:
-            sienna._restore_user_from_request = orig_restore
             sienna._synthesize_openai_voice = orig_tts
 
     def test_ask_sienna_raises_when_external_consent_denied(self):
@@ -97,10 +94,8 @@ class SiennaRouteTests(unittest.TestCase):
             history=[],
             debug=False,
         )
-        orig_restore = sienna._restore_user_from_request
         orig_ensure = sienna.ensure_external_permission
         try:
-            sienna._restore_user_from_request = lambda _request: None
 
             def _deny(_service):
                 raise sienna.ExternalPermissionDenied("denied")
@@ -110,7 +105,6 @@ class SiennaRouteTests(unittest.TestCase):
                 sienna.ask_sienna(payload, _DummyRequest())
             self.assertEqual(exc.exception.status_code, 403)
         finally:
-            sienna._restore_user_from_request = orig_restore
             sienna.ensure_external_permission = orig_ensure
 
     def test_ask_sienna_success_debug_path(self):
@@ -133,7 +127,6 @@ class SiennaRouteTests(unittest.TestCase):
             zip_path=None,
         )
 
-        orig_restore = sienna._restore_user_from_request
         orig_ensure = sienna.ensure_external_permission
         orig_db = sienna._db_session
         orig_load = sienna._load_project_context
@@ -141,7 +134,6 @@ class SiennaRouteTests(unittest.TestCase):
         orig_call = sienna._call_openai
         orig_tts = sienna._synthesize_openai_voice
         try:
-            sienna._restore_user_from_request = lambda _request: None
             sienna.ensure_external_permission = lambda _service: None
             sienna._db_session = _dummy_db_session
             sienna._load_project_context = lambda _conn, _pid: project
@@ -161,7 +153,6 @@ class SiennaRouteTests(unittest.TestCase):
             self.assertEqual(out["audio"], "AQID")
             self.assertEqual(out["audio_format"], "mp3")
         finally:
-            sienna._restore_user_from_request = orig_restore
             sienna.ensure_external_permission = orig_ensure
             sienna._db_session = orig_db
             sienna._load_project_context = orig_load
@@ -171,17 +162,14 @@ class SiennaRouteTests(unittest.TestCase):
 
     def test_synthesize_voice_endpoint_returns_empty_on_failure(self):
         payload = sienna.SiennaVoiceRequest(text="hello")
-        orig_restore = sienna._restore_user_from_request
         orig_ensure = sienna.ensure_external_permission
         orig_tts = sienna._synthesize_openai_voice
         try:
-            sienna._restore_user_from_request = lambda _request: None
             sienna.ensure_external_permission = lambda _service: None
             sienna._synthesize_openai_voice = lambda _text: None
             out = sienna.synthesize_sienna_voice(payload, _DummyRequest())
             self.assertEqual(out, {"audio": None, "audio_format": None, "voice": None})
         finally:
-            sienna._restore_user_from_request = orig_restore
             sienna.ensure_external_permission = orig_ensure
             sienna._synthesize_openai_voice = orig_tts
 
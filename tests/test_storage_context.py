@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+from types import SimpleNamespace
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from capstone import storage
+from capstone.api.routes import auth
+from capstone.api.storage_context import StorageContext, get_storage_context, resolve_storage_context
+
+
+def _request(token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return SimpleNamespace(headers=headers, state=SimpleNamespace())
+
+
+def test_bound_guest_does_not_fall_back_to_process_user(monkeypatch):
+    monkeypatch.setattr(storage, "CURRENT_USER", "alice")
+
+    def _as_guest():
+        storage.bind_request_user(None)
+        return storage.get_current_user()
+
+    assert contextvars.copy_context().run(_as_guest) is None
+    assert storage.get_current_user() == "alice"
+
+
+def test_context_is_resolved_once_per_request(monkeypatch):
+    monkeypatch.setitem(auth._SESSIONS, "tok-a", {"user": {"username": "alice"}})
+    request = _request("tok-a")
+
+    ctx = resolve_storage_context(request)
+    assert ctx.username == "alice"
+    assert ctx.user == "alice"
+    assert not ctx.is_guest
+
+    monkeypatch.setitem(auth._SESSIONS, "tok-a", {"user": {"username": "mallory"}})
+    assert resolve_storage_context(request) is ctx
+
+
+def test_users_get_separate_databases(monkeypatch):
+    monkeypatch.setitem(auth._SESSIONS, "tok-a", {"user": {"username": "alice"}})
+    monkeypatch.setitem(auth._SESSIONS, "tok-b", {"user": {"username": "bob"}})
+
+    alice = resolve_storage_context(_request("tok-a"))
+    bob = resolve_storage_context(_request("tok-b"))
+    guest = resolve_storage_context(_request())
+
+    assert guest.is_guest
+    assert len({alice.db_path, bob.db_path, guest.db_path}) == 3
+
+
+def test_dependency_returns_request_context(monkeypatch):
+    monkeypatch.setitem(auth._SESSIONS, "tok-a", {"user": {"username": "alice"}})
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(ctx: StorageContext = Depends(get_storage_context)):
+        return {"user": ctx.user}
+
+    client = TestClient(app)
+    assert client.get("/whoami", headers={"Authorization": "Bearer tok-a"}).json() == {"user": "alice"}
+    assert client.get("/whoami").json() == {"user": None}
+
+
+def test_session_lookup_runs_off_the_event_loop(monkeypatch):
+    lookups = []
+
+    def _lookup(request):
+        try:
+            asyncio.get_running_loop()
+            lookups.append("event loop")
+        except RuntimeError:
+            lookups.append("worker thread")
+        return "alice"
+
+    monkeypatch.setattr(auth, "get_authenticated_username", _lookup)
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(ctx: StorageContext = Depends(get_storage_context)):
+        return {"user": ctx.user}
+
+    assert TestClient(app).get("/whoami").json() == {"user": "alice"}
+    assert lookups == ["worker thread"]
@@ -7,6 +7,7 @@ Extended storage layer tests covering:
 - Snapshot JSON export
 """
 
+import base64
 import json
 import sqlite3
 import sys
@@ -138,6 +139,67 @@ class SchemaResetTests(unittest.TestCase):
         self.assertIn("contributors", tables)
         self.assertNotIn("legacy_users", tables)
 
+    def test_open_db_creates_missing_tables_without_dropping_data(self) -> None:
+        conn = storage.open_db()
+        storage.store_analysis_snapshot(
+            conn, project_id="kept", classification="individual", snapshot={}
+        )
+        conn.execute("DROP TABLE activity_log")
+        conn.execute("DROP TABLE pack_members")
+        conn.commit()
+        storage.close_db()
+        storage._SCHEMA_READY.clear()
+
+        live = storage.open_db()
+        self.addCleanup(live.close)
+
+        tables = {
+            row[0]
+            for row in live.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        self.assertIn("activity_log", tables)
+        self.assertIn("pack_members", tables)
+        kept = live.execute(
+            "SELECT COUNT(*) FROM project_analysis WHERE project_id = 'kept'"
+        ).fetchone()[0]
+        self.assertEqual(kept, 1)
+
+    def test_open_db_moves_inline_thumbnails_into_the_file_store(self) -> None:
+        conn = storage.open_db()
+        storage.store_analysis_snapshot(
+            conn, project_id="thumbed", classification="individual", snapshot={}
+        )
+        conn.execute("DROP TABLE project_images")
+        conn.execute(
+            """
+            CREATE TABLE project_images (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                filename TEXT,
+                content_type TEXT,
+                image_b64 TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (project_id) REFERENCES projects(project_id) ON DELETE CASCADE
+            )
+            """
+        )
+        conn.execute(
+            "INSERT INTO project_images (project_id, filename, content_type, image_b64) VALUES (?, ?, ?, ?)",
+            ("thumbed", "cover.png", "image/png", base64.b64encode(b"png-bytes").decode("ascii")),
+        )
+        conn.commit()
+        storage.close_db()
+        storage._SCHEMA_READY.clear()
+
+        live = storage.open_db()
+        self.addCleanup(live.close)
+
+        columns = {row[1] for row in live.execute("PRAGMA table_info('project_images')")}
+        self.assertNotIn("image_b64", columns)
+        self.assertEqual(storage.fetch_project_thumbnail_bytes(live, "thumbed"), b"png-bytes")
+        meta = storage.fetch_project_thumbnail_meta(live, "thumbed")
+        self.assertEqual(meta["size_bytes"], len(b"png-bytes"))
+
 
 # ---------------------------------------------------------------------------
 # Project overrides
@@ -0,0 +1,53 @@
+import time
+
+import psutil
+from fastapi.testclient import TestClient
+
+from capstone.api.routes import system_metrics
+
+
+def test_sampler_keeps_a_bounded_history():
+    sampler = system_metrics.MetricsSampler(interval_s=60, history_size=3)
+    for _ in range(5):
+        sampler.sample()
+    history = sampler.history()
+    assert len(history) == 3
+    assert sampler.latest() is history[-1]
+    assert history[-1]["process_rss_mb"] > 0
+    assert 0 <= history[-1]["cpu"] <= 100 * (psutil.cpu_count() or 1)
+
+
+def test_summarize_skips_missing_values():
+    samples = [
+        {"cpu": 10.0, "memory": 50.0, "gpu": None},
+        {"cpu": 30.0, "memory": 70.0, "gpu": None},
+    ]
+    summary = system_metrics.summarize(samples, fields=("cpu", "memory", "gpu"))
+    assert summary["cpu"] == {"min": 10.0, "avg": 20.0, "max": 30.0}
+    assert summary["memory"]["avg"] == 60.0
+    assert summary["gpu"] is None
+
+
+def test_endpoint_answers_from_the_ring_buffer(tmp_path, monkeypatch):
+    from capstone.api.server import create_app
+
+    sampler = system_metrics.MetricsSampler(interval_s=60, history_size=10)
+    sampler.sample()
+    sampler.sample()
+    monkeypatch.setattr("capstone.api.server.metrics_sampler", sampler)
+    monkeypatch.setattr(psutil, "cpu_percent", _no_blocking_cpu_percent)
+
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+    started = time.perf_counter()
+    body = client.get("/system/system-metrics").json()
+    assert time.perf_counter() - started < 0.5
+    sampler.stop()
+
+    assert {"cpu", "memory", "gpu", "storage", "disk_io", "process", "history", "summary"} <= set(body)
+    assert len(body["history"]) == 2
+    assert body["summary"]["cpu"]["min"] <= body["summary"]["cpu"]["max"]
+
+
+def _no_blocking_cpu_percent(interval=None, **kwargs):
+    assert not interval, "request path must not block on cpu_percent"
+    return 1.0
@@ -0,0 +1,63 @@
+import io
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import file_store, storage, telemetry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = telemetry.Registry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="scan")
+    hist.observe(0.1, stage="scan")
+    hist.observe(3.0, stage="scan")
+    text = registry.render()
+    assert 'demo_seconds_bucket{stage="scan",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{stage="scan",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="scan",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="scan"} 3' in text
+    assert "# TYPE demo_seconds histogram" in text
+
+
+def test_counter_rejects_unknown_labels_and_escapes_values():
+    registry = telemetry.Registry()
+    counter = registry.counter("demo_total", "Demo.", ("route",))
+    with pytest.raises(ValueError):
+        counter.inc(path="/x")
+    counter.inc(route='say "hi"')
+    assert 'demo_total{route="say \\"hi\\""} 1' in registry.render()
+
+
+def test_sqlite_statements_are_counted():
+    before = telemetry.SQLITE_QUERIES.value(operation="select")
+    conn = storage.open_db()
+    conn.execute("SELECT 1").fetchone()
+    storage.close_db(conn)
+    assert telemetry.SQLITE_QUERIES.value(operation="select") > before
+
+
+def test_metrics_endpoint_reports_routes_and_analysis_stages(tmp_path, monkeypatch):
+    from capstone.api.server import create_app
+
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    client = TestClient(create_app(db_dir=str(tmp_path), auth_token=None))
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("README.md", "# demo\n")
+    r = client.post("/projects/upload", files={"file": ("demo.zip", buf.getvalue(), "application/zip")})
+    assert r.status_code == 200, r.text
+    client.get("/projects/does-not-exist")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    assert 'capstone_http_requests_total{method="POST",route="/projects/upload",status="200"}' in text
+    assert 'route="/projects/{id}",status="404"' in text
+    assert 'capstone_analysis_stage_duration_seconds_count{stage="scan"}' in text
+    assert 'capstone_sqlite_queries_total{operation="insert"}' in text
+    assert 'capstone_cache_hit_ratio{cache="archive_members"}' in text
+    assert 'capstone_executor_queue_depth{pool="blocking"}' in text
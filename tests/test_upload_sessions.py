@@ -0,0 +1,125 @@
+import hashlib
+import io
+import uuid
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from capstone import file_store, storage, upload_sessions
+
+
+def _zip_bytes(tag: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("README.md", f"# {tag}\n")
+        zf.writestr("main.py", "print('hello')\n" * 200)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_sessions, "UPLOADS_ROOT", tmp_path / "sessions")
+    monkeypatch.setattr(file_store, "DEFAULT_FILES_ROOT", tmp_path / "files")
+    return tmp_path
+
+
+def test_chunks_resume_after_restart_and_hash_incrementally(roots):
+    data = _zip_bytes("resume")
+    conn = storage.open_db()
+    try:
+        session = upload_sessions.create_session(conn, filename="demo.zip", total_size=len(data))
+        sid = session["session_id"]
+
+        upload_sessions.append_chunk(conn, sid, 0, data[:1000])
+        with pytest.raises(upload_sessions.OffsetMismatch) as gap:
+            upload_sessions.append_chunk(conn, sid, 2000, data[2000:3000])
+        assert gap.value.expected == 1000
+
+        # Simulate a process restart: in-memory hash state is gone.
+        upload_sessions._HASHERS.clear()
+        # A retried range overlapping received bytes only appends the new tail.
+        upload_sessions.append_chunk(conn, sid, 500, data[500:1500])
+        state = upload_sessions.append_chunk(conn, sid, 1500, data[1500:])
+        assert state["complete"]
+
+        part_path, digest, size, _ = upload_sessions.complete_session(conn, sid)
+        assert part_path.read_bytes() == data
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert size == len(data)
+    finally:
+        storage.close_db(conn)
+
+
+def test_declared_sha256_is_verified(roots):
+    data = b"PK" + b"x" * 64
+    conn = storage.open_db()
+    try:
+        session = upload_sessions.create_session(
+            conn, filename="demo.zip", total_size=len(data), expected_sha256="0" * 64
+        )
+        upload_sessions.append_chunk(conn, session["session_id"], 0, data)
+        with pytest.raises(ValueError):
+            upload_sessions.complete_session(conn, session["session_id"])
+        assert upload_sessions.delete_session(conn, session["session_id"])
+        assert not Path(session["part_path"]).exists()
+    finally:
+        storage.close_db(conn)
+
+
+def test_expired_sessions_are_purged(roots):
+    conn = storage.open_db()
+    try:
+        session = upload_sessions.create_session(conn, filename="demo.zip", total_size=10)
+        conn.execute(
+            "UPDATE upload_sessions SET updated_at = '2000-01-01 00:00:00' WHERE session_id = ?",
+            (session["session_id"],),
+        )
+        assert upload_sessions.purge_expired(conn) == 1
+        assert upload_sessions.get_session(conn, session["session_id"]) is None
+    finally:
+        storage.close_db(conn)
+
+
+def test_api_chunked_upload_finalizes_into_file_store(roots):
+    from capstone.api.server import create_app
+
+    client = TestClient(create_app(db_dir=str(roots), auth_token=None))
+    data = _zip_bytes(uuid.uuid4().hex)
+    project_id = f"chunked-{uuid.uuid4().hex[:8]}"
+
+    r = client.post(
+        "/projects/upload-sessions",
+        json={"filename": "demo.zip", "size": len(data), "project_id": project_id},
+    )
+    assert r.status_code == 200, r.text
+    sid = r.json()["session_id"]
+
+    half = len(data) // 2
+    r = client.put(
+        f"/projects/upload-sessions/{sid}",
+        content=data[:half],
+        headers={"Content-Range": f"bytes 0-{half - 1}/{len(data)}"},
+    )
+    assert r.json()["received_bytes"] == half
+
+    r = client.post(f"/projects/upload-sessions/{sid}/finalize")
+    assert r.status_code == 409
+    assert r.json()["received_bytes"] == half
+
+    assert client.get(f"/projects/upload-sessions/{sid}").json()["received_bytes"] == half
+    r = client.put(
+        f"/projects/upload-sessions/{sid}",
+        content=data[half:],
+        headers={"Content-Range": f"bytes {half}-{len(data) - 1}/{len(data)}"},
+    )
+    assert r.json()["complete"]
+
+    r = client.post(f"/projects/upload-sessions/{sid}/finalize")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["project_id"] == project_id
+    assert body["hash"] == hashlib.sha256(data).hexdigest()
+    assert Path(body["stored_path"]).read_bytes() == data
+    assert client.get(f"/projects/upload-sessions/{sid}").status_code == 404